@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Adaptive (AIMD) send concurrency for the Daily Mitzvah Bot
+
+Twilio's throughput for a WhatsApp sender changes with its messaging tier,
+so a fixed SEND_CONCURRENCY / SEND_RATE_PER_SECOND either leaves headroom
+unused or runs into 429s. With SEND_ADAPTIVE_CONCURRENCY=true a run gates
+its sends through an AIMDController instead:
+
+- additive increase: after each window of completed requests (about one
+  round trip's worth: max(MIN_WINDOW, current limit) requests) whose p95
+  latency is within the target, the limit grows by `increase`;
+- multiplicative decrease: a 429 or a window p95 above the target
+  multiplies the limit by `decrease`. One overload returns a burst of 429s,
+  so 429s decrease the limit at most once per round trip (the best window
+  p95 of accepted requests), as in TCP congestion control;
+- Retry-After holds every new request until it has passed.
+
+The latency target is SEND_LATENCY_TARGET_MS, or `latency_tolerance` times
+the best window p95 seen so far (server-side queueing shows up as p95
+growth before it turns into 429s). The limit stays within [minimum,
+maximum]; `maximum` is also the size of the pool the sends run on.
+
+summary() goes into the run's delivery report: the limit's range and the
+rate curve (concurrency, accepted requests/second, p95 and the running
+count of accepted requests, per window).
+"""
+
+import threading
+import time
+
+try:
+    from bots import fanout
+except ImportError:
+    import fanout
+
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_INCREASE = 1.0
+DEFAULT_DECREASE = 0.7
+DEFAULT_LATENCY_TOLERANCE = 2.0
+MIN_WINDOW = 16  # requests per adjustment at low limits
+MAX_HOLD_SECONDS = 8.0  # longest Retry-After honoured
+MAX_CURVE_POINTS = 40
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class AIMDController:
+    """
+    Thread-safe concurrency gate whose limit follows AIMD. Senders call
+    acquire() (or try_acquire() from an event loop) before a request,
+    observe() with its outcome, and release() when done.
+    """
+
+    def __init__(self, initial=fanout.DEFAULT_CONCURRENCY, minimum=1, maximum=DEFAULT_MAX_CONCURRENCY,
+                 increase=DEFAULT_INCREASE, decrease=DEFAULT_DECREASE, latency_target=None,
+                 latency_tolerance=DEFAULT_LATENCY_TOLERANCE, clock=time.monotonic):
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.initial = self.limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.latency_tolerance = latency_tolerance
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._hold_until = 0.0
+        self._baseline = None
+        self._last_decrease = float('-inf')
+        self.accepted = 0
+        self.started = clock()
+        self.throttled = 0
+        self.increases = 0
+        self.decreases = 0
+        self.lowest = self.highest = self.concurrency
+        self.curve = []
+        self._reset_window(self.started)
+
+    @property
+    def concurrency(self):
+        return int(self.limit)
+
+    def _reset_window(self, now):
+        self._window_start = now
+        self._window_count = 0
+        self._window_accepted = 0
+        self._latencies = []
+        self._window_throttled = False
+
+    def hold_remaining(self):
+        return max(0.0, self._hold_until - self._clock())
+
+    def try_acquire(self):
+        """Take a slot if one is free and no Retry-After hold is active."""
+        with self._cond:
+            if self._in_flight >= self.concurrency or self._clock() < self._hold_until:
+                return False
+            self._in_flight += 1
+            return True
+
+    def acquire(self):
+        """Block until a slot is free and any Retry-After hold has passed."""
+        with self._cond:
+            while True:
+                hold = self._hold_until - self._clock()
+                if hold > 0:
+                    self._cond.wait(hold)
+                elif self._in_flight < self.concurrency:
+                    self._in_flight += 1
+                    return
+                else:
+                    self._cond.wait(0.05)
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def observe(self, latency, throttled=False, retry_after=None):
+        """Record one request: its latency (seconds) and whether it was throttled (429)."""
+        with self._cond:
+            now = self._clock()
+            self._window_count += 1
+            if throttled:
+                self.throttled += 1
+                self._window_throttled = True
+                if retry_after:
+                    self._hold_until = max(self._hold_until, now + min(float(retry_after), MAX_HOLD_SECONDS))
+                if now - self._last_decrease >= (self._baseline or latency):
+                    self._decrease(now)
+            else:
+                # A 429 comes back without queueing at the server; its latency says nothing
+                self.accepted += 1
+                self._window_accepted += 1
+                self._latencies.append(latency)
+            if self._window_count >= max(MIN_WINDOW, self.concurrency):
+                self._adjust(now)
+
+    def _decrease(self, now):
+        self._last_decrease = now
+        self.limit = max(float(self.minimum), self.limit * self.decrease)
+        self.decreases += 1
+        self.lowest = min(self.lowest, self.concurrency)
+
+    def _adjust(self, now):
+        p95 = percentile(self._latencies, 0.95) if self._latencies else None
+        if p95 is not None and not self._window_throttled:
+            self._baseline = p95 if self._baseline is None else min(self._baseline, p95)
+        target = self.latency_target or (self._baseline or 0) * self.latency_tolerance
+        if self._window_throttled:
+            pass  # already decreased when the 429 arrived
+        elif p95 is not None and target and p95 > target:
+            self._decrease(now)
+        elif self.limit < self.maximum:
+            self.limit = min(float(self.maximum), self.limit + self.increase)
+            self.increases += 1
+            self.highest = max(self.highest, self.concurrency)
+        elapsed = now - self._window_start
+        self.curve.append({
+            't': round(now - self.started, 2),
+            'concurrency': self.concurrency,
+            'rate': round(self._window_accepted / elapsed, 1) if elapsed > 0 else None,
+            'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+            'accepted': self.accepted,
+        })
+        self._reset_window(now)
+        self._cond.notify_all()
+
+    def summary(self):
+        """Limit range, signals and the (downsampled) rate curve, for DeliveryReport.to_dict()."""
+        step = max(1, -(-len(self.curve) // MAX_CURVE_POINTS))
+        curve = self.curve[::step]
+        if self.curve and curve[-1] is not self.curve[-1]:
+            curve.append(self.curve[-1])
+        return {
+            'adaptive': True,
+            'initial': int(self.initial),
+            'final': self.concurrency,
+            'min': self.lowest,
+            'max': self.highest,
+            'throttled': self.throttled,
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'latency_target_ms': round((self.latency_target or (self._baseline or 0) * self.latency_tolerance)
+                                       * 1000, 1) or None,
+            'curve': curve,
+        }
+
+    def __repr__(self):
+        return f"AIMDController({self.concurrency} in [{self.minimum}, {self.maximum}])"
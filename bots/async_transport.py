@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+asyncio transport for Twilio message sends
+
+An alternative to the synchronous twilio.rest.Client: messages are POSTed to
+the Twilio Messages REST resource over a pool of keep-alive HTTP/1.1
+connections driven by one event loop, so many requests can be in flight
+without a thread per request and without a new TCP/TLS handshake per message.
+
+Standard library only (asyncio streams + ssl), so it adds nothing to the
+Lambda package. Selected with SEND_TRANSPORT=async; see
+MitzvahLambdaBot.send_daily_mitzvah.
+
+- Every request has its own timeout; a timed-out connection is discarded.
+- Retryable failures (429, 5xx, connection errors; see send_failures) are
+  retried after Retry-After or a jittered exponential pause while the
+  deadline allows.
+- When the deadline (the Lambda time budget) passes, outstanding sends are
+  cancelled and reported as failed results; once the circuit breaker opens,
+  no further sends are started.
+- With an adaptive controller (bots.adaptive_concurrency), sends are started
+  while the controller has a free slot, and every request reports its
+  latency and any 429 to it.
+- AsyncSender keeps the event loop and connection pool alive between runs,
+  so a warm Lambda container reuses its connections.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import time
+from urllib.parse import urlencode, urlsplit
+
+try:
+    from bots.fanout import ABORTED, IN_FLIGHT, NOT_SENT, SendResult
+    from bots.prepared_delivery import FORM_FIELDS
+    from bots import send_failures
+except ImportError:
+    from fanout import ABORTED, IN_FLIGHT, NOT_SENT, SendResult
+    from prepared_delivery import FORM_FIELDS
+    import send_failures
+
+logger = logging.getLogger()
+
+TWILIO_API_BASE_URL = 'https://api.twilio.com'
+DEFAULT_REQUEST_TIMEOUT = 10.0
+DEFAULT_MAX_RETRIES = send_failures.DEFAULT_MAX_RETRIES
+CONTROLLER_POLL_SECONDS = 0.005  # wait between checks for a free adaptive-concurrency slot
+
+
+class TwilioHTTPError(Exception):
+    """Non-2xx response from the Messages resource."""
+
+    def __init__(self, status, message, code=None, retry_after=None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.code = code
+        self.retry_after = retry_after
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+
+    async def request(self, head, body):
+        self.writer.write(head + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before response")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            payload = await self._read_chunked()
+        elif 'content-length' in headers:
+            payload = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            payload = await self.reader.read()
+            self.reusable = False
+        if headers.get('connection', '').lower() == 'close':
+            self.reusable = False
+        return status, headers, payload
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                await self.reader.readline()
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self):
+        self.reusable = False
+        self.writer.close()
+
+
+class AsyncTwilioTransport:
+    """
+    Posts messages to /2010-04-01/Accounts/<sid>/Messages.json over at most
+    max_connections pooled keep-alive connections. Must be used from a
+    single event loop.
+    """
+
+    def __init__(self, account_sid, auth_token, base_url=TWILIO_API_BASE_URL, max_connections=16,
+                 request_timeout=DEFAULT_REQUEST_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.use_ssl = url.scheme == 'https'
+        self.port = url.port or (443 if self.use_ssl else 80)
+        self.path = f"/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.max_connections = max(1, int(max_connections))
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        credentials = base64.b64encode(f"{account_sid}:{auth_token}".encode()).decode()
+        self._headers = (
+            f"Host: {self.host}\r\n"
+            f"Authorization: Basic {credentials}\r\n"
+            "Accept: application/json\r\n"
+            "Content-Type: application/x-www-form-urlencoded\r\n"
+            "Connection: keep-alive\r\n"
+        )
+        self._idle = []
+        self._slots = None
+        self._ssl_context = None
+        self.stats = {'requests': 0, 'connections': 0, 'throttled': 0, 'timeouts': 0, 'retries': 0}
+
+    async def _acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+        await self._slots.acquire()
+        while self._idle:
+            conn = self._idle.pop()
+            if not conn.reader.at_eof():
+                return conn, True
+            conn.close()
+        try:
+            return await self._open(), False
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn):
+        if conn.reusable:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    async def _open(self):
+        ssl_context = None
+        if self.use_ssl:
+            if self._ssl_context is None:
+                import ssl
+                self._ssl_context = ssl.create_default_context()
+            ssl_context = self._ssl_context
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ssl_context), self.request_timeout
+        )
+        self.stats['connections'] += 1
+        return _Connection(reader, writer)
+
+    async def _post(self, body):
+        head = (f"POST {self.path} HTTP/1.1\r\n{self._headers}"
+                f"Content-Length: {len(body)}\r\n\r\n").encode()
+        conn, reused = await self._acquire()
+        try:
+            self.stats['requests'] += 1
+            try:
+                return await asyncio.wait_for(conn.request(head, body), self.request_timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection; retry once on a new one
+                conn.close()
+                conn = await self._open()
+                return await asyncio.wait_for(conn.request(head, body), self.request_timeout)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            conn.close()
+            raise
+        except BaseException:
+            conn.close()
+            raise
+        finally:
+            self._release(conn)
+
+    async def send(self, deadline=None, **params):
+        """
+        Create one message; params are client.messages.create keywords
+        (to, from_, body | content_sid + content_variables). Returns the message SID.
+        """
+        form = {FORM_FIELDS[k]: v for k, v in params.items() if v is not None}
+        return await self.send_form(urlencode(form).encode(), deadline)
+
+    async def send_form(self, form, deadline=None, observe=None):
+        """
+        Create one message from an already URL-encoded form (bytes). Returns
+        the message SID. observe(latency, throttled, retry_after) is called
+        after every request.
+        """
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                status, headers, payload = await self._post(form)
+            except (OSError, asyncio.IncompleteReadError) as e:
+                error = e
+                if observe is not None:
+                    observe(time.perf_counter() - start)
+            else:
+                try:
+                    data = json.loads(payload) if payload else {}
+                except ValueError:
+                    data = {}
+                if 200 <= status < 300:
+                    if observe is not None:
+                        observe(time.perf_counter() - start)
+                    return data.get('sid')
+                retry_after = headers.get('retry-after')
+                error = TwilioHTTPError(status, data.get('message', 'request failed'), data.get('code'),
+                                        float(retry_after) if retry_after else None)
+                if status == 429:
+                    self.stats['throttled'] += 1
+                if observe is not None:
+                    observe(time.perf_counter() - start, send_failures.is_throttled(error), error.retry_after)
+
+            if not send_failures.should_retry(error):
+                raise error
+            pause = send_failures.backoff_delay(attempt, getattr(error, 'retry_after', None))
+            if attempt >= self.max_retries or (deadline is not None and time.monotonic() + pause > deadline):
+                raise error
+            attempt += 1
+            self.stats['retries'] += 1
+            await asyncio.sleep(pause)
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+
+async def send_all(transport, recipients, build_form, deadline=None, limiter=None, breaker=None, controller=None):
+    """
+    Send to every recipient with transport.send_form(build_form(recipient)),
+    e.g. PreparedDelivery.form.
+
+    One dispatcher starts the sends strictly in recipient order, each once a
+    connection slot and a limiter token are free, so the sends never started
+    always form a suffix of the list (what a resumable run picks up later).
+    Returns SendResults in recipient order; at `deadline` (time.monotonic())
+    dispatching stops and sends in flight are cancelled: those are reported
+    as IN_FLIGHT (Twilio may have accepted them), the rest as NOT_SENT.
+    Once `breaker` opens, dispatching stops and the rest are ABORTED. With a
+    `controller` a send (with its retries) also holds one of its slots.
+    """
+    results = [None] * len(recipients)
+    slots = asyncio.Semaphore(transport.max_connections)
+    in_flight = set()
+    observe = controller.observe if controller is not None else None
+
+    async def run(i, recipient):
+        start = time.perf_counter()
+        try:
+            sid = await transport.send_form(build_form(recipient), deadline, observe)
+            result = SendResult(recipient, sid=sid)
+        except asyncio.CancelledError:
+            result = SendResult(recipient, error=IN_FLIGHT)
+        except asyncio.TimeoutError:
+            result = SendResult(recipient, error=f"timed out after {transport.request_timeout:g}s",
+                                category=send_failures.RETRYABLE)
+        except Exception as e:
+            result = SendResult(recipient, error=str(e), category=send_failures.classify(e))
+        finally:
+            slots.release()
+            if controller is not None:
+                controller.release()
+        result.elapsed = time.perf_counter() - start
+        results[i] = result
+        if breaker is not None:
+            breaker.record(result)
+
+    async def dispatch():
+        for i, recipient in enumerate(recipients):
+            await slots.acquire()
+            if controller is not None:
+                while not controller.try_acquire():
+                    await asyncio.sleep(max(controller.hold_remaining(), CONTROLLER_POLL_SECONDS))
+            if breaker is not None and breaker.open:
+                slots.release()
+                if controller is not None:
+                    controller.release()
+                break
+            if limiter is not None:
+                wait = limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            task = asyncio.ensure_future(run(i, recipient))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.wait(set(in_flight))
+
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    try:
+        await asyncio.wait_for(dispatch(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Time budget exhausted; cancelling {len(in_flight)} sends in flight, "
+                       f"{results.count(None) - len(in_flight)} not started")
+        pending = list(in_flight)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    unsent = ABORTED if breaker is not None and breaker.open else NOT_SENT
+    return [
+        SendResult(recipient, error=unsent) if result is None else result
+        for recipient, result in zip(recipients, results)
+    ]
+
+
+class AsyncSender:
+    """
+    Synchronous facade for the bot: owns an event loop and an
+    AsyncTwilioTransport that persist across runs (and warm invocations).
+    """
+
+    def __init__(self, account_sid, auth_token, **transport_options):
+        self.loop = asyncio.new_event_loop()
+        self.transport = AsyncTwilioTransport(account_sid, auth_token, **transport_options)
+
+    def send_all(self, recipients, build_form, deadline=None, limiter=None, breaker=None, controller=None):
+        return self.loop.run_until_complete(
+            send_all(self.transport, list(recipients), build_form, deadline=deadline, limiter=limiter,
+                     breaker=breaker, controller=controller)
+        )
+
+    def close(self):
+        self.loop.run_until_complete(self.transport.close())
+        self.loop.close()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Subscriber change recorder Lambda for WhatsApp Daily Mitzvah
+- Consumes the subscribers table's DynamoDB stream (NEW_AND_OLD_IMAGES)
+- Records each subscriber whose active state changed (the sparse index key
+  active_channel appeared or disappeared; bots/subscriber_index.py) in the
+  change log (SUBSCRIBER_CHANGES_TABLE, bots/subscriber_changes.py), so the
+  bot's recipient snapshot follows consent changes, the index backfill and
+  manual edits alike, while a consent webhook makes a single write
+- Reports the first record it could not log (ReportBatchItemFailures), so
+  the stream retries from there and each subscriber's changes stay in order
+
+A record delivered again after a retry is logged again; snapshots apply
+changes idempotently.
+"""
+
+import logging
+
+try:
+    from bots import subscriber_changes
+    from bots import subscriber_index
+except ImportError:
+    import subscriber_changes
+    import subscriber_index
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Reused across warm invocations
+_change_log = None
+
+
+def _get_change_log():
+    global _change_log
+    if _change_log is None:
+        _change_log = subscriber_changes.change_log_from_env()
+        if _change_log is None:
+            raise RuntimeError("SUBSCRIBER_CHANGES_TABLE env var is required")
+    return _change_log
+
+
+def _is_active(image):
+    """Whether a stream image (DynamoDB JSON) carries the active-subscribers index key."""
+    return subscriber_index.ACTIVE_ATTRIBUTE in (image or {})
+
+
+def _consume(records):
+    recorded = 0
+    for record in records:
+        data = record.get("dynamodb") or {}
+        active = _is_active(data.get("NewImage"))
+        if active == _is_active(data.get("OldImage")):
+            continue  # evidence or timezone only, or a repeated status
+        phone = data["Keys"]["phone"]["S"]
+        try:
+            version = _get_change_log().record(phone, active)
+        except Exception:
+            logger.exception(f"Could not record the change of {phone}; the stream retries from it")
+            return {"batchItemFailures": [{"itemIdentifier": data["SequenceNumber"]}]}
+        logger.info(f"Recorded subscriber change {version} for {phone} ({'active' if active else 'inactive'})")
+        recorded += 1
+    logger.info(f"Recorded {recorded} changes from {len(records)} stream records")
+    return {"batchItemFailures": []}
+
+
+def lambda_handler(event, context):
+    return _consume(event.get("Records") or [])
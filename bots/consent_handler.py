@@ -3,20 +3,40 @@
 Consent capture Lambda for WhatsApp Daily Mitzvah
 - Handles Twilio inbound webhooks (JOIN/STOP) for WhatsApp
 - Handles simple web form/JSON opt-in submissions
-- Stores consent in DynamoDB table defined by SUBSCRIBERS_TABLE
+- Stores consent in DynamoDB table defined by SUBSCRIBERS_TABLE (or the
+  SQLite file SUBSCRIBERS_DB offline; bots/subscriber_store.py), with the
+  subscriber's timezone (from the country code) and, while opted in, the
+  sparse index keys the bot queries (bots/subscriber_index.py)
+- Deployed, the subscribers table's stream feeds the change log
+  (bots/change_recorder.py), so a consent change is one write here. Where
+  there is no stream (local runs with SUBSCRIBER_CHANGES_FILE) the handler
+  records the change itself (bots/subscriber_changes.py)
 """
 
 import json
 import logging
 import os
+import time
 from datetime import datetime, timezone
 from urllib.parse import parse_qs
 
-import importlib
+try:
+    from bots import subscriber_index
+    from bots import subscriber_changes
+    from bots import subscriber_store
+except ImportError:
+    import subscriber_index
+    import subscriber_changes
+    import subscriber_store
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+_change_log = subscriber_changes.change_log_from_env()
+_store = None
+
+CHANGE_RECORD_ATTEMPTS = 3
+
 
 def _now_iso():
     return datetime.now(timezone.utc).isoformat()
@@ -31,14 +51,14 @@ def _strip_channel_prefix(phone: str) -> str:
     return phone
 
 
-def _get_table():
-    table_name = os.environ.get("SUBSCRIBERS_TABLE")
-    if not table_name:
-        raise RuntimeError("SUBSCRIBERS_TABLE env var is required")
-    # Dynamically import boto3 to avoid local lint errors when not installed
-    boto3 = importlib.import_module("boto3")
-    ddb = boto3.resource("dynamodb")
-    return ddb.Table(table_name)
+def _get_store():
+    """The subscriber store (and its boto3 Table), created once per container."""
+    global _store
+    if _store is None:
+        _store = subscriber_store.store_from_env()
+        if _store is None:
+            raise RuntimeError("SUBSCRIBERS_TABLE (or SUBSCRIBERS_DB) env var is required")
+    return _store
 
 
 def _respond(status=200, body=None, headers=None, is_xml=False):
@@ -89,28 +109,48 @@ def _parse_event(event):
     return is_http, (method or "GET").upper(), headers, query, body_raw, body_json, body_form
 
 
-def _upsert_subscriber(phone: str, status: str, source: str, evidence: dict):
-    table = _get_table()
-    item = {
-        "phone": phone,
-        "channel": "whatsapp",
-        "consent_purpose": "daily_mitzvot",
-        "consent_status": status,  # opted_in | opted_out
-        "source": source,
-        "evidence": evidence,
-        "timestamp_iso": _now_iso(),
-        "updated_by": "system",
-    }
-    table.put_item(Item=item)
-    return item
+def _transition_subscriber(phone: str, status: str, source: str, evidence: dict) -> bool:
+    """
+    Move a subscriber to `status` in one conditional write. Returns False,
+    writing nothing, if they already had it (a repeated or concurrent
+    duplicate webhook), so confirmations stay idempotent without a read first.
+    """
+    item = subscriber_store.subscriber_record(phone, status, source, evidence, _now_iso())
+    changed, previous = _get_store().transition(item)
+    if changed:
+        logger.info(f"{phone}: {(previous or {}).get('consent_status', 'new')} -> {status}")
+    else:
+        logger.info(f"{phone} is already {status}")
+    if _change_log is not None:
+        # A duplicate records the change again, in case an earlier delivery wrote it but failed to log it
+        _record_change(phone, status, subscriber_index.ACTIVE_ATTRIBUTE in item)
+    return changed
+
+
+def _record_change(phone: str, status: str, active: bool):
+    """
+    Append a consent change to the change log (no stream recorder), retrying.
+    If every attempt fails the request fails, and a repeat of the webhook
+    records it. Recording a change twice is harmless; snapshots apply changes
+    idempotently.
+    """
+    for attempt in range(1, CHANGE_RECORD_ATTEMPTS + 1):
+        try:
+            version = _change_log.record(phone, active)
+            break
+        except Exception as e:
+            if attempt == CHANGE_RECORD_ATTEMPTS:
+                logger.error(f"Could not record the change of {phone} to {status}: {e}")
+                raise
+            logger.warning(f"Recording the change of {phone} failed ({e}); retrying")
+            time.sleep(0.1 * attempt)
+    logger.info(f"Recorded subscriber change {version} for {phone} ({status})")
 
 
 def _get_subscriber(phone: str):
     """Fetch an existing subscriber record by phone, if present."""
     try:
-        table = _get_table()
-        resp = table.get_item(Key={"phone": phone})
-        return resp.get("Item")
+        return _get_store().get(phone)
     except Exception:
         return None
 
@@ -124,15 +164,14 @@ def _handle_twilio_inbound(headers, form):
     logger.info(f"Twilio inbound: From={from_num}, To={to_num}, Body='{body_text}', MessageSid={message_sid}")
 
     txt = body_text.lower()
-    # Fetch current status (for idempotent confirmations)
-    existing = _get_subscriber(from_num) or {}
-    current_status = existing.get("consent_status")
-
-    logger.info(f"Current subscriber status for {from_num}: {current_status}")
 
     # STATUS inquiry (respond with current state and guidance)
     if txt.startswith("status"):
         logger.info(f"Processing STATUS request for {from_num}")
+        # Only STATUS reads the record; JOIN/STOP find out from their conditional write
+        existing = _get_subscriber(from_num) or {}
+        current_status = existing.get("consent_status")
+        logger.info(f"Current subscriber status for {from_num}: {current_status}")
         if not existing:
             logger.info("User not found, sending 'not subscribed' response")
             return _respond(200, _twiml("You are not subscribed yet. Reply JOIN MITZVAH to subscribe, or STOP to opt out."), is_xml=True)
@@ -155,14 +194,13 @@ def _handle_twilio_inbound(headers, form):
         return _respond(200, _twiml("Your status is not set. Reply JOIN MITZVAH to subscribe, or STOP to opt out."), is_xml=True)
     # Treat exact STOP/UNSUBSCRIBE/CANCEL as opt-out
     if txt in ("stop", "unsubscribe", "cancel"):
-        if current_status == "opted_out":
-            return _respond(200, _twiml("You are already unsubscribed. Reply JOIN MITZVAH to re-subscribe."), is_xml=True)
-        _upsert_subscriber(
+        if not _transition_subscriber(
             phone=from_num,
             status="opted_out",
             source="whatsapp_keyword",
             evidence={"messageSid": message_sid, "to": to_num},
-        )
+        ):
+            return _respond(200, _twiml("You are already unsubscribed. Reply JOIN MITZVAH to re-subscribe."), is_xml=True)
         return _respond(200, _twiml("You are unsubscribed. Reply JOIN MITZVAH to re-subscribe."), is_xml=True)
 
     # Allow opt-in via JOIN/START/YES/JOIN MITZVAH or the word SUBSCRIBE (but not 'unsubscribe')
@@ -178,14 +216,13 @@ def _handle_twilio_inbound(headers, form):
         or txt == "join mitzvah"
         or _has_word(txt, "subscribe")
     ):
-        if current_status == "opted_in":
-            return _respond(200, _twiml("You’re already subscribed to Daily Mitzvah. Reply STOP to opt out."), is_xml=True)
-        _upsert_subscriber(
+        if not _transition_subscriber(
             phone=from_num,
             status="opted_in",
             source="whatsapp_keyword",
             evidence={"messageSid": message_sid, "to": to_num, "body": body_text},
-        )
+        ):
+            return _respond(200, _twiml("You’re already subscribed to Daily Mitzvah. Reply STOP to opt out."), is_xml=True)
         return _respond(200, _twiml("You’re subscribed to Daily Mitzvah. Reply STOP to opt out."), is_xml=True)
 
     # Guidance fallback
@@ -201,13 +238,13 @@ def _handle_web_optin(query, body_json, body_form):
         return _respond(400, {"error": "Missing phone"})
 
     if action.lower() in ("optout", "unsubscribe", "stop"):
-        _upsert_subscriber(phone=phone, status="opted_out", source="web_form", evidence={"action": action})
+        _transition_subscriber(phone=phone, status="opted_out", source="web_form", evidence={"action": action})
         return _respond(200, {"status": "ok", "message": "Unsubscribed"})
 
     # Treat consent truthy values as opt-in
     truthy = {"true", "1", "yes", "on", True}
     status = "opted_in" if (str(consent).lower() in truthy or action.lower() == "optin") else "opted_out"
-    _upsert_subscriber(phone=phone, status=status, source="web_form", evidence={"action": action})
+    _transition_subscriber(phone=phone, status=status, source="web_form", evidence={"action": action})
     return _respond(200, {"status": "ok", "message": "Subscribed" if status == "opted_in" else "Not subscribed"})
 
 
@@ -223,7 +260,7 @@ def lambda_handler(event, context):
             return _respond(200, {
                 "service": "consent",
                 "time": _now_iso(),
-                "table": os.environ.get("SUBSCRIBERS_TABLE", "unset"),
+                "table": os.environ.get("SUBSCRIBERS_TABLE") or os.environ.get("SUBSCRIBERS_DB", "unset"),
             })
 
         # POST: Twilio inbound vs web form
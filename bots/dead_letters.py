@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Dead-letter store for permanently failed sends
+
+A send that fails PERMANENT (see send_failures: invalid or unreachable
+number, unsubscribed, other 4xx) is not retried by the run or by the next
+pass over the list. Instead it is recorded here as (delivery date, phone,
+reason). After the cause is fixed (number corrected, channel approved, ...)
+the replay entry point resends that date's message to exactly those records
+({"replay_dead_letters": "<date>"}, see lambda_handler). Records that then
+succeed are resolved; ones that fail again keep their latest reason.
+
+Stores:
+- DynamoDeadLetterStore: DEAD_LETTER_TABLE (delivery_date + phone, expired by TTL)
+- FileDeadLetterStore: a local NDJSON file (DEAD_LETTER_FILE), for tests and local runs
+"""
+
+import importlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+try:
+    from bots.send_failures import PERMANENT
+except ImportError:
+    from send_failures import PERMANENT
+
+logger = logging.getLogger()
+
+DEFAULT_DEAD_LETTER_FILE = '/tmp/mitzvah_dead_letters.ndjson'
+DEAD_LETTER_TTL_SECONDS = 35 * 24 * 3600
+
+
+def dead_letter_entries(results):
+    """(phone, reason) for the SendResults that failed permanently."""
+    return [(r.recipient, r.error) for r in results if not r.ok and r.category == PERMANENT]
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FileDeadLetterStore:
+    """
+    Dead letters as an append-only NDJSON file of {date, phone, reason,
+    status} lines; the last line for a (date, phone) wins, so a resolved
+    record is a 'resolved' line appended after it.
+    """
+
+    def __init__(self, path=DEFAULT_DEAD_LETTER_FILE):
+        self.path = path
+
+    def pending(self, date):
+        latest = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                for line in fh:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry.get('date') == date:
+                        latest[entry['phone']] = entry
+        except FileNotFoundError:
+            pass
+        return {phone: entry['reason'] for phone, entry in latest.items() if entry.get('status') == 'dead'}
+
+    def _append(self, entries):
+        # One append per batch, so shard workers sharing the file do not interleave lines
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            fh.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+
+    def record(self, date, results):
+        entries = dead_letter_entries(results)
+        if entries:
+            failed_at = _now_iso()
+            self._append({'date': date, 'phone': phone, 'reason': reason, 'status': 'dead', 'failed_at': failed_at}
+                         for phone, reason in entries)
+        return len(entries)
+
+    def resolve(self, date, phones):
+        phones = list(phones)
+        if phones:
+            resolved_at = _now_iso()
+            self._append({'date': date, 'phone': phone, 'reason': None, 'status': 'resolved',
+                          'resolved_at': resolved_at} for phone in phones)
+        return len(phones)
+
+
+class DynamoDeadLetterStore:
+    """Dead letters in a DynamoDB table keyed by delivery_date (hash) + phone (range)."""
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            boto3 = importlib.import_module('boto3')
+            self._table = boto3.resource('dynamodb').Table(self.table_name)
+        return self._table
+
+    def pending(self, date):
+        Key = getattr(importlib.import_module('boto3.dynamodb.conditions'), 'Key')
+        query_kwargs = {
+            'KeyConditionExpression': Key('delivery_date').eq(date),
+            'ProjectionExpression': 'phone, reason',
+        }
+        letters = {}
+        while True:
+            response = self.table.query(**query_kwargs)
+            letters.update((item['phone'], item.get('reason')) for item in response.get('Items', []))
+            if not response.get('LastEvaluatedKey'):
+                return letters
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def record(self, date, results):
+        entries = dead_letter_entries(results)
+        if not entries:
+            return 0
+        failed_at = _now_iso()
+        expires_at = int(time.time()) + DEAD_LETTER_TTL_SECONDS
+        with self.table.batch_writer(overwrite_by_pkeys=['delivery_date', 'phone']) as batch:
+            for phone, reason in entries:
+                batch.put_item(Item={'delivery_date': date, 'phone': phone, 'reason': reason,
+                                     'failed_at': failed_at, 'expires_at': expires_at})
+        return len(entries)
+
+    def resolve(self, date, phones):
+        phones = list(phones)
+        with self.table.batch_writer(overwrite_by_pkeys=['delivery_date', 'phone']) as batch:
+            for phone in phones:
+                batch.delete_item(Key={'delivery_date': date, 'phone': phone})
+        return len(phones)
+
+
+def store_from_env():
+    """DynamoDeadLetterStore if DEAD_LETTER_TABLE is set, else FileDeadLetterStore(DEAD_LETTER_FILE)."""
+    table_name = os.environ.get('DEAD_LETTER_TABLE')
+    if table_name:
+        return DynamoDeadLetterStore(table_name)
+    return FileDeadLetterStore(os.environ.get('DEAD_LETTER_FILE', DEFAULT_DEAD_LETTER_FILE))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Precomputed delivery calendar for the Daily Mitzvah Bot
+
+The planner walks the scheduled days and the Yom Tov set once and assigns every
+schedule entry to exactly one delivery date. Entries falling on a run of
+consecutive no-send days are moved out of the run: the first half (rounded up)
+is delivered on the day before the run ("Preparing for ..."), the rest on the
+day after ("Continuing after ..."). Nothing is ever delivered on a Yom Tov.
+
+Entry ids are the ISO dates the entries are scheduled on in the source CSV.
+"""
+
+from datetime import date
+from types import MappingProxyType
+
+
+class Delivery:
+    """What to send on one delivery date."""
+
+    __slots__ = ('entry_ids', 'reason')
+
+    def __init__(self, entry_ids, reason=None):
+        self.entry_ids = tuple(entry_ids)
+        self.reason = reason
+
+    @property
+    def is_consolidated(self):
+        return self.reason is not None
+
+    def __eq__(self, other):
+        return isinstance(other, Delivery) and (self.entry_ids, self.reason) == (other.entry_ids, other.reason)
+
+    def __repr__(self):
+        return f"Delivery({list(self.entry_ids)!r}, reason={self.reason!r})"
+
+
+class DeliveryCalendar:
+    """Frozen delivery_date -> Delivery mapping produced by plan_delivery_calendar."""
+
+    def __init__(self, deliveries, no_send_days):
+        self._deliveries = MappingProxyType(dict(deliveries))
+        self._no_send_days = frozenset(no_send_days)
+
+    @property
+    def deliveries(self):
+        return self._deliveries
+
+    def get(self, delivery_date):
+        """Return the Delivery for a YYYY-MM-DD date, or None if nothing is sent."""
+        return self._deliveries.get(delivery_date)
+
+    def is_no_send_day(self, delivery_date):
+        return delivery_date in self._no_send_days
+
+    def entry_ids(self):
+        """All scheduled entry ids covered by the calendar, in delivery order."""
+        return [entry_id for d in sorted(self._deliveries) for entry_id in self._deliveries[d].entry_ids]
+
+    def __len__(self):
+        return len(self._deliveries)
+
+    def __iter__(self):
+        return iter(sorted(self._deliveries))
+
+
+def plan_delivery_calendar(scheduled_ordinals, yom_tov):
+    """
+    Build the delivery calendar.
+
+    scheduled_ordinals: iterable of date ordinals that have a schedule entry
+    yom_tov: mapping of date ordinal -> holiday name for every no-send day
+    """
+    scheduled = sorted(set(scheduled_ordinals))
+    moved = {}     # delivery ordinal -> list of (entry ordinal)
+    reasons = {}   # delivery ordinal -> list of reason strings
+
+    def assign(delivery_ordinal, entry_ordinal, reason=None):
+        moved.setdefault(delivery_ordinal, []).append(entry_ordinal)
+        if reason and reason not in reasons.setdefault(delivery_ordinal, []):
+            reasons[delivery_ordinal].append(reason)
+
+    i = 0
+    while i < len(scheduled):
+        ordinal = scheduled[i]
+        if ordinal not in yom_tov:
+            assign(ordinal, ordinal)
+            i += 1
+            continue
+
+        # Expand to the full run of consecutive no-send days containing this entry
+        run_start = ordinal
+        while run_start - 1 in yom_tov:
+            run_start -= 1
+        run_end = ordinal
+        while run_end + 1 in yom_tov:
+            run_end += 1
+
+        run_entries = []
+        while i < len(scheduled) and scheduled[i] <= run_end:
+            run_entries.append(scheduled[i])
+            i += 1
+
+        split = (len(run_entries) + 1) // 2
+        before, after = run_start - 1, run_end + 1
+        for entry_ordinal in run_entries[:split]:
+            assign(before, entry_ordinal, f"Preparing for {yom_tov[run_start]}")
+        for entry_ordinal in run_entries[split:]:
+            assign(after, entry_ordinal, f"Continuing after {yom_tov[run_end]}")
+
+    deliveries = {}
+    for delivery_ordinal, entry_ordinals in moved.items():
+        reason = '; '.join(reasons[delivery_ordinal]) if reasons.get(delivery_ordinal) else None
+        deliveries[date.fromordinal(delivery_ordinal).isoformat()] = Delivery(
+            (date.fromordinal(o).isoformat() for o in sorted(entry_ordinals)), reason
+        )
+
+    no_send_days = (date.fromordinal(o).isoformat() for o in yom_tov)
+    return DeliveryCalendar(deliveries, no_send_days)
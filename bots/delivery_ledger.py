@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Per-day delivery ledger for the Daily Mitzvah Bot
+
+Records every (delivery_date, phone) the daily message was handed to Twilio
+for, with the message SID, so a scheduler retry, a resumed run or a manual
+re-trigger skips recipients that already got that day's message.
+
+Reads and writes are batched so the ledger adds little to a run:
+- delivered(date) loads the whole day's partition once per run (one Query,
+  paginated, projecting only phone), and the run checks membership locally.
+- delivered(date, phones) looks up only the given phones (BatchGetItem, 100
+  keys per request), for shard workers that own a slice of the list.
+- record(date, results) writes each send batch's outcomes together
+  (DynamoDB BatchWriteItem, 25 items per request).
+
+Sends cancelled in flight are recorded as 'unknown': Twilio may have accepted
+them, and skipping a possible duplicate is preferred over sending one.
+
+Stores:
+- DynamoLedger: DELIVERY_LEDGER_TABLE (delivery_date + phone, expired by TTL)
+- FileLedger: a local NDJSON file (DELIVERY_LEDGER_FILE), for tests and local runs
+"""
+
+import importlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+try:
+    from bots.fanout import IN_FLIGHT
+except ImportError:
+    from fanout import IN_FLIGHT
+
+logger = logging.getLogger()
+
+DEFAULT_LEDGER_FILE = '/tmp/mitzvah_delivery_ledger.ndjson'
+LEDGER_TTL_SECONDS = 35 * 24 * 3600
+BATCH_GET_LIMIT = 100  # keys per BatchGetItem request
+
+
+def ledger_entries(results):
+    """(phone, sid, status) for the SendResults that count as delivered."""
+    entries = []
+    for result in results:
+        if result.ok:
+            entries.append((result.recipient, result.sid, 'sent'))
+        elif result.error == IN_FLIGHT:
+            entries.append((result.recipient, None, 'unknown'))
+    return entries
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FileLedger:
+    """Ledger as an append-only NDJSON file: one {date, phone, sid, status} line per delivery."""
+
+    def __init__(self, path=DEFAULT_LEDGER_FILE):
+        self.path = path
+
+    def delivered(self, date, phones=None):
+        found = set()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                for line in fh:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if entry.get('date') == date:
+                        found.add(entry['phone'])
+        except FileNotFoundError:
+            pass
+        return found if phones is None else found.intersection(phones)
+
+    def record(self, date, results):
+        entries = ledger_entries(results)
+        if not entries:
+            return 0
+        sent_at = _now_iso()
+        # One append per batch, so shard workers sharing the file do not interleave lines
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            fh.write(''.join(
+                json.dumps({'date': date, 'phone': phone, 'sid': sid, 'status': status, 'sent_at': sent_at}) + '\n'
+                for phone, sid, status in entries
+            ))
+        return len(entries)
+
+
+class DynamoLedger:
+    """Ledger in a DynamoDB table keyed by delivery_date (hash) + phone (range)."""
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            boto3 = importlib.import_module('boto3')
+            self._table = boto3.resource('dynamodb').Table(self.table_name)
+        return self._table
+
+    def delivered(self, date, phones=None):
+        if phones is not None:
+            return self._delivered_among(date, phones)
+        Key = getattr(importlib.import_module('boto3.dynamodb.conditions'), 'Key')
+        query_kwargs = {
+            'KeyConditionExpression': Key('delivery_date').eq(date),
+            'ProjectionExpression': 'phone',
+        }
+        phones = set()
+        while True:
+            response = self.table.query(**query_kwargs)
+            phones.update(item['phone'] for item in response.get('Items', []))
+            if not response.get('LastEvaluatedKey'):
+                return phones
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _delivered_among(self, date, phones):
+        """The subset of phones with a ledger entry for date (BatchGetItem, retrying unprocessed keys)."""
+        client = self.table.meta.client
+        found = set()
+        phones = list(dict.fromkeys(phones))
+        for i in range(0, len(phones), BATCH_GET_LIMIT):
+            request = {self.table_name: {
+                'Keys': [{'delivery_date': date, 'phone': phone} for phone in phones[i:i + BATCH_GET_LIMIT]],
+                'ProjectionExpression': 'phone',
+            }}
+            while request:
+                response = client.batch_get_item(RequestItems=request)
+                found.update(item['phone'] for item in response.get('Responses', {}).get(self.table_name, []))
+                request = response.get('UnprocessedKeys') or None
+        return found
+
+    def record(self, date, results):
+        entries = ledger_entries(results)
+        if not entries:
+            return 0
+        sent_at = _now_iso()
+        expires_at = int(time.time()) + LEDGER_TTL_SECONDS
+        # batch_writer groups puts into BatchWriteItem calls and resends unprocessed items
+        with self.table.batch_writer(overwrite_by_pkeys=['delivery_date', 'phone']) as batch:
+            for phone, sid, status in entries:
+                item = {'delivery_date': date, 'phone': phone, 'status': status,
+                        'sent_at': sent_at, 'expires_at': expires_at}
+                if sid:
+                    item['sid'] = sid
+                batch.put_item(Item=item)
+        return len(entries)
+
+
+def ledger_from_env():
+    """DynamoLedger if DELIVERY_LEDGER_TABLE is set, else FileLedger(DELIVERY_LEDGER_FILE)."""
+    table_name = os.environ.get('DELIVERY_LEDGER_TABLE')
+    if table_name:
+        return DynamoLedger(table_name)
+    return FileLedger(os.environ.get('DELIVERY_LEDGER_FILE', DEFAULT_LEDGER_FILE))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Per-day delivery metrics from Twilio message status callbacks
+
+Every message the daily run sends carries a StatusCallback URL tagged with
+its delivery date (STATUS_CALLBACK_URL?date=...). Twilio then reports each
+status change (queued, sent, delivered, read, failed/undelivered with an
+error code) to bots/status_callback.py, which buffers the callbacks and
+folds them into one counter record per delivery date:
+
+    {queued: n, sent: n, delivered: n, read: n, failed: n, undelivered: n,
+     error_63016: n, ...}
+
+Counters are written in batches: a batch of callbacks becomes one atomic
+increment per delivery date (DynamoDB UpdateItem ADD), not one write per
+event, so the day's record does not become a hot key at send time. A
+callback repeated within a batch is counted once; Twilio may still resend
+one across batches, so the counts are event counts, not unique messages.
+
+Stores:
+- DynamoStatusCounters: DELIVERY_METRICS_TABLE (one item per delivery date, expired by TTL)
+- FileStatusCounters: a local JSON file (DELIVERY_METRICS_FILE), for tests and local runs
+"""
+
+import importlib
+import json
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+logger = logging.getLogger()
+
+DEFAULT_METRICS_FILE = '/tmp/mitzvah_delivery_metrics.json'
+METRICS_TTL_SECONDS = 400 * 24 * 3600
+# Twilio MessageStatus values for outbound messages, in lifecycle order
+STATUSES = ('accepted', 'scheduled', 'queued', 'sending', 'sent', 'delivered', 'read', 'undelivered', 'failed',
+            'canceled')
+FAILED_STATUSES = ('undelivered', 'failed')
+SUMMARY_STATUSES = ('queued', 'sent', 'delivered', 'read', 'undelivered', 'failed')  # always in a summary
+ERROR_PREFIX = 'error_'
+
+
+def callback_from_form(date, form):
+    """The fields of a Twilio status callback form the counters need."""
+    return {
+        'date': date,
+        'sid': form.get('MessageSid') or form.get('SmsSid') or '',
+        'status': (form.get('MessageStatus') or form.get('SmsStatus') or '').lower(),
+        'error_code': form.get('ErrorCode') or None,
+    }
+
+
+def aggregate(callbacks):
+    """
+    {date: Counter} of status (and failure error code) counts for a batch of
+    callbacks. A (message SID, status) pair repeated in the batch counts once.
+    """
+    totals = {}
+    seen = set()
+    for callback in callbacks:
+        key = (callback['sid'], callback['status'])
+        if callback['sid'] and key in seen:
+            continue
+        seen.add(key)
+        counts = totals.setdefault(callback['date'], Counter())
+        status = callback['status'] if callback['status'] in STATUSES else 'other'
+        counts[status] += 1
+        if status in FAILED_STATUSES and callback.get('error_code'):
+            counts[f"{ERROR_PREFIX}{callback['error_code']}"] += 1
+    return totals
+
+
+def summarize(date, counters):
+    """Summary of one day's counters: status counts, failures by error code and rates."""
+    counts = {name: int(value) for name, value in counters.items() if name != 'updated_at'}
+    summary = {'date': date}
+    for status in STATUSES + ('other',):
+        if status in SUMMARY_STATUSES or counts.get(status):
+            summary[status] = counts.get(status, 0)
+    summary['errors'] = {name[len(ERROR_PREFIX):]: n for name, n in sorted(counts.items())
+                         if name.startswith(ERROR_PREFIX)}
+    # Callbacks can skip states (a message read before its 'delivered' callback), so these are approximate
+    if summary['sent']:
+        summary['delivered_rate'] = round(summary['delivered'] / summary['sent'], 4)
+    if summary['delivered']:
+        summary['read_rate'] = round(summary['read'] / summary['delivered'], 4)
+    if counters.get('updated_at'):
+        summary['updated_at'] = counters['updated_at']
+    return summary
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FileStatusCounters:
+    """
+    Counters as one JSON file of {date: {counter: n}}, rewritten once per
+    batch. Single writer only: it stands in for the table in local runs.
+    """
+
+    def __init__(self, path=DEFAULT_METRICS_FILE):
+        self.path = path
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+
+    def add(self, date, counts):
+        data = self._load()
+        day = data.setdefault(date, {})
+        for name, n in counts.items():
+            day[name] = day.get(name, 0) + n
+        day['updated_at'] = _now_iso()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh)
+        os.replace(tmp_path, self.path)
+
+    def counters(self, date):
+        return self._load().get(date, {})
+
+    def summary(self, date):
+        return summarize(date, self.counters(date))
+
+
+class DynamoStatusCounters:
+    """Counters in a DynamoDB table with one item per delivery_date (hash key)."""
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            boto3 = importlib.import_module('boto3')
+            self._table = boto3.resource('dynamodb').Table(self.table_name)
+        return self._table
+
+    def add(self, date, counts):
+        # One atomic UpdateItem for the whole batch; names are placeholders ('read' is a reserved word)
+        names = {f"#c{i}": name for i, name in enumerate(counts)}
+        values = {f":c{i}": n for i, n in enumerate(counts.values())}
+        values.update({':now': _now_iso(), ':expires': int(time.time()) + METRICS_TTL_SECONDS})
+        self.table.update_item(
+            Key={'delivery_date': date},
+            UpdateExpression='ADD ' + ', '.join(f"#c{i} :c{i}" for i in range(len(counts)))
+                             + ' SET updated_at = :now, expires_at = if_not_exists(expires_at, :expires)',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+
+    def counters(self, date):
+        item = self.table.get_item(Key={'delivery_date': date}).get('Item') or {}
+        item.pop('delivery_date', None)
+        item.pop('expires_at', None)
+        return item
+
+    def summary(self, date):
+        return summarize(date, self.counters(date))
+
+
+def counters_from_env():
+    """DynamoStatusCounters if DELIVERY_METRICS_TABLE is set, else FileStatusCounters(DELIVERY_METRICS_FILE)."""
+    table_name = os.environ.get('DELIVERY_METRICS_TABLE')
+    if table_name:
+        return DynamoStatusCounters(table_name)
+    return FileStatusCounters(os.environ.get('DELIVERY_METRICS_FILE', DEFAULT_METRICS_FILE))
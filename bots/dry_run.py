@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Render-only dry run of the send pipeline
+
+Runs everything a day's send does up to the Twilio request, for every date
+in a range and N synthetic recipients, without a transport:
+
+  load      load_mitzvah_for_date (schedule lookup + holiday consolidation)
+  render    render_delivery (message cache, or format_message on a miss)
+  prepare   prepare_delivery (the per-day PreparedDelivery)
+  payloads  the per-recipient message request (PreparedDelivery.record)
+  validate  the checks below
+  write     one NDJSON line per payload, in FileSinkTransport's format
+
+Each stage is timed separately and the report gives its seconds and
+throughput, so the hot path can be benchmarked (and regression-tested)
+whenever the schedule CSV or the formatting code changes. Validation covers
+what Twilio or WhatsApp would reject or what would reach subscribers broken:
+an empty or oversized body, leftover HTML markup, a missing opt-out line, a
+template whose variables are missing or empty, and malformed addresses.
+
+Used by the Lambda handler ({"dry_run": true, ...}) and scripts/dry_run.py.
+"""
+
+import json
+import re
+import time
+from datetime import date, timedelta
+
+DEFAULT_OUTPUT = '/tmp/mitzvah_dry_run.ndjson'
+DEFAULT_RECIPIENTS = 100
+STAGES = ('load', 'render', 'prepare', 'payloads', 'validate', 'write')
+MAX_BODY_LENGTH = 1600  # Twilio rejects longer message bodies
+MAX_TEMPLATE_VARIABLE_LENGTH = 1024  # WhatsApp template parameter limit
+TEMPLATE_VARIABLES = ('1', '2', '3', '4', '5')
+OPT_OUT_TEXT = 'Reply STOP to unsubscribe.'
+MAX_REPORTED_PROBLEMS = 50
+
+_ADDRESS = re.compile(r'^whatsapp:\+[1-9]\d{6,14}$')
+_HTML_TAG = re.compile(r'</?[a-zA-Z][^>]*>')
+
+
+def synthetic_recipients(count):
+    """count distinct, well-formed (reserved 555) numbers."""
+    return [f"+1555{n:07d}" for n in range(count)]
+
+
+def date_range(start_date, end_date):
+    """ISO dates from start_date to end_date, inclusive."""
+    day, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    if end < day:
+        raise ValueError(f"end date {end_date} is before start date {start_date}")
+    while day <= end:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def validate_delivery(prepared):
+    """Problems with the recipient-independent part of a day's request (empty list when valid)."""
+    problems = []
+    if not _ADDRESS.match(prepared.sender):
+        problems.append(f"malformed sender {prepared.sender!r}")
+    if prepared.status_callback and not prepared.status_callback.startswith(('https://', 'http://')):
+        problems.append(f"status callback is not a URL: {prepared.status_callback!r}")
+    if prepared.uses_template:
+        try:
+            variables = json.loads(prepared.content_variables or '')
+        except ValueError:
+            return problems + ["template variables are not valid JSON"]
+        if not isinstance(variables, dict):
+            return problems + ["template variables are not a JSON object"]
+        for key in TEMPLATE_VARIABLES:
+            value = variables.get(key)
+            if not isinstance(value, str) or not value.strip():
+                problems.append(f"template variable {key} is missing or empty")
+            elif len(value) > MAX_TEMPLATE_VARIABLE_LENGTH:
+                problems.append(f"template variable {key} is {len(value)} chars (limit {MAX_TEMPLATE_VARIABLE_LENGTH})")
+        return problems
+
+    body = prepared.body or ''
+    if not body.strip():
+        return problems + ["empty message body"]
+    if len(body) > MAX_BODY_LENGTH:
+        problems.append(f"body is {len(body)} chars (limit {MAX_BODY_LENGTH})")
+    tag = _HTML_TAG.search(body)
+    if tag:
+        problems.append(f"unconverted HTML markup {tag.group(0)!r}")
+    if OPT_OUT_TEXT not in body:
+        problems.append("missing opt-out line")
+    return problems
+
+
+def validate_record(record):
+    """Problems with one recipient's request."""
+    return [] if _ADDRESS.match(record['to']) else [f"malformed recipient {record['to']!r}"]
+
+
+class DryRunReport:
+    """Totals, per-stage timing and the first problems found by a dry run."""
+
+    def __init__(self, start_date, end_date, recipients, output):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.recipients = recipients
+        self.output = output
+        self.days = 0
+        self.rendered = 0
+        self.skipped = []
+        self.payloads = 0
+        self.invalid = 0
+        self.problems = []
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.stage_counts = dict.fromkeys(STAGES, 0)
+        self.elapsed = 0.0
+
+    def timed(self, stage, started, count=1):
+        now = time.perf_counter()
+        self.stage_seconds[stage] += now - started
+        self.stage_counts[stage] += count
+        return now
+
+    def problem(self, target_date, message, recipient=None):
+        self.invalid += 1
+        if len(self.problems) < MAX_REPORTED_PROBLEMS:
+            entry = {'date': target_date, 'problem': message}
+            if recipient:
+                entry['to'] = recipient
+            self.problems.append(entry)
+
+    @property
+    def ok(self):
+        return self.invalid == 0
+
+    def to_dict(self):
+        return {
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'days': self.days,
+            'rendered': self.rendered,
+            'skipped': self.skipped,
+            'recipients': self.recipients,
+            'payloads': self.payloads,
+            'invalid': self.invalid,
+            'problems': self.problems,
+            'output': self.output,
+            'elapsed_s': round(self.elapsed, 4),
+            'payloads_per_second': round(self.payloads / self.elapsed, 1) if self.elapsed else None,
+            'stages': {
+                stage: {
+                    'seconds': round(self.stage_seconds[stage], 4),
+                    'count': self.stage_counts[stage],
+                    'per_second': (round(self.stage_counts[stage] / self.stage_seconds[stage], 1)
+                                   if self.stage_seconds[stage] else None),
+                }
+                for stage in STAGES
+            },
+        }
+
+    def __bool__(self):
+        return self.ok
+
+
+def run(bot, start_date, end_date=None, recipients=DEFAULT_RECIPIENTS, output=DEFAULT_OUTPUT, fresh=False):
+    """
+    Dry-run every date from start_date to end_date (inclusive) for
+    `recipients` synthetic numbers (or a list of numbers) and return a
+    DryRunReport. Dates with nothing to send (Yom Tov, outside the schedule)
+    are listed as skipped. fresh=True renders with format_message instead of
+    going through the message cache. output=None skips writing.
+    """
+    end_date = end_date or start_date
+    numbers = synthetic_recipients(recipients) if isinstance(recipients, int) else list(recipients)
+    report = DryRunReport(start_date, end_date, len(numbers), output)
+    sink = open(output, 'w', encoding='utf-8') if output else None
+    began = time.perf_counter()
+    try:
+        for target_date in date_range(start_date, end_date):
+            report.days += 1
+            started = time.perf_counter()
+            mitzvah_data = bot.load_mitzvah_for_date(target_date)
+            started = report.timed('load', started)
+            if not mitzvah_data:
+                report.skipped.append(target_date)
+                continue
+
+            if fresh:
+                message = bot.format_message(mitzvah_data)
+                variables = bot.build_template_variables(mitzvah_data)
+            else:
+                message, variables = bot.render_delivery(target_date, mitzvah_data)
+            started = report.timed('render', started)
+            report.rendered += 1
+
+            prepared = bot.prepare_delivery(target_date, message, mitzvah_data, variables)
+            started = report.timed('prepare', started)
+
+            records = [prepared.record(number) for number in numbers]
+            started = report.timed('payloads', started, len(records))
+            report.payloads += len(records)
+
+            for problem in validate_delivery(prepared):
+                report.problem(target_date, problem)
+            for record in records:
+                for problem in validate_record(record):
+                    report.problem(target_date, problem, record['to'])
+            started = report.timed('validate', started, len(records))
+
+            if sink:
+                sink.writelines(json.dumps(record) + '\n' for record in records)
+                report.timed('write', started, len(records))
+    finally:
+        if sink:
+            sink.close()
+        report.elapsed = time.perf_counter() - began
+    return report
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Concurrent recipient fan-out for the Daily Mitzvah Bot
+
+Each Twilio send is a blocking REST round trip, so sending to recipients one
+after another grows linearly with the subscriber count. fan_out() runs the
+sends on a bounded thread pool; a shared TokenBucket keeps the overall
+request rate within the account's Twilio throughput (messages per second).
+
+Per-recipient outcomes are collected into a DeliveryReport, which the Lambda
+handler returns in its response body.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger()
+
+DEFAULT_CONCURRENCY = 16  # ~rate x Twilio API latency (80/s x 0.2 s) keeps the bucket busy
+DEFAULT_RATE_PER_SECOND = 80  # Twilio's default WhatsApp throughput per sender
+MAX_REPORTED_FAILURES = 20
+
+# SendResult errors for sends cut off by the time budget or the circuit breaker
+NOT_SENT = "cancelled: time budget exhausted before sending"
+IN_FLIGHT = "cancelled in flight: delivery unknown"
+ABORTED = "cancelled: circuit breaker open"
+UNSENT = (NOT_SENT, ABORTED)  # never reached Twilio; left for a later run
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, holding at most
+    `capacity` (default: one second's worth). acquire() blocks until a token
+    is available. A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(self.rate, 1.0))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def acquire(self):
+        """Take one token, sleeping if the bucket is empty. Returns the time waited (seconds)."""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def reserve(self):
+        """
+        Take one token without sleeping; returns how long the caller must wait
+        before using it (for callers that sleep themselves, e.g. asyncio).
+        """
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now (the balance may go negative) and wait outside
+            # the lock, so waiting threads queue up in arrival order
+            self._tokens -= 1.0
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class SendResult:
+    """
+    Outcome of one send. Truthy when the message was accepted. A failed send
+    carries its send_failures category (None for sends cancelled or never sent).
+    """
+
+    __slots__ = ('recipient', 'sid', 'error', 'elapsed', 'category')
+
+    def __init__(self, recipient, sid=None, error=None, elapsed=0.0, category=None):
+        self.recipient = recipient
+        self.sid = sid
+        self.error = error
+        self.elapsed = elapsed
+        self.category = category
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        status = f"sid={self.sid!r}" if self.ok else f"error={self.error!r}"
+        return f"SendResult({self.recipient!r}, {status})"
+
+
+class DeliveryReport:
+    """
+    Aggregated outcome of one send_daily_mitzvah run. Truthy when the run
+    succeeded: at least one message was accepted, or nothing was due
+    (`skipped`, e.g. Yom Tov or already delivered).
+
+    A resumable run covers recipients[start_index:next_index] out of `total`
+    (`already_delivered` of them skipped via the delivery ledger); `partial`
+    means it stopped early and the rest is left to a later invocation.
+    `aborted` is the circuit breaker's reason when it stopped the run.
+    `concurrency` is the adaptive controller's summary (limit range and rate
+    curve) when the run used one. A streamed run keeps only its failed
+    results; `accepted` counts the successful sends it did not keep.
+    """
+
+    def __init__(self, date, results=(), elapsed=0.0, skipped=None, error=None,
+                 start_index=0, next_index=None, total=None, already_delivered=0, aborted=None,
+                 concurrency=None, accepted=0):
+        self.date = date
+        self.results = list(results)
+        self.accepted = accepted
+        self.elapsed = elapsed
+        self.skipped = skipped
+        self.error = error
+        self.start_index = start_index
+        self.next_index = start_index + self.attempted if next_index is None else next_index
+        self.total = self.next_index if total is None else total
+        self.already_delivered = already_delivered
+        self.aborted = aborted
+        self.concurrency = concurrency
+
+    @property
+    def partial(self):
+        return self.error is None and self.aborted is None and self.next_index < self.total
+
+    @property
+    def attempted(self):
+        return self.accepted + len(self.results)
+
+    @property
+    def sent(self):
+        return self.accepted + sum(1 for r in self.results if r.ok)
+
+    @property
+    def failed(self):
+        return self.attempted - self.sent
+
+    @property
+    def failures(self):
+        return [r for r in self.results if not r.ok]
+
+    def __bool__(self):
+        if self.error is not None or self.aborted is not None:
+            return False
+        return self.skipped is not None or self.sent > 0
+
+    def to_dict(self):
+        """Summary for the Lambda response; lists at most MAX_REPORTED_FAILURES failures."""
+        summary = {
+            'date': self.date,
+            'attempted': self.attempted,
+            'sent': self.sent,
+            'failed': self.failed,
+            'elapsed_ms': round(self.elapsed * 1000, 1),
+        }
+        if self.elapsed > 0 and self.attempted:
+            summary['per_second'] = round(self.attempted / self.elapsed, 1)
+        if self.already_delivered:
+            summary['already_delivered'] = self.already_delivered
+        if self.start_index:
+            summary['resumed_from'] = self.start_index
+        if self.partial:
+            summary['resume_from'] = self.next_index
+            summary['total'] = self.total
+        if self.skipped is not None:
+            summary['skipped'] = self.skipped
+        if self.error is not None:
+            summary['error'] = self.error
+        if self.aborted is not None:
+            summary['aborted'] = self.aborted
+            summary['resume_from'] = self.next_index
+            summary['total'] = self.total
+        if self.concurrency is not None:
+            summary['concurrency'] = self.concurrency
+        failures = self.failures
+        if failures:
+            summary['failures'] = [
+                {'recipient': r.recipient, 'error': r.error, 'category': r.category}
+                for r in failures[:MAX_REPORTED_FAILURES]
+            ]
+        return summary
+
+
+def fan_out(send, recipients, max_workers=DEFAULT_CONCURRENCY, limiter=None, breaker=None):
+    """
+    Call send(recipient) -> SendResult for every recipient on a pool of at most
+    max_workers threads, taking a token from `limiter` before each call.
+    Returns the results in recipient order; exceptions raised by send are
+    recorded as failed results. Once `breaker` (send_failures.CircuitBreaker)
+    opens, the sends not yet started are returned as ABORTED.
+    """
+    recipients = list(recipients)
+    if not recipients:
+        return []
+
+    def run(recipient):
+        if breaker is not None and breaker.open:
+            return SendResult(recipient, error=ABORTED)
+        if limiter is not None:
+            limiter.acquire()
+        start = time.perf_counter()
+        try:
+            result = send(recipient)
+        except Exception as e:
+            result = SendResult(recipient, error=str(e))
+        result.elapsed = time.perf_counter() - start
+        if breaker is not None:
+            breaker.record(result)
+        return result
+
+    workers = max(1, min(int(max_workers), len(recipients)))
+    if workers == 1:
+        return [run(r) for r in recipients]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='send') as pool:
+        return list(pool.map(run, recipients))
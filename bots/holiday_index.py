@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Holiday index for the Daily Mitzvah Bot
+
+Loads jewish_holidays.csv (falling back to the embedded list) into a
+date-ordinal map plus an index of consecutive no-work runs, so "is this a
+Yom Tov", "which run contains this date" and "next send day after this run"
+are all dictionary lookups.
+"""
+
+import logging
+import os
+from datetime import date
+
+logger = logging.getLogger()
+
+HOLIDAYS_CSV_PATH = 'jewish_holidays.csv'
+
+# Fallback when jewish_holidays.csv is not packaged; keep in sync with the CSV
+# (scripts/compile_schedule.py reports drift between the two at build time)
+EMBEDDED_HOLIDAYS = (
+    ('2026-04-02', 'Passover Day 1', 'major_yomtov', 'yes'),
+    ('2026-04-03', 'Passover Day 2', 'major_yomtov', 'yes'),
+    ('2026-04-08', 'Passover Day 7', 'major_yomtov', 'yes'),
+    ('2026-04-09', 'Passover Day 8', 'major_yomtov', 'yes'),
+    ('2026-05-22', 'Shavuot Day 1', 'major_yomtov', 'yes'),
+    ('2026-05-23', 'Shavuot Day 2', 'major_yomtov', 'yes'),
+    ('2026-07-29', 'Tish B Av', 'minor_yomtov', 'yes'),
+    ('2026-09-12', 'Rosh Hashanah Day 1', 'major_yomtov', 'yes'),
+    ('2026-09-13', 'Rosh Hashanah Day 2', 'major_yomtov', 'yes'),
+    ('2026-09-21', 'Yom Kippur', 'major_yomtov', 'yes'),
+    ('2026-09-26', 'Sukkot Day 1', 'major_yomtov', 'yes'),
+    ('2026-09-27', 'Sukkot Day 2', 'major_yomtov', 'yes'),
+    ('2026-10-03', 'Shemini Atzeret', 'major_yomtov', 'yes'),
+    ('2026-10-04', 'Simchat Torah', 'major_yomtov', 'yes'),
+)
+
+
+def embedded_holidays():
+    """Return the embedded holiday list in the CSV row format."""
+    return [
+        {'Date': d, 'Holiday_Name': name, 'Holiday_Type': kind, 'Work_Forbidden': forbidden}
+        for d, name, kind, forbidden in EMBEDDED_HOLIDAYS
+    ]
+
+
+def read_holidays_csv(csv_path):
+    """Parse jewish_holidays.csv, skipping '#' comment lines and blank lines."""
+    import csv
+
+    with open(csv_path, 'r', encoding='utf-8-sig') as file:
+        lines = [line for line in file if line.strip() and not line.lstrip().startswith('#')]
+    holidays = []
+    for row in csv.DictReader(lines):
+        holidays.append({
+            'Date': (row.get('Date') or '').strip(),
+            'Holiday_Name': (row.get('Holiday_Name') or '').strip(),
+            'Holiday_Type': (row.get('Holiday_Type') or '').strip(),
+            'Work_Forbidden': (row.get('Work_Forbidden') or '').strip().lower(),
+        })
+    return holidays
+
+
+def load_holidays(csv_path=None):
+    """Load holidays from CSV if available, otherwise the embedded list."""
+    csv_path = csv_path or os.environ.get('HOLIDAYS_CSV', HOLIDAYS_CSV_PATH)
+    if os.path.exists(csv_path):
+        try:
+            holidays = read_holidays_csv(csv_path)
+            logger.info(f"Loaded {len(holidays)} holidays from {csv_path}")
+            return holidays
+        except Exception as e:
+            logger.warning(f"Failed to load holidays from {csv_path}: {e}, using embedded data")
+    else:
+        logger.info(f"{csv_path} not found, using embedded holiday data")
+    return embedded_holidays()
+
+
+def holiday_drift(csv_holidays, fallback_holidays):
+    """
+    Compare two holiday lists; return human-readable differences (empty if in sync).
+    """
+    def keyed(holidays):
+        return {h['Date']: (h['Holiday_Name'], h['Work_Forbidden']) for h in holidays}
+
+    csv_map, fallback_map = keyed(csv_holidays), keyed(fallback_holidays)
+    drift = []
+    for d in sorted(set(csv_map) | set(fallback_map)):
+        if d not in fallback_map:
+            drift.append(f"{d}: {csv_map[d][0]} is in the CSV but not the embedded fallback")
+        elif d not in csv_map:
+            drift.append(f"{d}: {fallback_map[d][0]} is in the embedded fallback but not the CSV")
+        elif csv_map[d] != fallback_map[d]:
+            drift.append(f"{d}: CSV has {csv_map[d]}, embedded fallback has {fallback_map[d]}")
+    return drift
+
+
+class HolidayIndex:
+    """Constant-time Yom Tov and no-work-run lookups."""
+
+    def __init__(self, holidays):
+        self.holidays = {}   # ordinal -> holiday row
+        self.yom_tov = {}    # ordinal -> holiday name, no-work days only
+        for holiday in holidays:
+            ordinal = date.fromisoformat(holiday['Date']).toordinal()
+            self.holidays[ordinal] = holiday
+            if holiday['Work_Forbidden'] == 'yes':
+                self.yom_tov[ordinal] = holiday['Holiday_Name']
+
+        # Map every no-work day to the (first, last) ordinal of its run
+        self._runs = {}
+        ordinals = sorted(self.yom_tov)
+        i = 0
+        while i < len(ordinals):
+            j = i
+            while j + 1 < len(ordinals) and ordinals[j + 1] == ordinals[j] + 1:
+                j += 1
+            run = (ordinals[i], ordinals[j])
+            for ordinal in ordinals[i:j + 1]:
+                self._runs[ordinal] = run
+            i = j + 1
+
+    @staticmethod
+    def _ordinal(day):
+        if isinstance(day, int):
+            return day
+        if isinstance(day, str):
+            return date.fromisoformat(day).toordinal()
+        return day.toordinal()
+
+    def is_yom_tov(self, day):
+        """Return (True, holiday name) for a no-work day, else (False, None)."""
+        name = self.yom_tov.get(self._ordinal(day))
+        return (True, name) if name else (False, None)
+
+    def run_containing(self, day):
+        """Return (first, last) ISO dates of the no-work run containing day, or None."""
+        run = self._runs.get(self._ordinal(day))
+        if not run:
+            return None
+        return date.fromordinal(run[0]).isoformat(), date.fromordinal(run[1]).isoformat()
+
+    def next_send_day(self, day):
+        """Return the first ISO date on or after day that is not a no-work day."""
+        ordinal = self._ordinal(day)
+        run = self._runs.get(ordinal)
+        return date.fromordinal(run[1] + 1 if run else ordinal).isoformat()
+
+    def __len__(self):
+        return len(self.holidays)
@@ -7,7 +7,8 @@ Fixed timeout issues and optimized for Lambda cold starts
 import json
 import logging
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 from typing import List
 
@@ -15,13 +16,84 @@ from typing import List
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Import Twilio at module level to avoid timeout during cold start
-try:
-    from twilio.rest import Client
-    logger.info("Twilio imported successfully")
-except ImportError as e:
-    logger.error(f"Failed to import Twilio: {e}")
-    Client = None
+# Heavy dependencies are imported on first use so paths that never send
+# (forbidden webhook calls, read-only queries) do not pay for them:
+# - twilio.rest.Client (pulls in requests and the Twilio resource tree): _twilio_client_class()
+# - boto3: imported inside the recipient loaders (_load_recipients, cohort_recipients)
+# - csv: imported inside the CSV fallback loaders (the compiled artifact needs no csv)
+# - asyncio/ssl (bots.async_transport): by transports.AsyncTransport, only for SEND_TRANSPORT=async
+# scripts/import_profile.py enforces the module's import-time budget.
+Client = None
+
+
+def _twilio_client_class():
+    """Return twilio.rest.Client, importing Twilio on the first call."""
+    global Client
+    if Client is None:
+        try:
+            from twilio.rest import Client as TwilioClient
+        except ImportError as e:
+            logger.error(f"Failed to import Twilio: {e}")
+            raise ImportError("Twilio library not available") from e
+        logger.info("Twilio imported successfully")
+        Client = TwilioClient
+    return Client
+
+
+try:  # Lambda resolves the handler as bots/lambda_mitzvah_bot
+    from bots import schedule_artifact
+    from bots.schedule_index import ScheduleIndex
+    from bots.delivery_calendar import plan_delivery_calendar
+    from bots import holiday_index
+    from bots import message_cache
+    from bots.schedule_model import DeliveryDay, MitzvahRef
+    from bots import fanout
+    from bots import send_cursor
+    from bots import delivery_ledger
+    from bots import sharding
+    from bots import send_failures
+    from bots import dead_letters
+    from bots import transports
+    from bots import adaptive_concurrency
+    from bots import dry_run
+    from bots import timezones
+    from bots import subscriber_store
+    from bots import recipient_stream
+    from bots import recipient_snapshot
+    from bots import subscriber_changes
+    from bots.prepared_delivery import PreparedDelivery
+except ImportError:  # Flat package layout / scripts with bots/ on sys.path
+    import schedule_artifact
+    from schedule_index import ScheduleIndex
+    from delivery_calendar import plan_delivery_calendar
+    import holiday_index
+    import message_cache
+    from schedule_model import DeliveryDay, MitzvahRef
+    import fanout
+    import send_cursor
+    import delivery_ledger
+    import sharding
+    import send_failures
+    import dead_letters
+    import transports
+    import adaptive_concurrency
+    import dry_run
+    import timezones
+    import subscriber_store
+    import recipient_stream
+    import recipient_snapshot
+    import subscriber_changes
+    from prepared_delivery import PreparedDelivery
+
+SCHEDULE_CSV_PATH = 'Schedule_Complete_Sefer_HaMitzvos_WithBiblical.csv'
+SCHEDULE_ARTIFACT_PATH = 'Schedule_Complete_Sefer_HaMitzvos_WithBiblical.bin'
+SEND_DEADLINE_MARGIN_SECONDS = 2.0
+MAX_RESUME_INVOCATIONS = 20
+# Every module whose code shapes the message text: the pre-rendered message cache is tied to their sources
+RENDERING_MODULES = tuple(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ('lambda_mitzvah_bot.py', 'schedule_model.py', 'holiday_index.py', 'delivery_calendar.py')
+)
 
 def _extract_http_params(event):
     """Extract date, token, and optional test recipient from HTTP-style events."""
@@ -61,6 +133,290 @@ def _today_chi_iso():
     return datetime.now(ZoneInfo('America/Chicago')).date().isoformat()
 
 
+def _event_flag(event, name):
+    """Read a boolean flag from a direct-invoke event or an HTTP query string."""
+    if not isinstance(event, dict):
+        return False
+    value = event.get(name)
+    if value is None:
+        value = (event.get('queryStringParameters') or {}).get(name)
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+class IncompleteDeliveryError(RuntimeError):
+    """Raised (SEND_RESUME_MODE=retry) so the invocation fails and its retry resumes from the send cursor."""
+
+
+def _continue_delivery(context, date, remaining, progressed, resume_invocation, coordinator=False, cohorts=None):
+    """
+    Arrange for the `remaining` recipients left by a partial run to be sent.
+
+    SEND_RESUME_MODE=reinvoke (default): invoke this function again
+    asynchronously with {"resume_date": ...} (plus "coordinator" for a sharded
+    run, or the timezone "cohorts" still to send). SEND_RESUME_MODE=retry, or a run that cannot re-invoke: raise
+    IncompleteDeliveryError so the Lambda / Scheduler retry picks up from the
+    send cursor / delivery ledger. A run that made no progress is not
+    continued. Returns a description of the continuation for the response body.
+    """
+    mode = os.environ.get('SEND_RESUME_MODE', 'reinvoke').lower()
+    function_arn = getattr(context, 'invoked_function_arn', None)
+
+    if mode == 'reinvoke' and function_arn and progressed and resume_invocation < MAX_RESUME_INVOCATIONS:
+        payload = {'resume_date': date, 'resume_invocation': resume_invocation + 1}
+        if coordinator:
+            payload['coordinator'] = True
+        if cohorts:
+            payload['cohorts'] = [cohort.to_dict() for cohort in cohorts]
+        try:
+            import importlib
+            boto3 = importlib.import_module('boto3')
+            boto3.client('lambda').invoke(
+                FunctionName=function_arn, InvocationType='Event', Payload=json.dumps(payload).encode('utf-8')
+            )
+            logger.info(f"Re-invoked {function_arn} to send the remaining {remaining} recipients")
+            return {'mode': 'reinvoke', 'remaining': remaining, 'resume_invocation': payload['resume_invocation']}
+        except Exception as e:
+            logger.error(f"Self re-invoke failed ({e}); leaving the rest to a retry")
+
+    if not progressed:
+        logger.error(f"No progress for {date} in this invocation; not continuing automatically")
+        return None
+    raise IncompleteDeliveryError(
+        f"{remaining} recipients left for {date}; the next attempt resumes where this one stopped"
+    )
+
+
+def _invocation_deadline(context, budget_ms=None):
+    """time.monotonic() deadline for sending: the Lambda time left (and budget_ms) less a safety margin."""
+    budgets = [budget_ms / 1000] if budget_ms is not None else []
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        budgets.append(context.get_remaining_time_in_millis() / 1000)
+    if not budgets:
+        return None
+    return time.monotonic() + min(budgets) - SEND_DEADLINE_MARGIN_SECONDS
+
+
+def _response(status_code, body):
+    return {
+        'statusCode': status_code,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps(body)
+    }
+
+
+def _dry_run(bot, event, test_date, cold_start):
+    """
+    {"dry_run": true, "start_date": ..., "end_date": ..., "recipients": N}
+    (or the same as query parameters): validate every payload in the range
+    and report stage timings; 422 when any payload is invalid.
+    """
+    options = dict(event.get('queryStringParameters') or {})
+    options.update({k: v for k, v in event.items() if k in ('start_date', 'end_date', 'recipients', 'fresh')})
+    start_date = options.get('start_date') or test_date or _today_chi_iso()
+    try:
+        report = bot.dry_run(start_date, options.get('end_date') or start_date,
+                             int(options.get('recipients') or dry_run.DEFAULT_RECIPIENTS),
+                             fresh=str(options.get('fresh')).lower() in ('1', 'true', 'yes'))
+    except ValueError as e:
+        return _response(400, {'error': str(e)})
+    return _response(200 if report else 422, {
+        'message': 'Dry run passed' if report else 'Dry run found invalid payloads',
+        'timestamp': datetime.now().isoformat(),
+        'cold_start': cold_start,
+        'dry_run': report.to_dict()
+    })
+
+
+def _scheduled_time(event):
+    """
+    The run's trigger time: the "scheduled_time" EventBridge Scheduler fills
+    in (unchanged on its retries, so a retry sends to the same cohorts), else now.
+    """
+    value = event.get('scheduled_time') if isinstance(event, dict) else None
+    if value and not value.startswith('<'):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            logger.warning(f"Ignoring unparseable scheduled_time {value!r}")
+    return datetime.now(timezone.utc)
+
+
+def _deliver_cohorts(bot, event, context, local_hour, resume_invocation, cold_start):
+    """
+    Timezone-bucketed run (DELIVERY_LOCAL_HOUR): send each cohort whose local
+    time is local_hour its local date's mitzvah, recipients from the timezone
+    index. Cohort runs go through the delivery ledger like shard workers, so a
+    continuation or retry skips who already has the day's message; cohorts
+    not finished in time are handed to a re-invocation ({"cohorts": [...]}).
+    """
+    if event.get('cohorts'):
+        cohorts = [timezones.Cohort.from_dict(c) for c in event['cohorts']]
+    else:
+        cohorts = timezones.cohorts_at(local_hour, _scheduled_time(event))
+    logger.info(f"🌍 {len(cohorts)} cohorts at {local_hour:02d}:00 local time: {cohorts}")
+
+    deadline = _invocation_deadline(context)
+    deliveries = []
+    continuation = None
+    success = True
+    for position, cohort in enumerate(cohorts):
+        recipients = bot.cohort_recipients(cohort.timezones)
+        if position and recipients and deadline is not None and time.monotonic() > deadline:
+            # Earlier cohorts used up the time budget
+            continuation = _continue_delivery(context, cohort.date, len(recipients), True, resume_invocation,
+                                              cohorts=cohorts[position:])
+            break
+        entry = {'cohort': cohort.to_dict(), 'recipients': len(recipients)}
+        deliveries.append(entry)
+        if not recipients:
+            continue
+        logger.info(f"Sending {cohort.date} to {len(recipients)} recipients in {', '.join(cohort.timezones)}")
+        report = bot.send_daily_mitzvah(target_date=cohort.date, recipients=recipients, deadline=deadline,
+                                        use_ledger=True)
+        entry['delivery'] = report.to_dict()
+        # Nothing sent is fine when the ledger already had everyone (a retry)
+        success = success and (bool(report) or (report.error is None and report.aborted is None
+                                                and not report.failed))
+        if report.partial:
+            continuation = _continue_delivery(context, cohort.date, report.total - report.next_index,
+                                              report.next_index > report.start_index, resume_invocation,
+                                              cohorts=cohorts[position:])
+            break
+
+    body = {
+        'message': ('Daily mitzvah delivery continuing' if continuation
+                    else 'Daily mitzvah sent successfully' if success else 'Failed to send mitzvah'),
+        'local_hour': local_hour,
+        'timestamp': datetime.now().isoformat(),
+        'recipients': sum(entry['recipients'] for entry in deliveries),
+        'cold_start': cold_start,
+        'cohorts': deliveries
+    }
+    if continuation:
+        body['continuation'] = continuation
+    return _response(202 if continuation else 200 if success else 500, body)
+
+
+def _run_shard(bot, shard, context, cold_start):
+    """
+    Worker side of a sharded run: send one shard's recipients, skipping the
+    ones the delivery ledger already has, at the shard's share of the rate.
+    Shards never continue themselves; the coordinator re-dispatches what is left.
+    """
+    recipients = shard['recipients']
+    logger.info(f"🧩 Shard {shard['index'] + 1}/{shard['count']} for {shard['date']}: {len(recipients)} recipients")
+    report = bot.send_daily_mitzvah(
+        target_date=shard['date'], recipients=recipients, use_ledger=True,
+        deadline=_invocation_deadline(context, shard.get('budget_ms')),
+        limiter=fanout.TokenBucket(shard.get('rate_per_second', bot.rate_limiter.rate)),
+    )
+    return _response(200 if report or report.partial else 500, {
+        'message': f"Shard {shard['index'] + 1}/{shard['count']} delivered",
+        'shard': shard['index'],
+        'recipients': len(recipients),
+        'cold_start': cold_start,
+        'delivery': report.to_dict()
+    })
+
+
+def _local_shard_worker(event):
+    """ProcessPoolDispatcher worker: run a shard event through the handler in this process."""
+    return lambda_handler(event, None)
+
+
+def _coordinate_delivery(bot, target_date, context, resume_invocation, cold_start):
+    """
+    Coordinator side of a sharded run (FANOUT_MODE=sharded): filter out the
+    recipients the delivery ledger already has, split the rest into
+    SHARD_SIZE hash shards and hand each to a worker invocation of this
+    function (a local process pool when not running on Lambda), then gather
+    the workers' reports into one daily summary.
+    """
+    target_date = target_date or datetime.now().strftime('%Y-%m-%d')
+    if bot.delivery_calendar.is_no_send_day(target_date):
+        report = fanout.DeliveryReport(target_date, skipped=bot.is_yom_tov(target_date)[1])
+        return _response(200, {'message': 'No delivery scheduled', 'test_date': target_date,
+                               'cold_start': cold_start, 'delivery': report.to_dict()})
+    if not bot.load_mitzvah_for_date(target_date):
+        report = fanout.DeliveryReport(target_date, error=f"No mitzvah found for {target_date}")
+        return _response(500, {'message': 'Failed to send mitzvah', 'test_date': target_date,
+                               'cold_start': cold_start, 'delivery': report.to_dict()})
+
+    recipients = bot.recipients
+    delivered = bot.ledger.delivered(target_date)
+    pending = [r for r in recipients if r not in delivered]
+    if not pending:
+        report = fanout.DeliveryReport(target_date, skipped='already delivered')
+        return _response(200, {'message': 'Daily mitzvah already delivered', 'test_date': target_date,
+                               'recipients': len(recipients), 'cold_start': cold_start,
+                               'delivery': report.to_dict()})
+
+    parallelism = int(os.environ.get('SHARD_PARALLELISM', sharding.DEFAULT_SHARD_PARALLELISM))
+    function_arn = getattr(context, 'invoked_function_arn', None)
+    if function_arn:
+        dispatcher = sharding.LambdaDispatcher(function_arn, parallelism)
+    else:
+        dispatcher = sharding.ProcessPoolDispatcher(_local_shard_worker, parallelism)
+    # Workers stop early enough for the coordinator to gather their reports
+    deadline = _invocation_deadline(context)
+    budget_ms = None
+    if deadline is not None:
+        budget_ms = max(0, round((deadline - time.monotonic() - SEND_DEADLINE_MARGIN_SECONDS) * 1000))
+    summary = sharding.coordinate(
+        target_date, pending, dispatcher,
+        shard_size=int(os.environ.get('SHARD_SIZE', sharding.DEFAULT_SHARD_SIZE)),
+        rate_per_second=bot.rate_limiter.rate, parallelism=parallelism, budget_ms=budget_ms,
+    )
+    summary['already_delivered'] += len(recipients) - len(pending)
+
+    # Shards that stopped early or failed are re-dispatched by the next coordinator run;
+    # a tripped circuit breaker (systemic failure) is not retried automatically
+    continuation = None
+    if summary.get('remaining') and not summary.get('aborted'):
+        continuation = _continue_delivery(context, target_date, summary['remaining'], summary['attempted'] > 0,
+                                          resume_invocation, coordinator=True)
+    success = summary['sent'] > 0 and not summary.get('shard_errors') and not summary.get('aborted')
+    body = {
+        'message': ('Daily mitzvah delivery continuing' if continuation
+                    else 'Daily mitzvah sent successfully' if success else 'Failed to send mitzvah'),
+        'test_date': target_date,
+        'timestamp': datetime.now().isoformat(),
+        'recipients': len(recipients),
+        'cold_start': cold_start,
+        'delivery': summary
+    }
+    if continuation:
+        body['continuation'] = continuation
+    return _response(202 if continuation else 200 if success else 500, body)
+
+
+class WarmState:
+    """
+    Module-scoped state reused across invocations of a warm Lambda container:
+    the bot keeps its parsed schedule, holiday index, delivery calendar and
+    message transport (and its HTTP connections) until the container is recycled.
+    """
+
+    def __init__(self):
+        self.bot = None
+        self.invocations = 0
+
+    def get_bot(self):
+        """Return (bot, cold_start); the bot is only constructed on the first invocation."""
+        self.invocations += 1
+        if self.bot is None:
+            self.bot = MitzvahLambdaBot()
+            return self.bot, True
+        return self.bot, False
+
+    def reset(self):
+        """Drop all cached state; the next invocation rebuilds the bot."""
+        self.bot = None
+
+
+_warm_state = WarmState()
+
+
 def lambda_handler(event, context):
     """
     AWS Lambda entry point
@@ -75,7 +431,13 @@ def lambda_handler(event, context):
 
         # Fallback to direct invocation contract
         test_date = None
-        if not is_http and event and isinstance(event, dict) and 'test_date' in event:
+        resume_invocation = 0
+        if not is_http and isinstance(event, dict) and event.get('resume_date'):
+            # Continuation of a run that stopped before the time budget ran out
+            test_date = event['resume_date']
+            resume_invocation = int(event.get('resume_invocation', 1))
+            logger.info(f"⏩ Resuming delivery for {test_date} (continuation {resume_invocation})")
+        elif not is_http and event and isinstance(event, dict) and 'test_date' in event:
             test_date = event['test_date']
             logger.info(f"🧪 Test mode (invoke): Using date {test_date}")
         elif is_http:
@@ -101,44 +463,100 @@ def lambda_handler(event, context):
                     'body': json.dumps({'error': 'Forbidden'})
                 }
 
-        # Quick validation
-        if not Client:
-            raise ImportError("Twilio library not available")
-
-        # Initialize the bot with timeout protection
+        # Reuse the bot from a warm container; build it only on a cold start
         logger.info("Initializing bot...")
-        bot = MitzvahLambdaBot()
+        bot, cold_start = _warm_state.get_bot()
+        logger.info(f"{'Cold start' if cold_start else 'Warm reuse'} (invocation {_warm_state.invocations})")
+
+        if _event_flag(event, 'refresh_recipients'):
+            logger.info("Recipient cache invalidated by request")
+            bot.invalidate_recipients()
+
+        # Render-only run over a date range: nothing is sent
+        if _event_flag(event, 'dry_run'):
+            return _dry_run(bot, event, test_date, cold_start)
+
+        # Sharded fan-out: a worker sends the shard it was handed; the coordinator
+        # splits the day's list across workers (never for a single test recipient)
+        if not is_http and isinstance(event, dict) and event.get('shard'):
+            return _run_shard(bot, event['shard'], context, cold_start)
+
+        # Resend a date's message to its dead-lettered recipients only
+        if not is_http and isinstance(event, dict) and event.get('replay_dead_letters'):
+            replay_date = event['replay_dead_letters']
+            report = bot.replay_dead_letters(replay_date, deadline=_invocation_deadline(context))
+            return _response(200 if report else 500, {
+                'message': 'Dead letters replayed' if report else 'Dead-letter replay failed',
+                'test_date': replay_date,
+                'timestamp': datetime.now().isoformat(),
+                'cold_start': cold_start,
+                'delivery': report.to_dict()
+            })
 
-        # If a test recipient was provided, override the recipients list to a single number
+        # Timezone-bucketed delivery: an hourly scheduled run sends to the cohorts at DELIVERY_LOCAL_HOUR
+        local_hour = os.environ.get('DELIVERY_LOCAL_HOUR')
+        if not is_http and isinstance(event, dict) and (
+                event.get('cohorts') or (local_hour and not test_date and not test_recipient
+                                         and not _event_flag(event, 'coordinator'))):
+            return _deliver_cohorts(bot, event, context, int(local_hour or 0), resume_invocation, cold_start)
+
+        sharded = os.environ.get('FANOUT_MODE', 'single').lower() == 'sharded' or _event_flag(event, 'coordinator')
+        if sharded and not test_recipient:
+            response = _coordinate_delivery(bot, test_date, context, resume_invocation, cold_start)
+            logger.info(f"Returning response: {response['statusCode']}")
+            return response
+
+        # If a test recipient was provided, send only to that number (the cached list is left intact)
+        recipients = None
         if test_recipient:
             single = str(test_recipient).strip()
             if single.startswith('whatsapp:'):
                 single = single[len('whatsapp:'):]
-            bot.recipients = [single]
+            recipients = [single]
             logger.info(f"🧪 Test recipient override in effect; will only send to: {single}")
 
         logger.info("Bot initialized, sending daily mitzvah...")
 
         # Send mitzvah for specified date (or today if no test date)
-        success = bot.send_daily_mitzvah(target_date=test_date)
+        # Stop sending (async transport) with a safety margin before the Lambda timeout
+        deadline = _invocation_deadline(context)
+        report = bot.send_daily_mitzvah(target_date=test_date, recipients=recipients, deadline=deadline,
+                                        restart=_event_flag(event, 'restart'))
+        success = bool(report)
 
         logger.info(f"Mitzvah sending completed: {'Success' if success else 'Failed'}")
 
+        # Stopped early: hand the rest of the list to another invocation
+        continuation = None
+        if report.partial and recipients is None:
+            continuation = _continue_delivery(context, report.date, report.total - report.next_index,
+                                              report.next_index > report.start_index, resume_invocation)
+
         # Return response for Lambda
+        body = {
+            'message': ('Daily mitzvah delivery continuing' if continuation
+                        else 'Daily mitzvah sent successfully' if success else 'Failed to send mitzvah'),
+            'test_date': test_date or 'today',
+            'timestamp': datetime.now().isoformat(),
+            'recipients': (len(recipients) if recipients is not None
+                           else report.total if bot.stream_recipients else len(bot.recipients)),
+            'cold_start': cold_start,
+            'delivery': report.to_dict()
+        }
+        if continuation:
+            body['continuation'] = continuation
         response = {
-            'statusCode': 200 if success else 500,
+            'statusCode': 202 if continuation else 200 if success else 500,
             'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'message': 'Daily mitzvah sent successfully' if success else 'Failed to send mitzvah',
-                'test_date': test_date or 'today',
-                'timestamp': datetime.now().isoformat(),
-                'recipients': len(bot.recipients) if hasattr(bot, 'recipients') else 0
-            })
+            'body': json.dumps(body)
         }
 
         logger.info(f"Returning response: {response['statusCode']}")
         return response
 
+    except IncompleteDeliveryError:
+        # Fail the invocation so the Lambda/Scheduler retry resumes from the send cursor
+        raise
     except Exception as e:
         logger.error(f"Lambda execution failed: {e}")
         return {
@@ -150,10 +568,61 @@ def lambda_handler(event, context):
         }
 
 class MitzvahLambdaBot:
-    def __init__(self):
-        """Initialize the Lambda bot with environment variables."""
+    def __init__(self, offline=False):
+        """
+        Initialize the Lambda bot with environment variables.
+        offline=True loads only schedule, holidays and messages (no Twilio, no recipients)
+        for rendering and other read-only use.
+        """
         logger.info("Starting bot initialization...")
+        self.offline = offline
+        self.recipients_ttl = float(os.environ.get('RECIPIENTS_TTL_SECONDS', '300'))
+        self._recipients = None
+        self._recipients_loaded_at = 0.0
+        # DynamoDB (SUBSCRIBERS_TABLE) or SQLite (SUBSCRIBERS_DB) subscribers; None means RECIPIENTS env only
+        self.subscriber_store = subscriber_store.store_from_env()
+        # Sends run on a bounded thread pool, rate-limited to the Twilio throughput tier
+        self.send_concurrency = int(os.environ.get('SEND_CONCURRENCY', fanout.DEFAULT_CONCURRENCY))
+        self.rate_limiter = fanout.TokenBucket(
+            float(os.environ.get('SEND_RATE_PER_SECOND', fanout.DEFAULT_RATE_PER_SECOND))
+        )
+        self.send_transport = os.environ.get('SEND_TRANSPORT', 'thread').lower()
+        # Adaptive mode: SEND_CONCURRENCY is the starting point, AIMD moves it up to SEND_MAX_CONCURRENCY
+        self.adaptive_concurrency = os.environ.get('SEND_ADAPTIVE_CONCURRENCY', 'false').lower() == 'true'
+        self.send_max_concurrency = int(os.environ.get('SEND_MAX_CONCURRENCY',
+                                                       adaptive_concurrency.DEFAULT_MAX_CONCURRENCY))
+        self.send_latency_target = float(os.environ.get('SEND_LATENCY_TARGET_MS') or 0) / 1000 or None
+        pool_size = self.send_max_concurrency if self.adaptive_concurrency else self.send_concurrency
+        self.send_batch_size = int(os.environ.get('SEND_BATCH_SIZE', pool_size * 8))
+        self.cursor_store = send_cursor.store_from_env()
+        self.ledger = delivery_ledger.ledger_from_env()
+        self.send_max_retries = int(os.environ.get('SEND_MAX_RETRIES', send_failures.DEFAULT_MAX_RETRIES))
+        self.dead_letters = dead_letters.store_from_env()
+        # Full-list runs can stream recipients from a parallel scan instead of loading the list first
+        self.scan_segments = int(os.environ.get('SUBSCRIBERS_SCAN_SEGMENTS', '0'))
+        # With a change log, recipients come from a local snapshot refreshed by the changes since its version
+        self.change_log = subscriber_changes.change_log_from_env()
+        if offline:
+            self.transport = None
+            self.whatsapp_number = os.environ.get('TWILIO_WHATSAPP_NUMBER', '+14155238886')
+            self.recipients_ttl = float('inf')
+            self.recipients = []
+        else:
+            self._connect()
+
+        # Try to load from CSV first, fallback to embedded data
+        self.schedule_data = self.load_schedule_data()
+        self.schedule_index = self.build_schedule_index()
+        self.holiday_data = holiday_index.load_holidays()
+        self.holiday_index = holiday_index.HolidayIndex(self.holiday_data)
+        self.delivery_calendar = self.build_delivery_calendar()
+        self._message_cache = None
+        logger.info(f"Loaded {len(self.schedule_data)} schedule entries")
+        logger.info(f"Loaded {len(self.holiday_data)} holiday entries")
+        logger.info(f"Planned {len(self.delivery_calendar)} delivery days")
 
+    def _connect(self):
+        """Load Twilio credentials and create the message transport (SEND_TRANSPORT)."""
         # Load Twilio credentials from Lambda environment variables
         self.account_sid = os.environ.get('TWILIO_ACCOUNT_SID')
         self.auth_token = os.environ.get('TWILIO_AUTH_TOKEN')
@@ -161,59 +630,61 @@ class MitzvahLambdaBot:
 
         logger.info(f"Loaded credentials - SID: {self.account_sid[:10] if self.account_sid else 'None'}...")
 
-        if not self.account_sid or not self.auth_token:
-            raise ValueError("Missing Twilio credentials in Lambda environment variables")
-
-        # Initialize Twilio client with timeout
+        # Only the thread transport needs the Twilio SDK; async talks to the REST API
+        # itself, and the fake and file transports never leave the machine
         try:
-            logger.info("Creating Twilio client...")
-            self.client = Client(self.account_sid, self.auth_token)
-            logger.info("Twilio client created successfully")
+            self.transport = transports.transport_from_env(
+                self.send_transport, self.account_sid, self.auth_token,
+                client_factory=_twilio_client_class,
+                concurrency=self.send_max_concurrency if self.adaptive_concurrency else self.send_concurrency,
+                max_retries=self.send_max_retries,
+            )
+            logger.info(f"Created {self.transport!r}")
         except Exception as e:
-            logger.error(f"Failed to create Twilio client: {e}")
+            logger.error(f"Failed to create {self.send_transport} transport: {e}")
             raise
 
-        # Load recipients: prefer DynamoDB subscribers table if configured, else env var
-        self.recipients = self._load_recipients()
+        # Recipients (the subscriber store if configured, else env var) are
+        # loaded on first use and cached for RECIPIENTS_TTL_SECONDS; shard workers
+        # are handed their recipients and never load the list.
 
-        logger.info(f"Loaded {len(self.recipients)} recipients: {self.recipients}")
+    @property
+    def recipients(self) -> List[str]:
+        """Recipient list, reloaded once the cached copy is older than recipients_ttl seconds."""
+        if self._recipients is None or time.monotonic() - self._recipients_loaded_at > self.recipients_ttl:
+            self._recipients = self._load_recipients()
+            self._recipients_loaded_at = time.monotonic()
+        return self._recipients
 
-        # Try to load from CSV first, fallback to embedded data
-        self.schedule_data = self.load_schedule_data()
-        self.holiday_data = self.get_embedded_holidays()
-        logger.info(f"Loaded {len(self.schedule_data)} schedule entries")
-        logger.info(f"Loaded {len(self.holiday_data)} holiday entries")
+    @recipients.setter
+    def recipients(self, numbers):
+        self._recipients = list(numbers)
+        self._recipients_loaded_at = time.monotonic()
+
+    def invalidate_recipients(self):
+        """Force the next access to reload recipients from DynamoDB / env."""
+        self._recipients = None
 
     def _load_recipients(self) -> List[str]:
-        """Load opted-in recipients from DynamoDB if SUBSCRIBERS_TABLE is set; fallback to RECIPIENTS env."""
-        table_name = os.environ.get('SUBSCRIBERS_TABLE')  # daily-mitzvah-bot-stack-subscribers
+        """
+        Load opted-in recipients from the subscriber store if one is
+        configured (SUBSCRIBERS_TABLE: a keys-only Query of the sparse
+        active-subscribers index, already in phone order; SUBSCRIBERS_DB: the
+        same from SQLite), or from the local snapshot when a change log is
+        configured; fallback to RECIPIENTS env.
+        """
+        store = self.subscriber_store
         numbers: List[str] = []
-        if table_name:
+        if store is not None:
             try:
-                import importlib
-                boto3 = importlib.import_module('boto3')
-                # Dynamically import Attr
-                dyn_conditions = importlib.import_module('boto3.dynamodb.conditions')
-                Attr = getattr(dyn_conditions, 'Attr')
-                ddb = boto3.resource('dynamodb')
-                table = ddb.Table(table_name)
-                scan_kwargs = {
-                    'FilterExpression': Attr('consent_status').eq('opted_in') & Attr('channel').eq('whatsapp')
-                }
-                response = table.scan(**scan_kwargs)
-                items = response.get('Items', [])
-                numbers = [item.get('phone') for item in items if item.get('phone')]
-                # Handle pagination
-                while response.get('LastEvaluatedKey'):
-                    scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
-                    response = table.scan(**scan_kwargs)
-                    items = response.get('Items', [])
-                    numbers.extend([item.get('phone') for item in items if item.get('phone')])
-                numbers = sorted(set(numbers))
+                if self.change_log is not None:
+                    numbers = self.recipient_snapshot().phones()
+                else:
+                    numbers = list(store.active_phones())
                 if numbers:
-                    logger.info(f"Loaded {len(numbers)} recipients from DynamoDB table {table_name}")
+                    logger.info(f"Loaded {len(numbers)} recipients from {store!r}")
             except Exception as e:
-                logger.warning(f"Failed to load subscribers from DynamoDB ({table_name}): {e}")
+                logger.warning(f"Failed to load subscribers from {store!r}: {e}")
 
         if not numbers:
             recipients_str = os.environ.get('RECIPIENTS', '')
@@ -222,19 +693,77 @@ class MitzvahLambdaBot:
                 raise ValueError("No recipients found. Configure SUBSCRIBERS_TABLE or set RECIPIENTS env var.")
         return numbers
 
+    def recipient_snapshot(self):
+        """
+        The local recipient snapshot, brought up to date with the change log
+        (or rebuilt from the active-subscribers index); the last good snapshot
+        if the change log does not answer within RECIPIENT_SNAPSHOT_BUDGET_MS.
+        """
+        path, budget, max_age = recipient_snapshot.snapshot_settings_from_env()
+        snapshot, source = recipient_snapshot.refresh(
+            path, self.change_log, self.subscriber_store.active_phones, budget=budget, max_age=max_age,
+        )
+        logger.info(f"Recipients from {snapshot!r} ({source})")
+        return snapshot
+
+    def cohort_recipients(self, zones) -> List[str]:
+        """
+        Opted-in recipients whose stored timezone is one of `zones`: one
+        keys-only Query per zone on the sparse timezone index, or the
+        RECIPIENTS env numbers in those zones. With a change log, the local
+        snapshot filtered by timezone instead (the timezone is derived from the
+        number, so no query is needed). Not cached; every hourly run is a
+        different cohort. An empty cohort is not an error.
+        """
+        store = self.subscriber_store
+        if store is None:
+            numbers = [r.strip() for r in os.environ.get('RECIPIENTS', '').split(',') if r.strip()]
+            return sorted(n for n in numbers if timezones.timezone_for_phone(n) in zones)
+        if self.change_log is not None:
+            try:
+                zones = set(zones)
+                return [n for n in self.recipient_snapshot().phones()
+                        if timezones.timezone_for_phone(n) in zones]
+            except Exception as e:
+                logger.warning(f"Recipient snapshot unavailable ({e}); querying the timezone index")
+
+        numbers = set()
+        for zone in zones:
+            numbers.update(store.timezone_phones(zone))
+        logger.info(f"Loaded {len(numbers)} recipients in {len(zones)} timezones from {store!r}")
+        return sorted(numbers)
+
+    @property
+    def stream_recipients(self):
+        """Whether full-list runs stream recipients (SUBSCRIBERS_SCAN_SEGMENTS > 0 with a subscriber store)."""
+        return self.scan_segments > 0 and self.subscriber_store is not None
+
+    def open_recipient_stream(self):
+        """A started RecipientStream: parallel Scan of the sparse active-subscribers index."""
+        return recipient_stream.RecipientStream(
+            self.subscriber_store,
+            segments=self.scan_segments,
+            queue_size=int(os.environ.get('SUBSCRIBERS_STREAM_QUEUE_SIZE', recipient_stream.DEFAULT_QUEUE_SIZE)),
+        ).start()
+
     def load_schedule_data(self):
         """
-        Load schedule data from CSV if available, otherwise use embedded data
+        Load schedule data from the compiled artifact if it is present and fresh,
+        otherwise from CSV, otherwise use embedded data
         """
+        self.schedule_artifact = None
         try:
-            import csv
-            import os
-
             # Try to load from the enhanced CSV schedule with biblical sources first
-            enhanced_csv_path = 'Schedule_Complete_Sefer_HaMitzvos_WithBiblical.csv'
+            enhanced_csv_path = SCHEDULE_CSV_PATH
             original_csv_path = 'Schedule_Complete_Sefer_HaMitzvos.csv'
-
-            if os.path.exists(enhanced_csv_path):
+            artifact_path = os.environ.get('SCHEDULE_ARTIFACT', SCHEDULE_ARTIFACT_PATH)
+
+            artifact = schedule_artifact.open_artifact(artifact_path, source_csv=enhanced_csv_path)
+            if artifact:
+                logger.info(f"Loading schedule from compiled artifact {artifact_path}")
+                self.schedule_artifact = artifact
+                return artifact
+            elif os.path.exists(enhanced_csv_path):
                 logger.info("Loading schedule from enhanced CSV file with biblical sources")
                 return self.load_from_csv(enhanced_csv_path)
             elif os.path.exists(original_csv_path):
@@ -247,80 +776,25 @@ class MitzvahLambdaBot:
             logger.warning(f"Failed to load from CSV: {e}, using embedded data")
             return self.get_embedded_schedule()
 
+    def build_schedule_index(self):
+        """Index the loaded schedule by date ordinal for constant-time lookups."""
+        if self.schedule_artifact:
+            return ScheduleIndex.from_artifact(self.schedule_artifact)
+        return ScheduleIndex(self.schedule_data)
+
     def load_from_csv(self, csv_path):
         """
-        Load schedule data from the complete CSV file and convert to expected format
+        Load schedule data from the complete CSV file into one DeliveryDay per date
         """
-        import csv
-        from collections import defaultdict
-
-        schedule_data = []
-        daily_entries = defaultdict(list)
-
-        with open(csv_path, 'r', encoding='utf-8-sig') as file:  # Handle UTF-8 BOM
-            reader = csv.DictReader(file)
-
-            # Debug: Log the fieldnames to help troubleshoot
-            logger.info(f"CSV fieldnames: {reader.fieldnames}")
-
-            row_count = 0
-            for row in reader:
-                row_count += 1
-
-                # Handle UTF-8 BOM in Date column if present
-                date_key = 'Date' if 'Date' in row else list(row.keys())[0]  # First column should be Date
-                date_value = row[date_key]
-
-                # Debug: Log first few rows for troubleshooting
-                if row_count <= 3:
-                    logger.info(f"Row {row_count}: Date='{date_value}', Keys={list(row.keys())[:3]}")
-
-                daily_entries[date_value].append({
-                    'Mitzvah_Type_Number': row['Mitzvah_Type_Number'],
-                    'Summary': row['Summary'],
-                    'Sefaria_Link': row['Sefaria_Link'],
-                    'Biblical_Source': row.get('Biblical_Source', '')
-                })
-
-            logger.info(f"Loaded {row_count} CSV rows into {len(daily_entries)} daily entries")
-
-        # Convert to the format expected by lambda bot
-        for date, entries in sorted(daily_entries.items()):
-            mitzvos_numbers = []
-            titles = []
-            sefaria_links = []
-            biblical_sources = []
-
-            for entry in entries:
-                mitzvos_numbers.append(entry['Mitzvah_Type_Number'])
-                titles.append(entry['Summary'])
-                sefaria_links.append(entry['Sefaria_Link'])
-                biblical_sources.append(entry['Biblical_Source'])
-
-            # Determine source based on mitzvah types
-            sources = set()
-            for mitzvah_type in mitzvos_numbers:
-                if 'Intro' in mitzvah_type:
-                    sources.add('Sefer HaMitzvot Introduction')
-                elif 'Positive' in mitzvah_type:
-                    sources.add('Sefer HaMitzvot Positive')
-                elif 'Negative' in mitzvah_type:
-                    sources.add('Sefer HaMitzvot Negative')
-                elif 'Conclusion' in mitzvah_type:
-                    sources.add('Sefer HaMitzvot Conclusion')
-                else:
-                    sources.add('Sefer HaMitzvot')
-
-            schedule_entry = {
-                'Date': date,
-                'Mitzvos': ', '.join(mitzvos_numbers),
-                'English Title(s)': ' & '.join(titles),
-                'Source': ' & '.join(sorted(sources)),
-                'Sefaria_Link': sefaria_links[0] if len(sefaria_links) == 1 else sefaria_links,
-                'Biblical_Sources': biblical_sources
-            }
-
-            schedule_data.append(schedule_entry)
+        daily_entries = schedule_artifact.read_schedule_rows(csv_path)
+        row_count = sum(len(rows) for rows in daily_entries.values())
+        logger.info(f"Loaded {row_count} CSV rows into {len(daily_entries)} daily entries")
+
+        # Parse each row's type/number once into the typed schedule model
+        schedule_data = [
+            DeliveryDay.from_rows(date, entries)
+            for date, entries in sorted(daily_entries.items())
+        ]
 
         logger.info(f"Loaded {len(schedule_data)} entries from CSV covering {len(daily_entries)} days")
         return schedule_data
@@ -334,232 +808,68 @@ class MitzvahLambdaBot:
         # Due to size constraints, embedding full 628 entries would exceed lambda limits
         # Loading from CSV or external source recommended for production
         # This is a sample of the expected format:
-        return [
-            {
-                'Date': '2025-10-20',
-                'Mitzvos': 'Intro 1, Intro 2',
-                'English Title(s)': 'Introduction to Counting the Mitzvot & Principle 1: Not rabbinic commandments',
-                'Source': 'Sefer HaMitzvot Introduction',
-                'Sefaria_Link': 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.1?lang=bi'
-            },
-            {
-                'Date': '2025-10-21',
-                'Mitzvos': 'Intro 3, Intro 4',
-                'English Title(s)': 'Principle 2: Not derived through hermeneutics & Principle 3: Only perpetual commandments',
-                'Source': 'Sefer HaMitzvot Introduction',
-                'Sefaria_Link': 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.3?lang=bi'
-            },
-            {
-                'Date': '2025-10-22',
-                'Mitzvos': 'Intro 5, Intro 6',
-                'English Title(s)': 'Principle 4: Not general Torah commands & Principle 5: Not reasons as separate mitzvot',
-                'Source': 'Sefer HaMitzvot Introduction',
-                'Sefaria_Link': 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.5?lang=bi'
-            },
-            {
-                'Date': '2025-10-23',
-                'Mitzvos': 'Intro 7, Intro 8',
-                'English Title(s)': 'Principle 6: Separate positive and negative & Principle 7: Not details of commandments',
-                'Source': 'Sefer HaMitzvot Introduction',
-                'Sefaria_Link': 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.7?lang=bi'
-            }
+        sample = [
+            ('2025-10-20', 'Intro 1', 'Introduction to Counting the Mitzvot', 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.1?lang=bi'),
+            ('2025-10-20', 'Intro 2', 'Principle 1: Not rabbinic commandments', 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.1?lang=bi'),
+            ('2025-10-21', 'Intro 3', 'Principle 2: Not derived through hermeneutics', 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.3?lang=bi'),
+            ('2025-10-21', 'Intro 4', 'Principle 3: Only perpetual commandments', 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.3?lang=bi'),
+            ('2025-10-22', 'Intro 5', 'Principle 4: Not general Torah commands', 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.5?lang=bi'),
+            ('2025-10-22', 'Intro 6', 'Principle 5: Not reasons as separate mitzvot', 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.5?lang=bi'),
+            ('2025-10-23', 'Intro 7', 'Principle 6: Separate positive and negative', 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.7?lang=bi'),
+            ('2025-10-23', 'Intro 8', 'Principle 7: Not details of commandments', 'https://www.sefaria.org/Sefer_HaMitzvot%2C_Shorashim.7?lang=bi'),
             # Complete 628-entry schedule available in Schedule_Complete_Sefer_HaMitzvos.csv
             # For full production deployment, implement CSV loading or external data source
         ]
+        days = {}
+        for date, mitzvah, summary, link in sample:
+            days.setdefault(date, []).append({
+                'Mitzvah_Type_Number': mitzvah, 'Summary': summary, 'Sefaria_Link': link, 'Biblical_Source': ''
+            })
+        return [DeliveryDay.from_rows(date, rows) for date, rows in days.items()]
 
     def get_embedded_holidays(self):
         """
-        Embed holiday data for consolidation logic - manually corrected dates
-        """
-        return [
-            {
-                'Date': '2026-04-02',
-                'Holiday_Name': 'Passover Day 1',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-04-03',
-                'Holiday_Name': 'Passover Day 2',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-04-08',
-                'Holiday_Name': 'Passover Day 7',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-04-09',
-                'Holiday_Name': 'Passover Day 8',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-05-22',
-                'Holiday_Name': 'Shavuot Day 1',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-05-23',
-                'Holiday_Name': 'Shavuot Day 2',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-07-29',
-                'Holiday_Name': 'Tish B Av',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-09-12',
-                'Holiday_Name': 'Rosh Hashanah Day 1',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-09-13',
-                'Holiday_Name': 'Rosh Hashanah Day 2',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-09-21',
-                'Holiday_Name': 'Yom Kippur',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-09-26',
-                'Holiday_Name': 'Sukkot Day 1',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-09-27',
-                'Holiday_Name': 'Sukkot Day 2',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-10-03',
-                'Holiday_Name': 'Shemini Atzeret',
-                'Work_Forbidden': 'yes'
-            },
-            {
-                'Date': '2026-10-04',
-                'Holiday_Name': 'Simchat Torah',
-                'Work_Forbidden': 'yes'
-            }
-            # More holidays would be embedded here in production
-        ]
+        Embedded holiday data for consolidation logic, used when jewish_holidays.csv is absent
+        """
+        return holiday_index.embedded_holidays()
 
     def is_yom_tov(self, date_str):
         """Check if given date is a Yom Tov (no-work day)"""
-        for holiday in self.holiday_data:
-            if holiday['Date'] == date_str and holiday['Work_Forbidden'] == 'yes':
-                return True, holiday['Holiday_Name']
-        return False, None
+        return self.holiday_index.is_yom_tov(date_str)
+
+    def build_delivery_calendar(self):
+        """Plan every delivery date once so each entry is sent exactly once and never on Yom Tov."""
+        return plan_delivery_calendar(self.schedule_index.scheduled_ordinals(), self.holiday_index.yom_tov)
 
     def get_consolidated_mitzvot(self, target_date):
         """
-        Get mitzvot with holiday consolidation logic:
-        - Day before Yom Tov: include today + tomorrow's mitzvot
-        - Day after Yom Tov: include yesterday + today's mitzvot
+        Get the DeliveryDay planned for a delivery date by the delivery calendar:
+        - Day before a Yom Tov run: today + the first half of the run's mitzvot
+        - Day after a Yom Tov run: the rest of the run's mitzvot + today
+        - Yom Tov itself: nothing is sent
         """
-        from datetime import datetime, timedelta
+        delivery = self.delivery_calendar.get(target_date)
+        if not delivery:
+            return None
 
-        current_date = datetime.strptime(target_date, '%Y-%m-%d')
-        tomorrow = (current_date + timedelta(days=1)).strftime('%Y-%m-%d')
-        yesterday = (current_date - timedelta(days=1)).strftime('%Y-%m-%d')
+        days = [self.find_mitzvah_by_date(entry_id) for entry_id in delivery.entry_ids]
+        days = [day for day in days if day]
+        if not days:
+            return None
 
-        # Check if tomorrow is Yom Tov
-        is_tomorrow_yomtov, tomorrow_holiday = self.is_yom_tov(tomorrow)
+        if not delivery.is_consolidated:
+            return days[0]
 
-        # Check if yesterday was Yom Tov
-        is_yesterday_yomtov, yesterday_holiday = self.is_yom_tov(yesterday)
-
-        logger.info(f"Date analysis: {target_date}, Tomorrow YomTov: {is_tomorrow_yomtov}, Yesterday YomTov: {is_yesterday_yomtov}")
-
-        # Get today's mitzvot
-        today_mitzvot = self.find_mitzvah_by_date(target_date)
-
-        if is_tomorrow_yomtov and today_mitzvot:
-            # Day before Yom Tov: consolidate today + tomorrow
-            tomorrow_mitzvot = self.find_mitzvah_by_date(tomorrow)
-            if tomorrow_mitzvot:
-                logger.info(f"Consolidating for {tomorrow_holiday}: adding tomorrow's mitzvot to today")
-                return self.combine_mitzvot_entries(today_mitzvot, tomorrow_mitzvot, f"Preparing for {tomorrow_holiday}")
-
-        elif is_yesterday_yomtov and today_mitzvot:
-            # Day after Yom Tov: consolidate yesterday + today
-            yesterday_mitzvot = self.find_mitzvah_by_date(yesterday)
-            if yesterday_mitzvot:
-                logger.info(f"Consolidating after {yesterday_holiday}: adding yesterday's mitzvot to today")
-                return self.combine_mitzvot_entries(yesterday_mitzvot, today_mitzvot, f"Continuing after {yesterday_holiday}")
-
-        # Regular day - return today's mitzvot
-        return today_mitzvot
+        logger.info(f"Consolidating {list(delivery.entry_ids)} into {target_date}: {delivery.reason}")
+        return DeliveryDay.combine(target_date, days, delivery.reason)
 
     def find_mitzvah_by_date(self, date_str):
-        """Find mitzvah entry for specific date"""
-        for row in self.schedule_data:
-            if row['Date'].strip() == date_str:
-                return {
-                    'date': row['Date'].strip(),
-                    'mitzvos': row['Mitzvos'].strip(),
-                    'title': row['English Title(s)'].strip(),
-                    'source': row['Source'].strip(),
-                    'sefaria_link': row.get('Sefaria_Link', ''),
-                    'biblical_sources': row.get('Biblical_Sources', [])
-                }
-        return None
-
-    def combine_mitzvot_entries(self, first_entry, second_entry, reason):
-        """Combine two mitzvot entries into one consolidated entry"""
-        # Combine mitzvot numbers
-        combined_mitzvos = f"{first_entry['mitzvos']}, {second_entry['mitzvos']}"
-
-        # Combine titles
-        combined_titles = f"{first_entry['title']} & {second_entry['title']}"
-
-        # Combine sources
-        combined_sources = f"{first_entry['source']} & {second_entry['source']}"
+        """Find the DeliveryDay scheduled on a specific date"""
+        return self.schedule_index.get(date_str)
 
-        # Combine Sefaria links
-        first_link = first_entry.get('sefaria_link', '')
-        second_link = second_entry.get('sefaria_link', '')
-
-        combined_sefaria_links = []
-        if first_link:
-            if isinstance(first_link, list):
-                combined_sefaria_links.extend(first_link)
-            else:
-                combined_sefaria_links.append(first_link)
-
-        if second_link:
-            if isinstance(second_link, list):
-                combined_sefaria_links.extend(second_link)
-            else:
-                combined_sefaria_links.append(second_link)
-
-        # Combine biblical sources
-        first_biblical = first_entry.get('biblical_sources', [])
-        second_biblical = second_entry.get('biblical_sources', [])
-
-        combined_biblical_sources = []
-        if first_biblical:
-            if isinstance(first_biblical, list):
-                combined_biblical_sources.extend(first_biblical)
-            else:
-                combined_biblical_sources.append(first_biblical)
-
-        if second_biblical:
-            if isinstance(second_biblical, list):
-                combined_biblical_sources.extend(second_biblical)
-            else:
-                combined_biblical_sources.append(second_biblical)
-
-        return {
-            'date': first_entry['date'],
-            'mitzvos': combined_mitzvos,
-            'title': combined_titles,
-            'source': combined_sources,
-            'sefaria_link': combined_sefaria_links,
-            'biblical_sources': combined_biblical_sources,
-            'consolidation_reason': reason
-        }
+    def entries_between(self, start_date, end_date):
+        """Return the scheduled DeliveryDays from start_date to end_date (inclusive)."""
+        return self.schedule_index.entries_between(start_date, end_date)
 
     def load_mitzvah_for_date(self, target_date=None):
         """Load mitzvah for specific date with holiday consolidation logic."""
@@ -572,10 +882,10 @@ class MitzvahLambdaBot:
         mitzvah_data = self.get_consolidated_mitzvot(target_date)
 
         if mitzvah_data:
-            if 'consolidation_reason' in mitzvah_data:
-                logger.info(f"Found consolidated mitzvot: {mitzvah_data['mitzvos']} - Reason: {mitzvah_data['consolidation_reason']}")
+            if mitzvah_data.is_consolidated:
+                logger.info(f"Found consolidated mitzvot: {mitzvah_data.labels} - Reason: {mitzvah_data.reason}")
             else:
-                logger.info(f"Found regular mitzvah: {mitzvah_data['mitzvos']} - {mitzvah_data['title']}")
+                logger.info(f"Found regular mitzvah: {mitzvah_data.labels} - {mitzvah_data.title}")
             return mitzvah_data
 
         logger.warning(f"No mitzvah found for {target_date}")
@@ -641,18 +951,7 @@ class MitzvahLambdaBot:
 
     def format_mitzvah_number(self, mitzvah_type_number):
         """Format mitzvah number for display (e.g., 'Positive 39' -> 'Positive Mitzvah 39')"""
-        if 'Positive' in mitzvah_type_number:
-            number = mitzvah_type_number.replace('Positive ', '')
-            return f"Positive Mitzvah {number}"
-        elif 'Negative' in mitzvah_type_number:
-            number = mitzvah_type_number.replace('Negative ', '')
-            return f"Negative Mitzvah {number}"
-        elif 'Intro' in mitzvah_type_number:
-            return mitzvah_type_number  # Keep Intro format as is
-        elif 'Conclusion' in mitzvah_type_number:
-            return mitzvah_type_number  # Keep Conclusion format as is
-        else:
-            return f"Mitzvah {mitzvah_type_number}"
+        return MitzvahRef.parse(mitzvah_type_number).display
 
     def convert_html_to_whatsapp_markup(self, text):
         """Convert HTML markup to WhatsApp formatting."""
@@ -673,123 +972,93 @@ class MitzvahLambdaBot:
         return text
 
     def format_message(self, mitzvah_data):
-        """Format the WhatsApp message with holiday consolidation support."""
-        date_formatted = datetime.strptime(mitzvah_data['date'], '%Y-%m-%d').strftime('%A, %B %d, %Y')
+        """Format the WhatsApp message for a DeliveryDay, with holiday consolidation support."""
+        date_formatted = datetime.strptime(mitzvah_data.date, '%Y-%m-%d').strftime('%A, %B %d, %Y')
 
         # Check if this is a consolidated message for holidays
-        is_consolidated = 'consolidation_reason' in mitzvah_data
-        consolidation_reason = mitzvah_data.get('consolidation_reason', '')
-
-        # Get Sefaria links from the data
-        sefaria_links = mitzvah_data.get('sefaria_link', [])
-        if isinstance(sefaria_links, str):
-            sefaria_links = [sefaria_links]
+        is_consolidated = mitzvah_data.is_consolidated
+        consolidation_reason = mitzvah_data.reason or ''
+        entries = mitzvah_data.entries
 
-        # Get biblical sources from the data
-        biblical_sources = mitzvah_data.get('biblical_sources', [])
-        if isinstance(biblical_sources, str):
-            biblical_sources = [biblical_sources] if biblical_sources else []
-
-        if mitzvah_data['mitzvos'].startswith('Intro'):
+        if entries[0].ref.is_intro:
             # Introduction/Shorashim message
             sefaria_text = ""
-            if sefaria_links and sefaria_links[0]:
-                sefaria_text = f"\n🕍 Learn more: {sefaria_links[0]}"
+            if entries[0].sefaria_link:
+                sefaria_text = f"\n🕍 Learn more: {entries[0].sefaria_link}"
 
             message = f"""✡️ *Sefer HaMitzvos Daily Study* 📚
 
 📅 {date_formatted}
 
-📖 *{mitzvah_data['mitzvos']}*
-_{mitzvah_data['title']}_
+📖 *{mitzvah_data.labels}*
+_{mitzvah_data.title}_
 
-📚 Source: {mitzvah_data['source']}{sefaria_text}
+📚 Source: {mitzvah_data.source}{sefaria_text}
 
 May your Torah study illuminate your path! ✨🙏
 
 _—Daily Mitzvah Bot_"""
-        else:
-            # Regular mitzvah message
-            mitzvah_nums = mitzvah_data['mitzvos']
-
-            # Check if there are multiple mitzvot
-            if ',' in mitzvah_nums:
-                # Parse multiple mitzvot
-                numbers = [num.strip() for num in mitzvah_nums.split(',')]
-                titles = [title.strip() for title in mitzvah_data['title'].split(' & ')]
-                sources_raw = [source.strip() for source in mitzvah_data['source'].split(' & ')]
-
-                # Handle case where all sources are the same (duplicate the single source for each mitzvah)
-                if len(sources_raw) == 1 and len(numbers) > 1:
-                    sources = sources_raw * len(numbers)
-                else:
-                    sources = sources_raw
+        elif len(entries) > 1:
+            # Build message header with holiday context
+            header = f"✡️ *Sefer HaMitzvos Daily Study* 📚\n\n📅 {date_formatted}"
 
-                # Handle Sefaria links for multiple mitzvot
-                mitzvah_sefaria_links = sefaria_links if len(sefaria_links) > 1 else [sefaria_links[0] if sefaria_links else ''] * len(numbers)
+            if is_consolidated:
+                header += f"\n🎊 *Special Holiday Schedule* - {consolidation_reason}"
 
-                # Build message header with holiday context
-                header = f"✡️ *Sefer HaMitzvos Daily Study* 📚\n\n📅 {date_formatted}"
+            message = header + "\n\n"
 
-                if is_consolidated:
-                    header += f"\n🎊 *Special Holiday Schedule* - {consolidation_reason}"
-
-                message = header + "\n\n"
-
-                # Add each mitzvah separately
-                for i, (num, title, source) in enumerate(zip(numbers, titles, sources)):
-                    sefaria_text = ""
-                    if i < len(mitzvah_sefaria_links) and mitzvah_sefaria_links[i]:
-                        sefaria_text = f"\n🕍 Learn more: {mitzvah_sefaria_links[i]}"
-                    biblical_text = ""
-                    # Include biblical source for each mitzvah when available
-                    if i < len(biblical_sources) and biblical_sources[i] and biblical_sources[i] != 'N/A':
-                        biblical_text = f"\n📜 Biblical Source: {biblical_sources[i]}"
+            # Add each mitzvah separately
+            for entry in entries:
+                sefaria_text = ""
+                if entry.sefaria_link:
+                    sefaria_text = f"\n🕍 Learn more: {entry.sefaria_link}"
+                biblical_text = ""
+                # Include biblical source for each mitzvah when available
+                if entry.biblical_source and entry.biblical_source != 'N/A':
+                    biblical_text = f"\n📜 Biblical Source: {entry.biblical_source}"
 
-                    formatted_mitzvah_num = self.format_mitzvah_number(num)
-                    message += f"""🔢 *{formatted_mitzvah_num}*
-{title}
+                message += f"""🔢 *{entry.ref.display}*
+{entry.summary}
 
-📚 Source: {source}{biblical_text}{sefaria_text}
+📚 Source: {entry.ref.source}{biblical_text}{sefaria_text}
 
 """
 
-                # Add closing with holiday context
-                if is_consolidated:
-                    message += f"""Continue your Torah study during this blessed time! 🎊✨
+            # Add closing with holiday context
+            if is_consolidated:
+                message += f"""Continue your Torah study during this blessed time! 🎊✨
 
 _—Daily Mitzvah Bot_"""
-                else:
-                    message += """Fulfill these mitzvot with joy and intention! 💫🙏
+            else:
+                message += """Fulfill these mitzvot with joy and intention! 💫🙏
 
 _—Daily Mitzvah Bot_"""
-            else:
-                # Single mitzvah
-                formatted_mitzvah_num = self.format_mitzvah_number(mitzvah_nums)
-                mitzvah_text = f"*{formatted_mitzvah_num}*"
-                # Build header with holiday context
-                header = f"✡️ *Sefer HaMitzvos Daily Study* 📚\n\n📅 {date_formatted}"
+        else:
+            # Single mitzvah
+            entry = entries[0]
+            mitzvah_text = f"*{entry.ref.display}*"
+            # Build header with holiday context
+            header = f"✡️ *Sefer HaMitzvos Daily Study* 📚\n\n📅 {date_formatted}"
 
-                if is_consolidated:
-                    header += f"\n🎊 *Special Holiday Schedule* - {consolidation_reason}"
+            if is_consolidated:
+                header += f"\n🎊 *Special Holiday Schedule* - {consolidation_reason}"
 
-                # Add Sefaria link for single mitzvah
-                sefaria_text = ""
-                if sefaria_links and sefaria_links[0]:
-                    sefaria_text = f"\n🕍 Learn more: {sefaria_links[0]}"
+            # Add Sefaria link for single mitzvah
+            sefaria_text = ""
+            if entry.sefaria_link:
+                sefaria_text = f"\n🕍 Learn more: {entry.sefaria_link}"
 
-                # Add biblical source for single mitzvah
-                biblical_text = ""
-                # Include biblical source for single mitzvah when available
-                if biblical_sources and biblical_sources[0] and biblical_sources[0] != 'N/A':
-                    biblical_text = f"\n📜 Biblical Source: {biblical_sources[0]}"
+            # Include biblical source for single mitzvah when available
+            biblical_text = ""
+            if entry.biblical_source and entry.biblical_source != 'N/A':
+                biblical_text = f"\n📜 Biblical Source: {entry.biblical_source}"
 
-                message = f"""{header}
+            message = f"""{header}
 
 🔢 {mitzvah_text}
-_{mitzvah_data['title']}_
+_{entry.summary}_
 
-📚 Source: {mitzvah_data['source']}{biblical_text}{sefaria_text}
+📚 Source: {entry.ref.source}{biblical_text}{sefaria_text}
 
 Fulfill this mitzvah with joy and intention! 💫🙏
 
@@ -799,109 +1068,317 @@ _—Daily Mitzvah Bot_"""
         message += "\n\nReply STOP to unsubscribe."
         return message
 
-    def send_to_recipient(self, recipient, message, mitzvah_data=None):
-        """Send message to a single recipient, using WhatsApp template if available."""
-        try:
-            logger.info(f"Sending message to {recipient}")
-
-            # Check for WhatsApp template configuration
-            template_sid = os.environ.get('WHATSAPP_TEMPLATE_SID')
-            use_template = os.environ.get('USE_WHATSAPP_TEMPLATE', 'false').lower() == 'true'
-
-            # Force WhatsApp format for all messages
-            whatsapp_recipient = recipient if recipient.startswith('whatsapp:') else f'whatsapp:{recipient}'
-            whatsapp_sender = f'whatsapp:{self.whatsapp_number}'
-
-            # Check for WhatsApp Business Template (optional advanced feature)
-            template_sid = os.environ.get('WHATSAPP_TEMPLATE_SID')
-            use_template = os.environ.get('USE_WHATSAPP_TEMPLATE', 'false').lower() == 'true'
+    def build_template_variables(self, mitzvah_data):
+        """Build the WhatsApp Business template content variables for a DeliveryDay."""
+        date_formatted = datetime.strptime(mitzvah_data.date, '%Y-%m-%d').strftime('%B %d, %Y') if mitzvah_data.date else 'Today'
+        description = self.convert_html_to_whatsapp_markup(mitzvah_data.title)
+        sources_text = ', '.join(e.biblical_source for e in mitzvah_data.entries if e.biblical_source and e.biblical_source != 'N/A')
+        links_text = ', '.join(e.sefaria_link for e in mitzvah_data.entries if e.sefaria_link)
 
-            if template_sid and use_template and mitzvah_data:
-                # Use WhatsApp Business Message Template
-                logger.info(f"Using WhatsApp template: {template_sid}")
-
-                # Extract template variables from mitzvah data
-                date_formatted = datetime.strptime(mitzvah_data.get('date', ''), '%Y-%m-%d').strftime('%B %d, %Y') if mitzvah_data.get('date') else 'Today'
-                mitzvah_nums = mitzvah_data.get('mitzvos', '')
-                description = self.convert_html_to_whatsapp_markup(mitzvah_data.get('title', ''))
-
-                # Handle biblical sources
-                biblical_sources = mitzvah_data.get('biblical_sources', [])
-                if isinstance(biblical_sources, list):
-                    sources_text = ', '.join([s for s in biblical_sources if s and s != 'N/A'])
-                else:
-                    sources_text = str(biblical_sources) if biblical_sources else ''
-
-                # Handle Sefaria links
-                sefaria_links = mitzvah_data.get('sefaria_link', [])
-                if isinstance(sefaria_links, list):
-                    links_text = ', '.join([l for l in sefaria_links if l])
-                else:
-                    links_text = str(sefaria_links) if sefaria_links else ''
-
-                message_obj = self.client.messages.create(
-                    content_sid=template_sid,
-                    content_variables=json.dumps({
-                        "1": date_formatted,
-                        "2": mitzvah_nums,
-                        "3": description,
-                        "4": sources_text or 'Traditional Sources',
-                        "5": links_text or 'Available on Sefaria'
-                    }),
-                    from_=whatsapp_sender,
-                    to=whatsapp_recipient
-                )
-                logger.info(f"WhatsApp template message sent to {whatsapp_recipient}")
-            else:
-                # Standard WhatsApp message (this will always be used unless template is configured)
-                logger.info(f"Sending WhatsApp message from {whatsapp_sender} to {whatsapp_recipient}")
-                message_obj = self.client.messages.create(
-                    body=message,
-                    from_=whatsapp_sender,
-                    to=whatsapp_recipient
-                )
-                logger.info(f"WhatsApp message sent to {whatsapp_recipient}")
-
-            logger.info(f"Message sent successfully to {recipient}. SID: {message_obj.sid}")
-            return True
+        return {
+            "1": date_formatted,
+            "2": mitzvah_data.labels,
+            "3": description,
+            "4": sources_text or 'Traditional Sources',
+            "5": links_text or 'Available on Sefaria'
+        }
 
-        except Exception as e:
-            logger.error(f"Failed to send message to {recipient}: {e}")
-            return False
+    @property
+    def message_cache(self):
+        """Pre-rendered messages, loaded on first use (see scripts/render_messages.py)."""
+        if self._message_cache is None:
+            self._message_cache = message_cache.MessageCache.load(
+                os.environ.get('MESSAGE_CACHE', message_cache.MESSAGE_CACHE_PATH),
+                message_cache.renderer_fingerprint(*RENDERING_MODULES)
+            )
+            logger.info(f"Loaded {len(self._message_cache)} pre-rendered messages")
+        return self._message_cache
+
+    def render_delivery(self, target_date, mitzvah_data):
+        """
+        Return (message body, template variables) for a delivery date, from the
+        pre-rendered message cache when it is fresh, otherwise rendered now.
+        """
+        digest = message_cache.source_hash(mitzvah_data.to_dict())
+        cached = self.message_cache.get(target_date, digest)
+        if cached:
+            logger.info(f"Using pre-rendered message for {target_date}")
+            return cached
+
+        logger.info(f"No fresh pre-rendered message for {target_date}; rendering")
+        message = self.format_message(mitzvah_data)
+        variables = self.build_template_variables(mitzvah_data)
+        self.message_cache.put(target_date, digest, message, variables)
+        return message, variables
+
+    def render_all(self):
+        """Render every planned delivery date into the message cache; returns the number rendered."""
+        rendered = 0
+        for delivery_date in self.delivery_calendar:
+            mitzvah_data = self.get_consolidated_mitzvot(delivery_date)
+            if not mitzvah_data:
+                continue
+            digest = message_cache.source_hash(mitzvah_data.to_dict())
+            if self.message_cache.get(delivery_date, digest) is None:
+                self.message_cache.put(delivery_date, digest, self.format_message(mitzvah_data),
+                                       self.build_template_variables(mitzvah_data))
+                rendered += 1
+        return rendered
+
+    def prepare_delivery(self, target_date, message, mitzvah_data=None, template_variables=None):
+        """
+        Build the PreparedDelivery for a day's send, once per run: a WhatsApp
+        template send if configured, otherwise the formatted message body.
+        """
+        # Check for WhatsApp Business Template (optional advanced feature)
+        template_sid = os.environ.get('WHATSAPP_TEMPLATE_SID')
+        use_template = os.environ.get('USE_WHATSAPP_TEMPLATE', 'false').lower() == 'true'
+        # Delivery status callbacks feed the per-day metrics (bots/status_callback.py)
+        status_callback_base = os.environ.get('STATUS_CALLBACK_URL') or None
+
+        if template_sid and use_template and mitzvah_data:
+            # Use WhatsApp Business Message Template
+            if template_variables is None:
+                template_variables = self.build_template_variables(mitzvah_data)
+            return PreparedDelivery.for_day(target_date, self.whatsapp_number, message, template_variables,
+                                            template_sid=template_sid, status_callback_base=status_callback_base)
+
+        # Standard WhatsApp message (this will always be used unless template is configured)
+        return PreparedDelivery.for_day(target_date, self.whatsapp_number, message,
+                                        status_callback_base=status_callback_base)
+
+    def dry_run(self, start_date, end_date=None, recipients=dry_run.DEFAULT_RECIPIENTS,
+                output=dry_run.DEFAULT_OUTPUT, fresh=False):
+        """
+        Render, build and validate every payload for a date range and synthetic
+        recipients without sending anything (see bots/dry_run.py).
+        """
+        logger.info(f"🧪 Dry run {start_date}..{end_date or start_date} for {recipients} recipients")
+        report = dry_run.run(self, start_date, end_date, recipients, output=output, fresh=fresh)
+        logger.info(f"Dry run: {report.payloads} payloads for {report.rendered} days, {report.invalid} problems, "
+                    f"{report.elapsed:.3f} s")
+        return report
+
+    def concurrency_controller(self):
+        """A fresh AIMD controller for one run (SEND_ADAPTIVE_CONCURRENCY=true)."""
+        return adaptive_concurrency.AIMDController(
+            initial=self.send_concurrency,
+            maximum=self.send_max_concurrency,
+            latency_target=self.send_latency_target,
+        )
+
+    def _advance_cursor(self, cursor, recipients, position, batch_results):
+        """
+        Save progress after a batch. A pass that reaches the end of the list
+        with failures starts over instead of finishing: the next run walks the
+        list again and the ledger limits it to recipients still without the message.
+        Permanent failures do not count; they are left to the dead-letter replay.
+        """
+        cursor.total = len(recipients)
+        cursor.failed += sum(1 for r in batch_results
+                             if not r.ok and r.error != fanout.IN_FLIGHT and r.category != send_failures.PERMANENT)
+        if position >= len(recipients) and cursor.failed:
+            logger.warning(f"{cursor.failed} sends failed for {cursor.date}; the next run retries them")
+            cursor.index, cursor.last_recipient, cursor.failed = 0, None, 0
+        else:
+            cursor.index = position
+            cursor.last_recipient = recipients[position - 1] if position else None
+            cursor.done = position >= len(recipients)
+        self.cursor_store.save(cursor)
 
-    def send_daily_mitzvah(self, target_date=None):
-        """Send today's mitzvah to all recipients."""
+    def _finish_streamed_pass(self, cursor, total, results, complete):
+        """
+        Cursor bookkeeping for a streamed run, which has no stable position:
+        the date is done once a pass has streamed every recipient without
+        retryable failures. Otherwise the next run streams the list again and
+        the delivery ledger skips everyone already sent to.
+        """
+        failed = sum(1 for r in results
+                     if not r.ok and r.error != fanout.IN_FLIGHT and r.category != send_failures.PERMANENT)
+        if complete and failed:
+            logger.warning(f"{failed} sends failed for {cursor.date}; the next run retries them")
+        cursor.total = total
+        cursor.index, cursor.last_recipient, cursor.failed = 0, None, 0
+        cursor.done = complete and not failed
+        self.cursor_store.save(cursor)
+
+    def send_daily_mitzvah(self, target_date=None, recipients=None, deadline=None, restart=False,
+                           use_ledger=False, limiter=None, replay=False):
+        """
+        Send today's mitzvah to all recipients (or the given recipient list).
+        Full-list runs, and given lists with use_ledger=True (shard workers,
+        dead-letter replays), skip recipients the delivery ledger already has
+        for the date, record what they send and dead-letter permanent failures;
+        recipients already dead-lettered are left to the replay (replay=True sends
+        to them). limiter overrides the bot's rate limiter for this run. A circuit
+        breaker aborts the run on systemic failures (e.g. bad credentials). With
+        SEND_ADAPTIVE_CONCURRENCY the run's concurrency follows an AIMD controller
+        and the report carries its rate curve.
+
+        Recipients are sent in batches. With a deadline (time.monotonic() value),
+        the run stops before a batch that would not finish in time, and the
+        async transport cancels sends still outstanding at the deadline. A run
+        over the full recipient list is resumable: progress is saved to the
+        send cursor after every batch, a later run for the same date continues
+        from it, and a completed date is not sent again (restart=True clears it).
+        Returns a fanout.DeliveryReport (truthy on success; .partial if stopped early).
+        """
         try:
             logger.info("Starting send_daily_mitzvah...")
 
+            # Nothing is scheduled for delivery on Yom Tov; that is not a failure
+            if target_date is None:
+                target_date = datetime.now().strftime('%Y-%m-%d')
+            if self.delivery_calendar.is_no_send_day(target_date):
+                holiday = self.is_yom_tov(target_date)[1]
+                logger.info(f"{target_date} is {holiday}; no delivery scheduled")
+                return fanout.DeliveryReport(target_date, skipped=holiday)
+
             # Load today's mitzvah
             mitzvah_data = self.load_mitzvah_for_date(target_date)
 
             if not mitzvah_data:
                 date_str = target_date or "today"
                 logger.warning(f"No mitzvah found for {date_str}")
-                return False
-
-            # Format message
-            message = self.format_message(mitzvah_data)
-            logger.info(f"Formatted message for: {mitzvah_data['mitzvos']} - {mitzvah_data['title']}")
-
-            # Send to all recipients
-            success_count = 0
-            for i, recipient in enumerate(self.recipients):
-                logger.info(f"Sending to recipient {i+1}/{len(self.recipients)}: {recipient}")
-
-                if self.send_to_recipient(recipient, message, mitzvah_data):
-                    success_count += 1
+                return fanout.DeliveryReport(target_date, error=f"No mitzvah found for {date_str}")
+
+            # Pre-rendered message (or format it now if the cache is missing/stale)
+            message, template_variables = self.render_delivery(target_date, mitzvah_data)
+            logger.info(f"Formatted message for: {mitzvah_data.labels} - {mitzvah_data.title}")
+            # Everything but the 'To' address is built once for the whole run
+            prepared = self.prepare_delivery(target_date, message, mitzvah_data, template_variables)
+            logger.info(f"Prepared {prepared!r} from {prepared.sender}")
+
+            # Runs over the full recipient list are tracked by the send cursor; those
+            # and use_ledger runs also go through the delivery ledger and dead letters
+            cursor = None
+            stream = None
+            delivered = set()
+            dead = set()
+            if recipients is None:
+                if restart:
+                    self.cursor_store.clear(target_date)
+                cursor = self.cursor_store.load(target_date) or send_cursor.SendCursor(target_date)
+                if cursor.done:
+                    logger.info(f"{target_date} was already delivered to {cursor.total} recipients; skipping")
+                    return fanout.DeliveryReport(target_date, skipped='already delivered')
+                cursor.invocations += 1
+                delivered = self.ledger.delivered(target_date)
+                if self.stream_recipients:
+                    stream = self.open_recipient_stream()
                 else:
-                    logger.error(f"Failed to send to {recipient}")
-
-            logger.info(f"Daily mitzvah sent to {success_count}/{len(self.recipients)} recipients")
-            return success_count > 0
+                    recipients = self.recipients
+            elif use_ledger:
+                delivered = self.ledger.delivered(target_date, recipients)
+            if delivered:
+                logger.info(f"{len(delivered)} recipients already have the {target_date} message")
+            if (cursor or use_ledger) and not replay:
+                dead = set(self.dead_letters.pending(target_date)) - delivered
+                if dead:
+                    logger.info(f"{len(dead)} dead-lettered recipients are left to the replay")
+            skip = delivered | dead if dead else delivered
+
+            start_index = cursor.resume_index(recipients) if cursor and not stream else 0
+            if start_index:
+                logger.info(f"Resuming {target_date} from recipient {start_index + 1}/{len(recipients)}")
+
+            # Send to recipients concurrently, batch by batch
+            if limiter is None:
+                limiter = self.rate_limiter
+            controller = self.concurrency_controller() if self.adaptive_concurrency else None
+            in_flight = (f"adaptive {controller.concurrency}-{controller.maximum}" if controller
+                         else self.transport.concurrency)
+            audience = repr(stream) if stream else f"{len(recipients) - start_index} recipients"
+            logger.info(f"Sending to {audience} via {self.send_transport} transport "
+                        f"({in_flight} in flight, {limiter.rate:g}/s limit)")
+            start = time.perf_counter()
+            breaker = send_failures.CircuitBreaker()
+            results = []
+            already_delivered = 0
+            position = start_index
+            slowest_batch = 0.0
+            stopped = False
+            accepted = 0
+            # Streamed runs take each batch as soon as the scan has produced it
+            if stream:
+                batches = stream.batches(self.send_batch_size)
+            else:
+                batches = (recipients[i:i + self.send_batch_size]
+                           for i in range(start_index, len(recipients), self.send_batch_size))
+            try:
+                for batch in batches:
+                    if deadline is not None and time.monotonic() + slowest_batch > deadline:
+                        logger.warning(f"Time budget nearly spent; stopping at recipient {position + 1}"
+                                       + (f"/{len(recipients)}" if recipients is not None else ""))
+                        stopped = True
+                        break
+                    batch_start = time.monotonic()
+                    pending = [r for r in batch if r not in skip]
+                    already_delivered += len(batch) - len(pending) - (sum(1 for r in batch if r in dead) if dead else 0)
+                    batch_results = self.transport.send_batch(pending, prepared, deadline=deadline, limiter=limiter,
+                                                              breaker=breaker, controller=controller)
+                    # Sends cut off (time budget, circuit breaker) before they went out are left for the next run
+                    done = next((i for i, r in enumerate(batch_results) if r.error in fanout.UNSENT),
+                                len(batch_results))
+                    if stream:
+                        # Memory stays bounded by the batch: successes are only counted
+                        accepted += sum(1 for r in batch_results[:done] if r.ok)
+                        results.extend(r for r in batch_results[:done] if not r.ok)
+                    else:
+                        results.extend(batch_results[:done])
+                    position += batch.index(pending[done]) if done < len(pending) else len(batch)
+                    slowest_batch = max(slowest_batch, time.monotonic() - batch_start)
+                    if cursor or use_ledger:
+                        # The whole batch: a thread may have sent past the first cut-off send
+                        self.ledger.record(target_date, batch_results)
+                        self.dead_letters.record(target_date, batch_results[:done])
+                    if cursor and not stream:
+                        self._advance_cursor(cursor, recipients, position, batch_results[:done])
+                    if done < len(batch_results):
+                        stopped = True
+                        break
+            finally:
+                if stream:
+                    stream.close()
+            total = len(recipients) if recipients is not None else stream.received
+            if stream:
+                self._finish_streamed_pass(cursor, total, results, complete=not stopped)
+
+            report = fanout.DeliveryReport(target_date, results, elapsed=time.perf_counter() - start,
+                                           start_index=start_index, next_index=position, total=total,
+                                           already_delivered=already_delivered, aborted=breaker.reason,
+                                           concurrency=controller.summary() if controller else None,
+                                           accepted=accepted)
+
+            logger.info(f"Daily mitzvah sent to {report.sent}/{report.attempted} recipients "
+                        f"in {report.elapsed:.2f}s"
+                        + (f"; {report.total - report.next_index} left for the next invocation"
+                           if report.partial else "")
+                        + (f"; aborted by the circuit breaker at recipient {position + 1}" if breaker.open else ""))
+            return report
 
         except Exception as e:
             logger.error(f"Failed to send daily mitzvah: {e}")
-            return False
+            return fanout.DeliveryReport(target_date, error=str(e))
+
+    def replay_dead_letters(self, target_date, deadline=None):
+        """
+        Resend target_date's message to that date's dead-lettered recipients
+        only (skipping any the ledger has recorded since). Records now
+        delivered are resolved; the rest keep their latest failure reason.
+        Returns the replay's fanout.DeliveryReport.
+        """
+        letters = self.dead_letters.pending(target_date)
+        if not letters:
+            logger.info(f"No dead letters for {target_date}")
+            return fanout.DeliveryReport(target_date, skipped='no dead letters')
+        logger.info(f"Replaying {len(letters)} dead letters for {target_date}")
+        report = self.send_daily_mitzvah(target_date, recipients=sorted(letters), deadline=deadline,
+                                         use_ledger=True, replay=True)
+        resolved = self.ledger.delivered(target_date, letters)
+        self.dead_letters.resolve(target_date, resolved)
+        logger.info(f"Resolved {len(resolved)}/{len(letters)} dead letters for {target_date}")
+        return report
 
 # For local testing (not used in Lambda)
 if __name__ == "__main__":
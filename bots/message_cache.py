@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Pre-rendered message cache for the Daily Mitzvah Bot
+
+scripts/render_messages.py renders the final WhatsApp body and the template
+content variables for every delivery date ahead of time. The send path reads
+them from this cache instead of formatting on every run.
+
+Each cached message is keyed by delivery date and by a hash of the planned
+mitzvah data it was rendered from, and the whole cache is tied to a
+fingerprint of the rendering code. Either changing (a CSV edit, a holiday
+change, a formatting change) makes the affected entries stale, and the bot
+re-renders them on the fly.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger()
+
+MESSAGE_CACHE_PATH = 'Schedule_Complete_Sefer_HaMitzvos_WithBiblical.messages.json'
+CACHE_FORMAT_VERSION = 1
+
+
+def source_hash(mitzvah_data):
+    """Hash of the planned mitzvah data (schedule rows + consolidation) for one delivery date."""
+    payload = json.dumps(mitzvah_data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def renderer_fingerprint(*module_paths):
+    """Hash of the module sources that render messages; any formatting change invalidates the cache."""
+    digest = hashlib.sha256()
+    for path in module_paths:
+        with open(path, 'rb') as fh:
+            source = fh.read()
+        # Length-prefixed, so moving code between modules still changes the hash
+        digest.update(f"{os.path.basename(path)}:{len(source)}\n".encode('utf-8'))
+        digest.update(source)
+    return digest.hexdigest()
+
+
+class MessageCache:
+    """delivery date -> (source hash, body, template variables)."""
+
+    def __init__(self, fingerprint, entries=None):
+        self.fingerprint = fingerprint
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Load a cache file; returns an empty cache if missing, unreadable or rendered by other code."""
+        if not path or not os.path.exists(path):
+            return cls(fingerprint)
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring message cache {path}: {e}")
+            return cls(fingerprint)
+        if data.get('version') != CACHE_FORMAT_VERSION or data.get('fingerprint') != fingerprint:
+            logger.info(f"Message cache {path} was rendered by different code; ignoring it")
+            return cls(fingerprint)
+        return cls(fingerprint, data.get('entries', {}))
+
+    def get(self, delivery_date, digest):
+        """Return (body, template_variables) if a fresh entry exists, else None."""
+        entry = self.entries.get(delivery_date)
+        if not entry or entry['hash'] != digest:
+            return None
+        return entry['body'], entry['variables']
+
+    def put(self, delivery_date, digest, body, variables):
+        self.entries[delivery_date] = {'hash': digest, 'body': body, 'variables': variables}
+
+    def stale_dates(self, digests):
+        """Given {delivery date: current source hash}, return dates that are missing or stale."""
+        return sorted(d for d, digest in digests.items() if self.get(d, digest) is None)
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({
+                'version': CACHE_FORMAT_VERSION,
+                'fingerprint': self.fingerprint,
+                'entries': dict(sorted(self.entries.items())),
+            }, fh, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Per-day send payload shared by every recipient
+
+Everything in a Twilio message request except the 'To' address is the same
+for all recipients of a day's send: the sender, the body (or the WhatsApp
+template SID and its JSON-encoded variables), the status callback URL
+tagged with the delivery date and, for the async transport, the URL-encoded
+form. PreparedDelivery computes those once per run, so the
+per-recipient work is formatting one address.
+"""
+
+import json
+from urllib.parse import quote_plus, urlencode
+
+# client.messages.create keyword -> Twilio Messages form field
+FORM_FIELDS = {
+    'to': 'To',
+    'from_': 'From',
+    'body': 'Body',
+    'content_sid': 'ContentSid',
+    'content_variables': 'ContentVariables',
+    'status_callback': 'StatusCallback',
+}
+
+
+def whatsapp_address(number):
+    return number if number.startswith('whatsapp:') else f'whatsapp:{number}'
+
+
+def status_callback_url(base_url, date):
+    """STATUS_CALLBACK_URL with the delivery date, so status callbacks are counted per day."""
+    return f"{base_url}{'&' if '?' in base_url else '?'}{urlencode({'date': date})}"
+
+
+class PreparedDelivery:
+    """The recipient-independent part of a day's message request."""
+
+    __slots__ = ('date', 'sender', 'body', 'content_sid', 'content_variables', 'status_callback', '_params',
+                 '_form_tail')
+
+    def __init__(self, date, sender, body=None, content_sid=None, content_variables=None, status_callback=None):
+        self.date = date
+        self.sender = whatsapp_address(sender)
+        self.body = body
+        self.content_sid = content_sid
+        self.content_variables = content_variables
+        self.status_callback = status_callback
+        self._params = {k: v for k, v in (('from_', self.sender), ('body', body), ('content_sid', content_sid),
+                                          ('content_variables', content_variables),
+                                          ('status_callback', status_callback)) if v is not None}
+        self._form_tail = ('&' + urlencode({FORM_FIELDS[k]: v for k, v in self._params.items()})).encode()
+
+    @classmethod
+    def for_day(cls, date, sender, message, template_variables=None, template_sid=None, status_callback_base=None):
+        """
+        A WhatsApp template send when template_sid is given, otherwise a
+        freeform body; with status_callback_base, Twilio reports each
+        message's status there (see bots/status_callback.py).
+        """
+        status_callback = status_callback_url(status_callback_base, date) if status_callback_base else None
+        if template_sid:
+            return cls(date, sender, content_sid=template_sid, content_variables=json.dumps(template_variables),
+                       status_callback=status_callback)
+        return cls(date, sender, body=message, status_callback=status_callback)
+
+    @property
+    def uses_template(self):
+        return self.content_sid is not None
+
+    def params(self, recipient):
+        """client.messages.create keywords for one recipient."""
+        params = dict(self._params)
+        params['to'] = whatsapp_address(recipient)
+        return params
+
+    def record(self, recipient):
+        """JSON-ready message request for one recipient ({date, to, from, body | content_sid, ...})."""
+        params = self.params(recipient)
+        return {'date': self.date, 'to': params.pop('to'), 'from': params.pop('from_'), **params}
+
+    def form(self, recipient):
+        """URL-encoded Messages form (bytes) for one recipient."""
+        return b'To=' + quote_plus(whatsapp_address(recipient)).encode() + self._form_tail
+
+    def __repr__(self):
+        kind = f"template {self.content_sid}" if self.uses_template else f"{len(self.body or '')}-char body"
+        return f"PreparedDelivery({self.date!r}, {kind})"
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Versioned snapshot of the active recipients
+
+Only a handful of consents change on a given day, yet every run used to
+query the whole active-subscribers index. With a change log configured
+(bots/subscriber_changes.py) the bot instead keeps the active numbers in a
+local snapshot file (RECIPIENT_SNAPSHOT_FILE, /tmp by default), tagged with
+the change version it reflects, and each refresh applies only the changes
+after that version.
+
+The snapshot is compact: E.164 numbers are packed as unsigned 64-bit
+integers in one array, kept in phone (string) order so the recipient list
+comes out in the same order as the index query. Numbers that do not pack
+(no leading '+', over 15 digits) are kept as strings alongside.
+
+Fallbacks:
+- no snapshot, an unreadable one, or one older than the maximum age: rebuild
+  from the index (a full load);
+- a gap in the change versions that an in-flight write cannot explain (an
+  entry expired or was never written): rebuild;
+- the index a rebuild loads is eventually consistent, so the changes
+  recorded in the last GAP_GRACE_SECONDS are applied again on top of it;
+- the change log is slow or unavailable: keep the last good snapshot if the
+  refresh does not finish within the latency budget.
+"""
+
+import bisect
+import heapq
+import json
+import logging
+import os
+import re
+import sys
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger()
+
+DEFAULT_SNAPSHOT_FILE = '/tmp/mitzvah_recipients.snapshot'
+DEFAULT_REFRESH_BUDGET_SECONDS = 1.5
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+GAP_GRACE_SECONDS = 60  # a missing version younger than this may still be in flight
+
+MAGIC = b'MZRS1\n'
+_PACKABLE = re.compile(r'\+[1-9]\d{0,14}\Z')  # fits in an unsigned 64-bit integer
+
+
+def _unpack(number):
+    return f"+{number}"
+
+
+class RecipientSnapshot:
+    """Active recipient numbers as of change `version`: packed E.164 numbers plus unpackable extras."""
+
+    def __init__(self, version, numbers=(), extras=(), created_at=None):
+        self.version = version
+        self.numbers = array('Q', numbers)
+        self.extras = list(extras)
+        self.created_at = time.time() if created_at is None else created_at
+
+    @classmethod
+    def from_phones(cls, phones, version):
+        phones = sorted(set(phones))
+        return cls(version,
+                   (int(p[1:]) for p in phones if _PACKABLE.match(p)),
+                   (p for p in phones if not _PACKABLE.match(p)))
+
+    def _find(self, phone):
+        """(container, position, present) of phone in its sorted container."""
+        if _PACKABLE.match(phone):
+            container, value = self.numbers, int(phone[1:])
+            position = bisect.bisect_left(container, phone, key=_unpack)
+        else:
+            container, value = self.extras, phone
+            position = bisect.bisect_left(container, phone)
+        return container, position, position < len(container) and container[position] == value
+
+    def add(self, phone):
+        container, position, present = self._find(phone)
+        if not present:
+            container.insert(position, int(phone[1:]) if container is self.numbers else phone)
+        return not present
+
+    def discard(self, phone):
+        container, position, present = self._find(phone)
+        if present:
+            container.pop(position)
+        return present
+
+    def apply(self, changes):
+        """Apply changes in version order; returns how many changed the recipient set."""
+        changed = 0
+        for change in sorted(changes, key=lambda c: c.version):
+            changed += self.add(change.phone) if change.active else self.discard(change.phone)
+            self.version = max(self.version, change.version)
+        return changed
+
+    def phones(self):
+        packed = [_unpack(n) for n in self.numbers]
+        return list(heapq.merge(packed, self.extras)) if self.extras else packed
+
+    def __len__(self):
+        return len(self.numbers) + len(self.extras)
+
+    def save(self, path):
+        header = {
+            'version': self.version,
+            'count': len(self.numbers),
+            'extras': self.extras,
+            'created_at': self.created_at,
+            'byteorder': sys.byteorder,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(MAGIC)
+            fh.write(json.dumps(header).encode('utf-8') + b'\n')
+            fh.write(self.numbers.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """The snapshot saved at path, or None if there is none or it is unreadable."""
+        try:
+            with open(path, 'rb') as fh:
+                data = fh.read()
+            if not data.startswith(MAGIC):
+                raise ValueError("not a recipient snapshot")
+            header_end = data.index(b'\n', len(MAGIC))
+            header = json.loads(data[len(MAGIC):header_end])
+            numbers = array('Q')
+            numbers.frombytes(data[header_end + 1:])
+            if header['byteorder'] != sys.byteorder:
+                numbers.byteswap()
+            if len(numbers) != header['count']:
+                raise ValueError(f"{len(numbers)} numbers, header says {header['count']}")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable recipient snapshot {path}: {e}")
+            return None
+        snapshot = cls(header['version'], extras=header['extras'], created_at=header['created_at'])
+        snapshot.numbers = numbers
+        return snapshot
+
+    def __repr__(self):
+        return f"RecipientSnapshot(version {self.version}, {len(self)} recipients)"
+
+
+def contiguous(changes, version, now=None, grace=GAP_GRACE_SECONDS):
+    """
+    The changes that follow `version` without a gap, and whether a gap was
+    found that is too old to be a write still in flight (the snapshot must
+    then be rebuilt). Changes after a young gap wait for the next refresh.
+    """
+    now = time.time() if now is None else now
+    applicable = []
+    expected = version + 1
+    for change in sorted(changes, key=lambda c: c.version):
+        if change.version < expected:
+            continue
+        if change.version != expected:
+            return applicable, now - change.changed_at > grace
+        applicable.append(change)
+        expected += 1
+    return applicable, False
+
+
+def _within(budget, fn, *args):
+    """fn(*args), or TimeoutError once `budget` seconds have passed (the call is left to finish alone)."""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshot-refresh')
+    try:
+        return executor.submit(fn, *args).result(timeout=budget)
+    finally:
+        executor.shutdown(wait=False)
+
+
+def rebuild(path, change_log, load_all):
+    """
+    A new snapshot of load_all() (an iterable of phones), saved to path.
+
+    The version is read before the load, so later changes are left to the
+    next refresh. The load may still miss a change up to that version that
+    the index has not caught up with, so every change up to it recorded from
+    GAP_GRACE_SECONDS before the rebuild is applied again on top.
+    """
+    started = time.time()
+    version = change_log.latest()
+    snapshot = RecipientSnapshot.from_phones(load_all(), version)
+    recent = [c for c in change_log.recorded_since(started - GAP_GRACE_SECONDS) if c.version <= version]
+    snapshot.apply(recent)
+    snapshot.save(path)
+    logger.info(f"Rebuilt {snapshot!r} from the subscriber index")
+    return snapshot
+
+
+def refresh(path, change_log, load_all, budget=DEFAULT_REFRESH_BUDGET_SECONDS, max_age=DEFAULT_MAX_AGE_SECONDS):
+    """
+    The current recipient snapshot and how it was obtained: 'delta' (changes
+    applied to the saved snapshot), 'full' (rebuilt from load_all) or
+    'stale' (the saved snapshot, because the refresh failed or ran over
+    budget). Raises only when there is no snapshot and the rebuild fails.
+    """
+    snapshot = RecipientSnapshot.load(path)
+    if snapshot is None:
+        return rebuild(path, change_log, load_all), 'full'
+    if time.time() - snapshot.created_at > max_age:
+        logger.info(f"{snapshot!r} is older than {max_age:g}s; rebuilding")
+        return _rebuild_or_keep(path, change_log, load_all, snapshot)
+
+    try:
+        changes = _within(budget, change_log.since, snapshot.version)
+    except Exception as e:
+        logger.warning(f"Change log unavailable ({e.__class__.__name__}: {e}); using {snapshot!r}")
+        return snapshot, 'stale'
+    applicable, lost = contiguous(changes, snapshot.version)
+    if lost:
+        logger.warning(f"Change log has a gap after version {snapshot.version + len(applicable)}; rebuilding")
+        return _rebuild_or_keep(path, change_log, load_all, snapshot)
+    if applicable:
+        changed = snapshot.apply(applicable)
+        snapshot.save(path)
+        logger.info(f"Applied {len(applicable)} changes ({changed} effective) to {snapshot!r}")
+    return snapshot, 'delta'
+
+
+def _rebuild_or_keep(path, change_log, load_all, snapshot):
+    try:
+        return rebuild(path, change_log, load_all), 'full'
+    except Exception as e:
+        logger.warning(f"Rebuilding the recipient snapshot failed ({e}); using {snapshot!r}")
+        return snapshot, 'stale'
+
+
+def snapshot_settings_from_env():
+    """(path, budget seconds, max age seconds) from RECIPIENT_SNAPSHOT_* env vars."""
+    return (
+        os.environ.get('RECIPIENT_SNAPSHOT_FILE', DEFAULT_SNAPSHOT_FILE),
+        float(os.environ.get('RECIPIENT_SNAPSHOT_BUDGET_MS') or DEFAULT_REFRESH_BUDGET_SECONDS * 1000) / 1000,
+        float(os.environ.get('RECIPIENT_SNAPSHOT_MAX_AGE_SECONDS') or DEFAULT_MAX_AGE_SECONDS),
+    )
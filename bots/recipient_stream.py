@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Streaming recipient source for the daily send
+
+Loading the recipient list first means every subscriber is read (and held
+in memory) before the first message goes out. With
+SUBSCRIBERS_SCAN_SEGMENTS=N the full-list run instead reads the sparse
+active-subscribers index (bots/subscriber_index.py) as a parallel Scan of N
+segments on a thread pool (subscriber_store.scan_active). Phone numbers flow through a bounded queue
+straight into the send batches, so the first batch leaves as soon as
+SEND_BATCH_SIZE numbers have arrived. Memory is bounded by the queue (plus
+one page per segment), not by the subscriber count.
+
+Each index entry is one subscriber record (keyed by phone), so segments
+never overlap and the stream holds no "seen" set. The order is
+whatever the segments return, so a streamed run is resumed through the
+delivery ledger (recipients who already have the day's message are
+skipped), not through the send cursor's position.
+"""
+
+import logging
+import queue
+import threading
+
+logger = logging.getLogger()
+
+DEFAULT_SEGMENTS = 4
+DEFAULT_QUEUE_SIZE = 2000
+PUT_TIMEOUT_SECONDS = 0.5  # producers re-check for close() this often while the queue is full
+
+_DONE = object()
+
+
+class RecipientStream:
+    """
+    Iterator over the phone numbers of a parallel Scan: `segments` threads
+    each page through segment i of the store's scan_active and put numbers on a queue
+    of at most `queue_size`. Iterating blocks until numbers arrive and
+    re-raises a segment's error at the end. close() stops the producers
+    (e.g. when the run stops early).
+    """
+
+    def __init__(self, store, segments=DEFAULT_SEGMENTS, queue_size=DEFAULT_QUEUE_SIZE, page_size=None):
+        self.store = store
+        self.segments = max(1, int(segments))
+        self.page_size = page_size
+        self.received = 0
+        self.pages = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = threading.Event()
+        self._threads = []
+        self._finished = 0
+
+    def start(self):
+        for segment in range(self.segments):
+            thread = threading.Thread(target=self._scan_segment, args=(segment,), daemon=True,
+                                      name=f"recipient-scan-{segment}")
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=PUT_TIMEOUT_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _scan_segment(self, segment):
+        try:
+            for page in self.store.scan_active(segment, self.segments, self.page_size):
+                self.pages += 1
+                for phone in page:
+                    if not self._put(phone):
+                        return
+                if self._closed.is_set():
+                    break
+        except Exception as e:
+            logger.error(f"Recipient scan segment {segment}/{self.segments} failed: {e}")
+            self.error = self.error or e
+        finally:
+            self._put(_DONE)
+
+    def __iter__(self):
+        while self._finished < self.segments:
+            item = self._queue.get()
+            if item is _DONE:
+                self._finished += 1
+                continue
+            self.received += 1
+            yield item
+        if self.error is not None:
+            raise self.error
+
+    def batches(self, size):
+        """Lists of up to `size` numbers, each yielded as soon as it is full (or the scan ends)."""
+        batch = []
+        for number in self:
+            batch.append(number)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @property
+    def exhausted(self):
+        return self._finished >= self.segments
+
+    def close(self):
+        """Stop the producers; numbers still queued are dropped."""
+        self._closed.set()
+        for thread in self._threads:
+            thread.join(timeout=PUT_TIMEOUT_SECONDS * 2)
+
+    def __repr__(self):
+        return f"RecipientStream({self.segments} segments, {self.received} received)"
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Compiled schedule artifact for the Daily Mitzvah Bot
+
+The CSV schedule is compiled once (scripts/compile_schedule.py) into a compact,
+versioned binary file that the Lambda memory-maps at startup instead of
+re-parsing the CSV on every cold start.
+
+Layout (little-endian):
+- Header: magic, format version, column count, first date ordinal, day count,
+  row count, string pool size, SHA-256 of the source CSV, SHA-256 of the payload
+- Column table: one (offset, length) pair per column name
+- Day table: one fixed-width (first_row, row_count) record per calendar day,
+  dense from the first to the last scheduled date (row_count 0 = no entry)
+- Row table: one (offset, length) pair per column for every CSV row
+- String pool: UTF-8 bytes referenced by the tables above
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from collections import defaultdict
+from datetime import date
+
+try:
+    from bots.schedule_model import DeliveryDay
+except ImportError:  # bots/ on sys.path
+    from schedule_model import DeliveryDay
+
+logger = logging.getLogger()
+
+MAGIC = b'SHMA'
+FORMAT_VERSION = 1
+
+# Columns carried into the artifact, in CSV header spelling
+SCHEDULE_COLUMNS = ('Mitzvah_Type_Number', 'Summary', 'Sefaria_Link', 'Biblical_Source')
+
+_HEADER = struct.Struct('<4sHHIIII32s32s')
+_DAY = struct.Struct('<IH')
+_REF = struct.Struct('<II')
+
+
+class StaleArtifactError(Exception):
+    """Raised when an artifact is corrupt, of an unknown version or out of date with its CSV."""
+
+
+def file_sha256(path):
+    """Return the SHA-256 digest of a file's bytes."""
+    with open(path, 'rb') as fh:
+        return hashlib.sha256(fh.read()).digest()
+
+
+def read_schedule_rows(csv_path):
+    """
+    Parse the schedule CSV into {date: [row, ...]} keeping only SCHEDULE_COLUMNS
+    """
+    import csv
+
+    daily_rows = defaultdict(list)
+    with open(csv_path, 'r', encoding='utf-8-sig') as file:  # Handle UTF-8 BOM
+        reader = csv.DictReader(file)
+        for row in reader:
+            # Handle UTF-8 BOM in Date column if present
+            date_key = 'Date' if 'Date' in row else list(row.keys())[0]  # First column should be Date
+            daily_rows[row[date_key].strip()].append({
+                column: row.get(column) or '' for column in SCHEDULE_COLUMNS
+            })
+    return daily_rows
+
+
+def compile_schedule(csv_path, artifact_path):
+    """
+    Compile the schedule CSV into a binary artifact. Returns a small stats dict.
+    """
+    daily_rows = read_schedule_rows(csv_path)
+    if not daily_rows:
+        raise ValueError(f"No schedule rows found in {csv_path}")
+
+    ordinals = {date.fromisoformat(d).toordinal(): d for d in daily_rows}
+    first_ordinal = min(ordinals)
+    n_days = max(ordinals) - first_ordinal + 1
+
+    pool = bytearray()
+    interned = {}
+
+    def intern(text):
+        if text not in interned:
+            encoded = text.encode('utf-8')
+            interned[text] = (len(pool), len(encoded))
+            pool.extend(encoded)
+        return interned[text]
+
+    column_table = b''.join(_REF.pack(*intern(c)) for c in SCHEDULE_COLUMNS)
+
+    day_table = bytearray()
+    row_table = bytearray()
+    n_rows = 0
+    for offset in range(n_days):
+        date_str = ordinals.get(first_ordinal + offset)
+        rows = daily_rows[date_str] if date_str else []
+        day_table += _DAY.pack(n_rows, len(rows))
+        for row in rows:
+            for column in SCHEDULE_COLUMNS:
+                row_table += _REF.pack(*intern(row[column]))
+        n_rows += len(rows)
+
+    payload = column_table + bytes(day_table) + bytes(row_table) + bytes(pool)
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(SCHEDULE_COLUMNS), first_ordinal, n_days, n_rows, len(pool),
+        file_sha256(csv_path), hashlib.sha256(payload).digest()
+    )
+
+    tmp_path = f"{artifact_path}.tmp"
+    with open(tmp_path, 'wb') as fh:
+        fh.write(header)
+        fh.write(payload)
+    os.replace(tmp_path, artifact_path)
+
+    return {
+        'days': len(daily_rows),
+        'rows': n_rows,
+        'span_days': n_days,
+        'bytes': len(header) + len(payload),
+    }
+
+
+class ScheduleArtifact:
+    """Read-only, memory-mapped view of a compiled schedule."""
+
+    def __init__(self, path, source_csv=None):
+        with open(path, 'rb') as fh:
+            self._buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._parse_header(source_csv)
+        except Exception:
+            self._buf.close()
+            raise
+        self._entries = {}
+
+    def _parse_header(self, source_csv):
+        buf = self._buf
+        if len(buf) < _HEADER.size:
+            raise StaleArtifactError("artifact truncated")
+        (magic, version, n_columns, self.first_ordinal, self.n_days, self.n_rows,
+         pool_size, self.source_sha256, payload_sha256) = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise StaleArtifactError(f"unsupported artifact {magic!r} v{version}")
+        if hashlib.sha256(buf[_HEADER.size:]).digest() != payload_sha256:
+            raise StaleArtifactError("artifact payload hash mismatch")
+        if source_csv and os.path.exists(source_csv) and file_sha256(source_csv) != self.source_sha256:
+            raise StaleArtifactError(f"artifact is stale relative to {source_csv}")
+
+        self._n_columns = n_columns
+        self._columns_at = _HEADER.size
+        self._days_at = self._columns_at + n_columns * _REF.size
+        self._rows_at = self._days_at + self.n_days * _DAY.size
+        self._pool_at = self._rows_at + self.n_rows * n_columns * _REF.size
+        if self._pool_at + pool_size != len(buf):
+            raise StaleArtifactError("artifact size does not match its header")
+        self.columns = tuple(self._string(self._columns_at + i * _REF.size) for i in range(n_columns))
+
+    def _string(self, ref_at):
+        offset, length = _REF.unpack_from(self._buf, ref_at)
+        start = self._pool_at + offset
+        return self._buf[start:start + length].decode('utf-8')
+
+    def _row(self, row_index):
+        base = self._rows_at + row_index * self._n_columns * _REF.size
+        return {
+            column: self._string(base + i * _REF.size)
+            for i, column in enumerate(self.columns)
+        }
+
+    def has_entry(self, ordinal):
+        """Return True if any rows are scheduled on a date ordinal, without decoding them."""
+        offset = ordinal - self.first_ordinal
+        if offset < 0 or offset >= self.n_days:
+            return False
+        return _DAY.unpack_from(self._buf, self._days_at + offset * _DAY.size)[1] > 0
+
+    def rows_for_ordinal(self, ordinal):
+        """Return the raw CSV rows scheduled on a date ordinal (empty list if none)."""
+        offset = ordinal - self.first_ordinal
+        if offset < 0 or offset >= self.n_days:
+            return []
+        first_row, row_count = _DAY.unpack_from(self._buf, self._days_at + offset * _DAY.size)
+        return [self._row(first_row + i) for i in range(row_count)]
+
+    def entry_for_date(self, date_str):
+        """Return the DeliveryDay scheduled on YYYY-MM-DD, or None."""
+        if date_str not in self._entries:
+            try:
+                ordinal = date.fromisoformat(date_str).toordinal()
+            except ValueError:
+                return None
+            rows = self.rows_for_ordinal(ordinal)
+            self._entries[date_str] = DeliveryDay.from_rows(date_str, rows) if rows else None
+        return self._entries[date_str]
+
+    def __iter__(self):
+        for offset in range(self.n_days):
+            date_str = date.fromordinal(self.first_ordinal + offset).isoformat()
+            entry = self.entry_for_date(date_str)
+            if entry:
+                yield entry
+
+    def __len__(self):
+        return sum(1 for offset in range(self.n_days) if self.has_entry(self.first_ordinal + offset))
+
+    def close(self):
+        self._buf.close()
+
+
+def open_artifact(path, source_csv=None):
+    """Open a compiled schedule, returning None if it is missing or stale."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return ScheduleArtifact(path, source_csv)
+    except (OSError, ValueError, struct.error, StaleArtifactError) as e:
+        logger.warning(f"Ignoring schedule artifact {path}: {e}")
+        return None
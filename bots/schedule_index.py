@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Date-ordinal schedule index for the Daily Mitzvah Bot
+
+Schedule entries are stored in a dense list spanning the first to the last
+scheduled day, so a lookup is a single subtraction and list access no matter
+how many schedules or cycles are loaded. Days without an entry hold None.
+"""
+
+from datetime import date
+
+_UNLOADED = object()
+
+
+def to_ordinal(day):
+    """Accept a date, a YYYY-MM-DD string or an ordinal and return the ordinal."""
+    if isinstance(day, int):
+        return day
+    if isinstance(day, str):
+        return date.fromisoformat(day.strip()).toordinal()
+    return day.toordinal()
+
+
+class ScheduleIndex:
+    """Constant-time schedule lookups keyed by date ordinal."""
+
+    def __init__(self, entries=()):
+        self.first_ordinal = None
+        self._slots = []
+        self._fetch = None
+        self._present = None
+        self.extend(entries)
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        """Index a compiled schedule without decoding it; slots fill on first access."""
+        index = cls()
+        index.first_ordinal = artifact.first_ordinal
+        index._slots = [_UNLOADED] * artifact.n_days
+        index._fetch = lambda ordinal: artifact.entry_for_date(date.fromordinal(ordinal).isoformat())
+        index._present = artifact.has_entry
+        return index
+
+    def extend(self, entries):
+        """
+        Add scheduled days (objects with a .date attribute). Additional schedules or
+        cycles may extend the covered range in either direction, but may not
+        redefine a date that is already scheduled.
+        """
+        for entry in entries:
+            ordinal = to_ordinal(entry.date)
+            self._ensure_range(ordinal)
+            offset = ordinal - self.first_ordinal
+            if self._load(offset) is not None:
+                raise ValueError(f"Duplicate schedule entry for {entry.date}")
+            self._slots[offset] = entry
+
+    def _ensure_range(self, ordinal):
+        if self.first_ordinal is None:
+            self.first_ordinal = ordinal
+            self._slots = [None]
+        elif ordinal < self.first_ordinal:
+            self._slots[:0] = [None] * (self.first_ordinal - ordinal)
+            self.first_ordinal = ordinal
+        elif ordinal >= self.first_ordinal + len(self._slots):
+            self._slots.extend([None] * (ordinal - self.first_ordinal - len(self._slots) + 1))
+
+    def _load(self, offset):
+        entry = self._slots[offset]
+        if entry is _UNLOADED:
+            entry = self._slots[offset] = self._fetch(self.first_ordinal + offset)
+        return entry
+
+    def get(self, day):
+        """Return the schedule entry for a date, or None."""
+        if self.first_ordinal is None:
+            return None
+        try:
+            offset = to_ordinal(day) - self.first_ordinal
+        except ValueError:
+            return None
+        if offset < 0 or offset >= len(self._slots):
+            return None
+        return self._load(offset)
+
+    def entries_between(self, start, end):
+        """Return scheduled entries from start to end (inclusive), in date order."""
+        if self.first_ordinal is None:
+            return []
+        lo = max(to_ordinal(start) - self.first_ordinal, 0)
+        hi = min(to_ordinal(end) - self.first_ordinal, len(self._slots) - 1)
+        entries = []
+        for offset in range(lo, hi + 1):
+            entry = self._load(offset)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def scheduled_ordinals(self):
+        """Yield the ordinal of every scheduled day, in order, without decoding entries."""
+        for offset, entry in enumerate(self._slots):
+            ordinal = self.first_ordinal + offset
+            if entry is _UNLOADED:
+                if self._present(ordinal):
+                    yield ordinal
+            elif entry is not None:
+                yield ordinal
+
+    @property
+    def last_ordinal(self):
+        if self.first_ordinal is None:
+            return None
+        return self.first_ordinal + len(self._slots) - 1
+
+    def __contains__(self, day):
+        return self.get(day) is not None
+
+    def __len__(self):
+        return sum(1 for _ in self.scheduled_ordinals())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Typed schedule model for the Daily Mitzvah Bot
+
+Each CSV row is parsed exactly once into a ScheduleEntry holding a MitzvahRef
+(kind + number); a DeliveryDay groups the entries sent together on one date.
+Message formatting reads these fields directly instead of joining per-day
+strings at load time and splitting them again on every send.
+"""
+
+import sys
+
+# Mitzvah_Type_Number prefix -> "Source" line shown in messages
+_SOURCES = {
+    'Intro': 'Sefer HaMitzvot Introduction',
+    'Positive': 'Sefer HaMitzvot Positive',
+    'Negative': 'Sefer HaMitzvot Negative',
+    'Conclusion': 'Sefer HaMitzvot Conclusion',
+}
+
+
+class MitzvahRef:
+    """A parsed Mitzvah_Type_Number such as 'Positive 39', 'Intro 3' or 'Counting'."""
+
+    __slots__ = ('kind', 'number')
+
+    def __init__(self, kind, number=None):
+        self.kind = sys.intern(kind)
+        self.number = number
+
+    @classmethod
+    def parse(cls, text):
+        label = (text or '').strip()
+        kind, _, rest = label.partition(' ')
+        if rest.isdigit() and f"{kind} {int(rest)}" == label:
+            return cls(kind, int(rest))
+        # Unnumbered ('Counting') or unrecognised shape: keep the whole label as the kind
+        return cls(label)
+
+    @property
+    def label(self):
+        """The original Mitzvah_Type_Number text."""
+        return f"{self.kind} {self.number}" if self.number is not None else self.kind
+
+    @property
+    def is_intro(self):
+        return self.kind == 'Intro'
+
+    @property
+    def source(self):
+        """Sefer HaMitzvot section this mitzvah belongs to."""
+        return _SOURCES.get(self.kind, 'Sefer HaMitzvot')
+
+    @property
+    def display(self):
+        """Display form, e.g. 'Positive 39' -> 'Positive Mitzvah 39'."""
+        if self.kind in ('Positive', 'Negative'):
+            return f"{self.kind} Mitzvah {self.number}"
+        if self.kind in ('Intro', 'Conclusion'):
+            return self.label
+        return f"Mitzvah {self.label}"
+
+    def __eq__(self, other):
+        return isinstance(other, MitzvahRef) and self.label == other.label
+
+    def __hash__(self):
+        return hash(self.label)
+
+    def __repr__(self):
+        return f"MitzvahRef({self.label!r})"
+
+
+class ScheduleEntry:
+    """One schedule CSV row."""
+
+    __slots__ = ('ref', 'summary', 'biblical_source', 'sefaria_link')
+
+    def __init__(self, ref, summary, biblical_source='', sefaria_link=''):
+        self.ref = ref
+        self.summary = summary
+        self.biblical_source = biblical_source
+        self.sefaria_link = sefaria_link
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            MitzvahRef.parse(row['Mitzvah_Type_Number']),
+            (row.get('Summary') or '').strip(),
+            (row.get('Biblical_Source') or '').strip(),
+            (row.get('Sefaria_Link') or '').strip(),
+        )
+
+    def to_dict(self):
+        return {
+            'mitzvah': self.ref.label,
+            'summary': self.summary,
+            'biblical_source': self.biblical_source,
+            'sefaria_link': self.sefaria_link,
+        }
+
+
+class DeliveryDay:
+    """
+    The entries delivered on one date. For a day planned by the delivery
+    calendar, entries may come from several scheduled dates and carry the
+    consolidation reason.
+    """
+
+    __slots__ = ('date', 'entries', 'reason')
+
+    def __init__(self, date, entries, reason=None):
+        self.date = date
+        self.entries = tuple(entries)
+        self.reason = reason
+
+    @classmethod
+    def from_rows(cls, date, rows):
+        return cls(date, (ScheduleEntry.from_row(row) for row in rows))
+
+    @classmethod
+    def combine(cls, date, days, reason=None):
+        """Merge several days' entries (in order) into one delivery."""
+        return cls(date, (entry for day in days for entry in day.entries), reason)
+
+    @property
+    def is_consolidated(self):
+        return self.reason is not None
+
+    @property
+    def labels(self):
+        """Comma-separated mitzvah labels, e.g. 'Positive 1, Positive 2'."""
+        return ', '.join(entry.ref.label for entry in self.entries)
+
+    @property
+    def title(self):
+        return ' & '.join(entry.summary for entry in self.entries)
+
+    @property
+    def source(self):
+        return ' & '.join(sorted({entry.ref.source for entry in self.entries}))
+
+    def to_dict(self):
+        """Plain-data form (used for hashing and JSON output)."""
+        return {
+            'date': self.date,
+            'entries': [entry.to_dict() for entry in self.entries],
+            'reason': self.reason,
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"DeliveryDay({self.date!r}, {self.labels!r}, reason={self.reason!r})"
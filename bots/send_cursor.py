@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Resumable send cursors for the Daily Mitzvah Bot
+
+A daily run that cannot reach every recipient before the Lambda timeout
+stops between batches and records how far it got: the delivery date, the
+index of the next recipient and the last recipient handled. The next
+invocation for that date (a self re-invoke, or a scheduler/Lambda retry)
+loads the cursor and continues from there; once every recipient has been
+handled the cursor is marked done, so a repeated run does not send again.
+
+Stores:
+- DynamoCursorStore: SEND_CURSOR_TABLE (one item per delivery date, expired
+  by DynamoDB TTL). Survives across containers; used in production.
+- FileCursorStore: a local JSON file (SEND_CURSOR_FILE), for tests and local
+  runs. On Lambda /tmp only survives within a warm container.
+"""
+
+import importlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+logger = logging.getLogger()
+
+DEFAULT_CURSOR_FILE = '/tmp/mitzvah_send_cursor.json'
+CURSOR_TTL_SECONDS = 7 * 24 * 3600
+
+
+class SendCursor:
+    """Progress of one delivery date's run over the recipient list."""
+
+    __slots__ = ('date', 'index', 'total', 'last_recipient', 'done', 'failed', 'invocations', 'updated_at')
+
+    def __init__(self, date, index=0, total=0, last_recipient=None, done=False, failed=0, invocations=0,
+                 updated_at=None):
+        self.date = date
+        self.index = index
+        self.total = total
+        self.last_recipient = last_recipient
+        self.done = done
+        self.failed = failed  # failed sends in the current pass over the list
+        self.invocations = invocations
+        self.updated_at = updated_at
+
+    def resume_index(self, recipients):
+        """
+        Index to continue from in the current recipient list. Anchored on the
+        last recipient handled, so subscribers added or removed earlier in the
+        (sorted) list since the cursor was saved do not shift the position.
+        """
+        index = min(self.index, len(recipients))
+        if self.last_recipient is None or index == 0:
+            return index
+        if recipients[index - 1] == self.last_recipient:
+            return index
+        try:
+            return recipients.index(self.last_recipient) + 1
+        except ValueError:
+            return index
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def __repr__(self):
+        state = 'done' if self.done else f"{self.index}/{self.total}"
+        return f"SendCursor({self.date!r}, {state})"
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FileCursorStore:
+    """Cursors in a local JSON file: {delivery date: cursor}."""
+
+    def __init__(self, path=DEFAULT_CURSOR_FILE):
+        self.path = path
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cursor file {self.path}: {e}")
+            return {}
+
+    def load(self, date):
+        data = self._read().get(date)
+        return SendCursor.from_dict(data) if data else None
+
+    def save(self, cursor):
+        cursor.updated_at = _now_iso()
+        data = self._read()
+        data[cursor.date] = cursor.to_dict()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def clear(self, date):
+        data = self._read()
+        if data.pop(date, None) is not None:
+            with open(self.path, 'w', encoding='utf-8') as fh:
+                json.dump(data, fh, indent=2, sort_keys=True)
+
+
+class DynamoCursorStore:
+    """Cursors in a DynamoDB table keyed by delivery_date (boto3 imported on first use)."""
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            boto3 = importlib.import_module('boto3')
+            self._table = boto3.resource('dynamodb').Table(self.table_name)
+        return self._table
+
+    def load(self, date):
+        item = self.table.get_item(Key={'delivery_date': date}, ConsistentRead=True).get('Item')
+        if not item:
+            return None
+        data = dict(item, date=item['delivery_date'])
+        # DynamoDB returns numbers as Decimal
+        for name in ('index', 'total', 'failed', 'invocations'):
+            if name in data:
+                data[name] = int(data[name])
+        return SendCursor.from_dict(data)
+
+    def save(self, cursor):
+        cursor.updated_at = _now_iso()
+        item = {k: v for k, v in cursor.to_dict().items() if k != 'date' and v is not None}
+        item['delivery_date'] = cursor.date
+        item['expires_at'] = int(time.time()) + CURSOR_TTL_SECONDS
+        self.table.put_item(Item=item)
+
+    def clear(self, date):
+        self.table.delete_item(Key={'delivery_date': date})
+
+
+def store_from_env():
+    """DynamoCursorStore if SEND_CURSOR_TABLE is set, else FileCursorStore(SEND_CURSOR_FILE)."""
+    table_name = os.environ.get('SEND_CURSOR_TABLE')
+    if table_name:
+        return DynamoCursorStore(table_name)
+    return FileCursorStore(os.environ.get('SEND_CURSOR_FILE', DEFAULT_CURSOR_FILE))
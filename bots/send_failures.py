@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Send failure classification, retry backoff and the per-run circuit breaker
+
+Every failed send is put in one of three categories:
+
+- RETRYABLE: worth another attempt shortly (429 throttling, 5xx, network
+  errors and timeouts). Sends retry these with jittered exponential backoff.
+- PERMANENT: the recipient cannot get the message (invalid or unreachable
+  number, unsubscribed, other 4xx). Not retried; the run records it in the
+  dead-letter store for a later replay.
+- SYSTEMIC: the failure is ours, not the recipient's (authentication, account
+  suspended, invalid sender), so every other send would fail the same way.
+  The circuit breaker aborts the run instead of burning one API call per
+  subscriber.
+
+Works on twilio.base.exceptions.TwilioRestException,
+async_transport.TwilioHTTPError and transports.SendError alike (all carry
+.status and .code).
+"""
+
+import logging
+import random
+import threading
+
+logger = logging.getLogger()
+
+RETRYABLE = 'retryable'
+PERMANENT = 'permanent'
+SYSTEMIC = 'systemic'
+
+DEFAULT_MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # seconds before the first retry (before jitter)
+BACKOFF_CAP = 8.0
+SYSTEMIC_THRESHOLD = 3  # systemic failures before the breaker opens
+CONSECUTIVE_FAILURE_THRESHOLD = 50  # failures in a row of any kind (e.g. a Twilio outage)
+
+# Twilio error codes (https://www.twilio.com/docs/api/errors) that are about our
+# account or sender rather than the recipient
+SYSTEMIC_CODES = frozenset({
+    20003,  # authentication failed
+    20005,  # account not active
+    20008,  # test credentials used for a live request
+    20404,  # resource not found (wrong account SID)
+    21606,  # 'From' number is not a valid sender for this account
+    21608,  # trial account: 'To' is unverified (applies to every recipient)
+    63007,  # no WhatsApp channel for the 'From' address
+    63012,  # channel account misconfigured
+    63013,  # channel policy violation (sender blocked)
+})
+# Codes that may be retried even though they come with a 4xx status
+RETRYABLE_CODES = frozenset({
+    20429,  # too many requests
+    63018,  # rate limit exceeded for the channel
+    30001,  # queue overflow
+})
+
+
+def classify(error):
+    """Category of an exception raised by a send: RETRYABLE, PERMANENT or SYSTEMIC."""
+    status = getattr(error, 'status', None)
+    code = getattr(error, 'code', None)
+    if isinstance(status, int):
+        if code in SYSTEMIC_CODES or status in (401, 403):
+            return SYSTEMIC
+        if code in RETRYABLE_CODES or status == 429 or status >= 500:
+            return RETRYABLE
+        return PERMANENT
+    # Connection errors, timeouts (incl. requests' exceptions) and responses cut short
+    if isinstance(error, (OSError, EOFError)):
+        return RETRYABLE
+    # Not an API or network error (e.g. a malformed number rejected locally): resending will not help
+    return PERMANENT
+
+
+def is_throttled(error):
+    """Whether Twilio rejected the request for exceeding our throughput (429 and its codes)."""
+    return getattr(error, 'status', None) == 429 or getattr(error, 'code', None) in (20429, 63018)
+
+
+def should_retry(error):
+    """
+    Whether to resend within the run. Timeouts are RETRYABLE but not resent:
+    Twilio may already have accepted the request, and a later pass (guarded by
+    the delivery ledger) is preferred over a possible duplicate.
+    """
+    return classify(error) == RETRYABLE and not isinstance(error, TimeoutError)
+
+
+def backoff_delay(attempt, retry_after=None, base=BACKOFF_BASE, cap=BACKOFF_CAP, rand=random.random):
+    """
+    Seconds to wait before retry number attempt + 1: "full jitter" over an
+    exponential window, so concurrent senders do not retry in lockstep. A
+    Retry-After from the server is honoured as the minimum.
+    """
+    delay = rand() * min(cap, base * 2 ** attempt)
+    if retry_after:
+        delay = max(delay, min(float(retry_after), cap))
+    return delay
+
+
+class CircuitBreaker:
+    """
+    Per-run breaker shared by all sending threads/tasks. Opens (and stays
+    open) after `systemic_threshold` systemic failures or `failure_threshold`
+    failures in a row; senders check `open` before each send.
+    """
+
+    def __init__(self, systemic_threshold=SYSTEMIC_THRESHOLD, failure_threshold=CONSECUTIVE_FAILURE_THRESHOLD):
+        self.systemic_threshold = systemic_threshold
+        self.failure_threshold = failure_threshold
+        self.systemic = 0
+        self.consecutive = 0
+        self.reason = None
+        self._lock = threading.Lock()
+
+    @property
+    def open(self):
+        return self.reason is not None
+
+    def record(self, result):
+        """Count a SendResult; results without a category (cancelled, not sent) are ignored."""
+        if not result.ok and result.category is None:
+            return
+        with self._lock:
+            if result.ok:
+                self.consecutive = 0
+                return
+            self.consecutive += 1
+            if result.category == SYSTEMIC:
+                self.systemic += 1
+            if self.reason is None:
+                if self.systemic >= self.systemic_threshold:
+                    self.reason = f"{self.systemic} systemic failures, last: {result.error}"
+                elif self.consecutive >= self.failure_threshold:
+                    self.reason = f"{self.consecutive} failures in a row, last: {result.error}"
+                if self.reason:
+                    logger.error(f"Circuit breaker open: {self.reason}")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Coordinator/worker sharded fan-out for large subscriber lists
+
+In sharded mode one coordinator invocation loads the recipients, drops the
+ones the delivery ledger already has for the day, splits the rest into
+fixed-size shards by hashing the phone number, and dispatches each shard to
+a worker invocation of the same function ({"shard": {...}} events). Worker
+responses are gathered into one daily summary.
+
+The account-wide Twilio rate (SEND_RATE_PER_SECOND) is split across the
+shards that run at the same time, so scaling out adds invocations, not
+throughput beyond the Twilio tier.
+
+Dispatchers:
+- LambdaDispatcher: synchronous Lambda invokes from a thread pool (production)
+- ProcessPoolDispatcher: the same shard events run through a worker function
+  in a local process pool (testing; see scripts/run_sharded.py)
+"""
+
+import json
+import logging
+import math
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger()
+
+DEFAULT_SHARD_SIZE = 1000
+DEFAULT_SHARD_PARALLELISM = 20
+MAX_REPORTED_FAILURES = 20
+
+
+def shard_of(phone, shard_count):
+    """Stable shard number for a phone (crc32, so it is the same in every process)."""
+    return zlib.crc32(phone.encode('utf-8')) % shard_count
+
+
+def plan_shards(recipients, shard_size=DEFAULT_SHARD_SIZE):
+    """Split recipients into ceil(n / shard_size) hash shards; each keeps the input order."""
+    shard_count = max(1, math.ceil(len(recipients) / max(1, shard_size)))
+    shards = [[] for _ in range(shard_count)]
+    for phone in recipients:
+        shards[shard_of(phone, shard_count)].append(phone)
+    return [shard for shard in shards if shard]
+
+
+def shard_events(date, shards, rate_per_second, parallelism, budget_ms=None):
+    """Worker events for the planned shards; each gets an equal share of the rate."""
+    running = max(1, min(parallelism, len(shards)))
+    share = rate_per_second / running if rate_per_second > 0 else 0
+    events = []
+    for index, recipients in enumerate(shards):
+        shard = {'date': date, 'index': index, 'count': len(shards),
+                 'recipients': recipients, 'rate_per_second': share}
+        if budget_ms is not None:
+            shard['budget_ms'] = budget_ms
+        events.append({'shard': shard})
+    return events
+
+
+def summarize(date, shard_results, elapsed):
+    """
+    Gather worker results ({'shard', 'recipients', 'delivery'} dicts) into the
+    daily summary returned by the coordinator. `remaining` counts the
+    recipients of shards that stopped early, failed outright or were aborted
+    by their circuit breaker (`aborted`).
+    """
+    totals = {'attempted': 0, 'sent': 0, 'failed': 0, 'already_delivered': 0}
+    failures, incomplete, errors, aborted, slowest, remaining = [], [], [], [], 0.0, 0
+    for result in shard_results:
+        delivery = result.get('delivery') or {}
+        for key in totals:
+            totals[key] += delivery.get(key, 0)
+        failures.extend(delivery.get('failures', []))
+        slowest = max(slowest, delivery.get('elapsed_ms', 0.0))
+        error = result.get('error') or delivery.get('error')
+        if error:
+            errors.append({'shard': result['shard'], 'error': error})
+            remaining += result['recipients'] - delivery.get('attempted', 0)
+        elif delivery.get('aborted'):
+            aborted.append({'shard': result['shard'], 'aborted': delivery['aborted']})
+            remaining += delivery['total'] - delivery['resume_from']
+        elif 'resume_from' in delivery:
+            left = delivery['total'] - delivery['resume_from']
+            incomplete.append({'shard': result['shard'], 'remaining': left})
+            remaining += left
+    summary = dict(date=date, shards=len(shard_results), **totals,
+                   elapsed_ms=round(elapsed * 1000, 1), slowest_shard_ms=slowest)
+    if elapsed > 0 and totals['attempted']:
+        summary['per_second'] = round(totals['attempted'] / elapsed, 1)
+    if remaining:
+        summary['remaining'] = remaining
+    if incomplete:
+        summary['incomplete_shards'] = incomplete
+    if errors:
+        summary['shard_errors'] = errors
+    if aborted:
+        summary['aborted'] = aborted
+    if failures:
+        summary['failures'] = failures[:MAX_REPORTED_FAILURES]
+    return summary
+
+
+def _shard_result(event, response):
+    """Reduce a worker's handler response to what summarize() needs."""
+    result = _shard_error(event, None)
+    try:
+        body = json.loads(response.get('body') or '{}')
+    except (TypeError, ValueError):
+        body = {}
+    result['delivery'] = body.get('delivery')
+    result['error'] = body.get('error')
+    return result
+
+
+def _shard_error(event, error):
+    return {'shard': event['shard']['index'], 'recipients': len(event['shard']['recipients']), 'error': error}
+
+
+class LambdaDispatcher:
+    """Invoke a worker Lambda per shard (RequestResponse) from a thread pool and collect the results."""
+
+    def __init__(self, function_arn, parallelism=DEFAULT_SHARD_PARALLELISM):
+        self.function_arn = function_arn
+        self.parallelism = parallelism
+
+    def run(self, events):
+        import importlib
+        boto3 = importlib.import_module('boto3')
+        config = importlib.import_module('botocore.config').Config(
+            read_timeout=900, retries={'max_attempts': 0}, max_pool_connections=self.parallelism
+        )
+        client = boto3.client('lambda', config=config)
+
+        def invoke(event):
+            try:
+                response = client.invoke(FunctionName=self.function_arn, InvocationType='RequestResponse',
+                                         Payload=json.dumps(event).encode('utf-8'))
+                payload = json.loads(response['Payload'].read() or b'{}')
+                if response.get('FunctionError'):
+                    return _shard_error(event, payload.get('errorMessage', response['FunctionError']))
+                return _shard_result(event, payload)
+            except Exception as e:
+                logger.error(f"Shard {event['shard']['index']} invoke failed: {e}")
+                return _shard_error(event, str(e))
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.parallelism, len(events)))) as pool:
+            return list(pool.map(invoke, events))
+
+
+class ProcessPoolDispatcher:
+    """Run each shard event through worker(event) -> handler response in a local process pool."""
+
+    def __init__(self, worker, parallelism=DEFAULT_SHARD_PARALLELISM):
+        self.worker = worker
+        self.parallelism = parallelism
+
+    def run(self, events):
+        # Local runs only; multiprocessing stays off the Lambda import path
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # spawn: workers start clean, like fresh Lambda containers (no forked threads or event loops)
+        with ProcessPoolExecutor(max_workers=max(1, min(self.parallelism, len(events))),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            responses = list(pool.map(self.worker, events))
+        return [_shard_result(event, response) for event, response in zip(events, responses)]
+
+
+def coordinate(date, recipients, dispatcher, shard_size=DEFAULT_SHARD_SIZE, rate_per_second=0,
+               parallelism=DEFAULT_SHARD_PARALLELISM, budget_ms=None):
+    """Shard the recipients, dispatch the shards and return the daily summary."""
+    start = time.perf_counter()
+    shards = plan_shards(recipients, shard_size)
+    events = shard_events(date, shards, rate_per_second, parallelism, budget_ms)
+    logger.info(f"Coordinator: {len(recipients)} recipients in {len(shards)} shards "
+                f"(≤{shard_size} each, {parallelism} in parallel) for {date}")
+    results = dispatcher.run(events)
+    summary = summarize(date, results, time.perf_counter() - start)
+    logger.info(f"Coordinator: sent {summary['sent']}/{summary['attempted']} across {summary['shards']} shards "
+                f"in {summary['elapsed_ms'] / 1000:.2f}s")
+    return summary
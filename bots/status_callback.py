@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Twilio message status callback Lambda for WhatsApp Daily Mitzvah
+- Receives MessageStatus webhooks (StatusCallback=<function url>?date=<delivery date>),
+  accepted only with a valid X-Twilio-Signature when TWILIO_AUTH_TOKEN is set
+- Buffers them on an SQS queue (STATUS_QUEUE_URL) and consumes them in batches,
+  so each batch becomes one counter update per delivery date (bots/delivery_metrics.py)
+- Serves the day's delivery summary: GET ?date=YYYY-MM-DD (&token=... if WEBHOOK_TOKEN is set)
+
+Without STATUS_QUEUE_URL (local runs) a webhook is counted as it arrives.
+Without TWILIO_AUTH_TOKEN (local runs) webhooks are not authenticated.
+"""
+
+import base64
+import hashlib
+import hmac
+import importlib
+import json
+import logging
+import os
+from urllib.parse import parse_qsl
+
+try:
+    from bots import delivery_metrics
+    from bots.consent_handler import _parse_event, _respond
+except ImportError:
+    import delivery_metrics
+    from consent_handler import _parse_event, _respond
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Reused across warm invocations
+_counters = None
+_sqs = None
+
+
+def _get_counters():
+    global _counters
+    if _counters is None:
+        _counters = delivery_metrics.counters_from_env()
+    return _counters
+
+
+def _get_sqs():
+    global _sqs
+    if _sqs is None:
+        boto3 = importlib.import_module("boto3")
+        _sqs = boto3.client("sqs")
+    return _sqs
+
+
+def _is_sqs_batch(event):
+    records = event.get("Records") if isinstance(event, dict) else None
+    return bool(records) and records[0].get("eventSource") == "aws:sqs"
+
+
+def _apply(callbacks):
+    """Fold callbacks into the counters, one update per delivery date. Returns the dates that failed."""
+    failed = set()
+    for date, counts in delivery_metrics.aggregate(callbacks).items():
+        try:
+            _get_counters().add(date, counts)
+        except Exception:
+            logger.exception(f"Failed to update delivery metrics for {date}")
+            failed.add(date)
+    return failed
+
+
+def _consume(records):
+    """
+    SQS batch: apply every callback in it, then report the records of dates
+    whose update failed, and any malformed record, (ReportBatchItemFailures)
+    so only those are redelivered. A malformed record ends up on the queue's
+    dead-letter queue after maxReceiveCount attempts.
+
+    Callbacks are not deduplicated across batches: a record SQS delivers
+    again (e.g. after a timeout once its date was already applied) is counted
+    again, so the counters are event counts (see bots/delivery_metrics.py).
+    """
+    callbacks = []
+    record_ids = {}
+    malformed = []
+    for record in records:
+        try:
+            callback = json.loads(record["body"])
+            date = callback["date"]
+        except (KeyError, TypeError, ValueError):
+            logger.error(f"Malformed status callback record {record.get('messageId')}")
+            if record.get("messageId"):
+                malformed.append(record["messageId"])
+            continue
+        callbacks.append(callback)
+        record_ids.setdefault(date, []).append(record["messageId"])
+    failed = _apply(callbacks)
+    logger.info(f"Applied {len(callbacks)} status callbacks"
+                + (f"; {len(failed)} date(s) failed: {sorted(failed)}" if failed else "")
+                + (f"; {len(malformed)} malformed" if malformed else ""))
+    return {"batchItemFailures": [{"itemIdentifier": message_id}
+                                  for message_id in malformed
+                                  + [m for date in sorted(failed) for m in record_ids[date]]]}
+
+
+def _twilio_signature(auth_token, url, params):
+    """Twilio's request signature: base64 HMAC-SHA1 of the URL followed by the sorted POST params."""
+    payload = url + ''.join(f"{name}{value}" for name, value in sorted(params))
+    digest = hmac.new(auth_token.encode('utf-8'), payload.encode('utf-8'), hashlib.sha1).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def _is_from_twilio(event, headers, body_raw):
+    """Whether X-Twilio-Signature matches the request; always True without TWILIO_AUTH_TOKEN (local runs)."""
+    auth_token = os.environ.get("TWILIO_AUTH_TOKEN")
+    if not auth_token:
+        return True
+    signature = headers.get("x-twilio-signature")
+    if not signature:
+        return False
+    # The URL Twilio called: the Function URL host and path, with the ?date= query string as sent
+    url = f"https://{headers.get('host', '')}{event.get('rawPath') or '/'}"
+    if event.get("rawQueryString"):
+        url += f"?{event['rawQueryString']}"
+    params = parse_qsl(body_raw or '', keep_blank_values=True)
+    return hmac.compare_digest(_twilio_signature(auth_token, url, params), signature)
+
+
+def _handle_status_webhook(query, form):
+    callback = delivery_metrics.callback_from_form(query.get("date") or "unknown", form)
+    if not callback["sid"] or not callback["status"]:
+        return _respond(400, {"error": "Missing MessageSid or MessageStatus"})
+    queue_url = os.environ.get("STATUS_QUEUE_URL")
+    if queue_url:
+        _get_sqs().send_message(QueueUrl=queue_url, MessageBody=json.dumps(callback))
+    elif _apply([callback]):
+        return _respond(500, {"error": "Failed to record status"})
+    return _respond(200, {"status": "ok"})
+
+
+def _handle_summary(headers, query):
+    webhook_token = os.environ.get("WEBHOOK_TOKEN")
+    if webhook_token and (query.get("token") or headers.get("x-webhook-token")) != webhook_token:
+        return _respond(403, {"error": "Forbidden"})
+    date = query.get("date")
+    if not date:
+        return _respond(400, {"error": "Missing date (YYYY-MM-DD)"})
+    return _respond(200, _get_counters().summary(date))
+
+
+def lambda_handler(event, context):
+    try:
+        if _is_sqs_batch(event):
+            return _consume(event["Records"])
+
+        is_http, method, headers, query, body_raw, body_json, body_form = _parse_event(event)
+        if method == "GET":
+            return _handle_summary(headers, query)
+        if not _is_from_twilio(event, headers, body_raw):
+            logger.warning("Rejected status callback without a valid X-Twilio-Signature")
+            return _respond(403, {"error": "Forbidden"})
+        return _handle_status_webhook(query, body_form)
+
+    except Exception as e:
+        logger.exception("Status callback handler error")
+        if _is_sqs_batch(event):
+            raise  # the whole batch is redelivered
+        return _respond(500, {"error": str(e)})
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Subscriber change log for incremental recipient refreshes
+
+Every change of a subscriber's active state bumps a monotonic change
+counter and appends (version, phone, active) to a change log: deployed, the
+subscribers table's stream feeds it (bots/change_recorder.py); locally the
+consent handler records its own changes. The bot
+keeps a snapshot of the active recipients tagged with the version it
+reflects (bots/recipient_snapshot.py) and reads only the changes after that
+version, instead of the whole subscriber index on every run.
+
+The counter is bumped before the entry is written, so a version can be
+taken but not yet written (or lost, if the recorder dies in between).
+Readers treat a gap they cannot explain by an in-flight write as a reason to
+rebuild from the index (recipient_snapshot.contiguous). A rebuild applies
+the changes recorded just before it again (recorded_since), since the index
+it loads from may not show them yet.
+
+Stores:
+- DynamoChangeLog: SUBSCRIBER_CHANGES_TABLE (hash key `stream`, range key
+  `version`). The counter is item version 0; entries expire by TTL.
+- FileChangeLog: a local NDJSON file (SUBSCRIBER_CHANGES_FILE), for tests
+  and local runs.
+"""
+
+import importlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger()
+
+STREAM = 'subscribers'
+COUNTER_VERSION = 0
+CHANGE_TTL_SECONDS = 30 * 24 * 3600
+
+
+class Change:
+    """One consent change: the subscriber's phone and whether they are now an active recipient."""
+
+    __slots__ = ('version', 'phone', 'active', 'changed_at')
+
+    def __init__(self, version, phone, active, changed_at=0):
+        self.version = version
+        self.phone = phone
+        self.active = active
+        self.changed_at = changed_at
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(int(data['version']), data['phone'], bool(data['active']), int(data.get('changed_at', 0)))
+
+    def __repr__(self):
+        return f"Change({self.version}, {self.phone!r}, {'active' if self.active else 'inactive'})"
+
+
+class FileChangeLog:
+    """Change log as an NDJSON file; the counter is the last line's version."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                return [Change.from_dict(json.loads(line)) for line in fh if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def record(self, phone, active):
+        changes = self._read()
+        change = Change(changes[-1].version + 1 if changes else 1, phone, active, int(time.time()))
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            fh.write(json.dumps(change.to_dict()) + '\n')
+        return change.version
+
+    def latest(self):
+        changes = self._read()
+        return changes[-1].version if changes else 0
+
+    def since(self, version):
+        return [c for c in self._read() if c.version > version]
+
+    def recorded_since(self, timestamp):
+        return [c for c in reversed(self._read()) if c.changed_at >= timestamp]
+
+
+class DynamoChangeLog:
+    """Change log in a DynamoDB table: counter item at version 0, one item per change (boto3 imported on first use)."""
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            boto3 = importlib.import_module('boto3')
+            self._table = boto3.resource('dynamodb').Table(self.table_name)
+        return self._table
+
+    def record(self, phone, active):
+        response = self.table.update_item(
+            Key={'stream': STREAM, 'version': COUNTER_VERSION},
+            UpdateExpression='ADD latest :one',
+            ExpressionAttributeValues={':one': 1},
+            ReturnValues='UPDATED_NEW',
+        )
+        version = int(response['Attributes']['latest'])
+        now = int(time.time())
+        self.table.put_item(Item={
+            'stream': STREAM,
+            'version': version,
+            'phone': phone,
+            'active': active,
+            'changed_at': now,
+            'expires_at': now + CHANGE_TTL_SECONDS,
+        })
+        return version
+
+    def latest(self):
+        item = self.table.get_item(Key={'stream': STREAM, 'version': COUNTER_VERSION},
+                                   ConsistentRead=True).get('Item')
+        return int(item['latest']) if item else 0
+
+    def since(self, version):
+        query_kwargs = {
+            'KeyConditionExpression': '#s = :s AND #v > :v',
+            'ExpressionAttributeNames': {'#s': 'stream', '#v': 'version'},
+            'ExpressionAttributeValues': {':s': STREAM, ':v': max(version, COUNTER_VERSION)},
+            'ConsistentRead': True,
+        }
+        changes = []
+        while True:
+            response = self.table.query(**query_kwargs)
+            changes.extend(Change.from_dict(item) for item in response.get('Items', []))
+            if not response.get('LastEvaluatedKey'):
+                return changes
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def recorded_since(self, timestamp):
+        """Changes recorded at or after `timestamp` (epoch seconds), newest first."""
+        query_kwargs = {
+            'KeyConditionExpression': '#s = :s AND #v > :v',
+            'ExpressionAttributeNames': {'#s': 'stream', '#v': 'version'},
+            'ExpressionAttributeValues': {':s': STREAM, ':v': COUNTER_VERSION},
+            'ScanIndexForward': False,
+            'ConsistentRead': True,
+            'Limit': 100,  # usually a handful; stops at the first older entry
+        }
+        changes = []
+        while True:
+            response = self.table.query(**query_kwargs)
+            for item in response.get('Items', []):
+                change = Change.from_dict(item)
+                if change.changed_at < timestamp:
+                    return changes
+                changes.append(change)
+            if not response.get('LastEvaluatedKey'):
+                return changes
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def change_log_from_env():
+    """DynamoChangeLog if SUBSCRIBER_CHANGES_TABLE is set, FileChangeLog if SUBSCRIBER_CHANGES_FILE is, else None."""
+    table_name = os.environ.get('SUBSCRIBER_CHANGES_TABLE')
+    if table_name:
+        return DynamoChangeLog(table_name)
+    path = os.environ.get('SUBSCRIBER_CHANGES_FILE')
+    if path:
+        return FileChangeLog(path)
+    return None
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Sparse indexes of the subscribers table
+
+Subscriber records keep everyone who ever texted the bot, opted-out numbers
+and their consent evidence included. The send path only needs the phone
+numbers of active WhatsApp subscribers, so the consent handler stores two
+index keys that exist only while a subscriber is opted in on WhatsApp:
+
+- active_channel ('whatsapp'): key of ACTIVE_INDEX (range key phone), the
+  full recipient list in phone order;
+- active_timezone (the subscriber's timezone): key of TIMEZONE_INDEX (range
+  key phone), one local-time cohort per partition (bots/timezones.py).
+
+Both indexes project keys only. Opting out rewrites the record without the
+keys, which drops it from both, so a Query reads (and pays for) active
+subscribers only, never the opted-out rows or their evidence.
+
+Subscribers stored before the keys existed are indexed only once
+scripts/backfill_subscriber_index.py has run; it writes the BACKFILL_MARKER
+item last, and until then readers scan the table instead.
+"""
+
+try:
+    from bots import timezones
+except ImportError:
+    import timezones
+
+ACTIVE_ATTRIBUTE = 'active_channel'
+ACTIVE_INDEX = 'active-subscribers-index'
+TIMEZONE_ATTRIBUTE = 'active_timezone'
+TIMEZONE_INDEX = 'active-timezone-index'
+ACTIVE_CHANNEL = 'whatsapp'
+BACKFILL_MARKER = '#index-backfill'  # phone key of the item the backfill writes when it is done
+
+
+def index_attributes(phone, status, channel=ACTIVE_CHANNEL):
+    """
+    Derived attributes of a subscriber record: the timezone always, the
+    sparse index keys only for an opted-in WhatsApp subscriber.
+    """
+    zone = timezones.timezone_for_phone(phone)
+    attributes = {'timezone': zone}
+    if status == 'opted_in' and channel == ACTIVE_CHANNEL:
+        attributes[ACTIVE_ATTRIBUTE] = channel
+        attributes[TIMEZONE_ATTRIBUTE] = zone
+    return attributes
+
+
+def query_phones(table, index_name, attribute, value):
+    """Phone numbers under one key of a sparse index, in phone order, one page at a time."""
+    query_kwargs = {
+        'IndexName': index_name,
+        'KeyConditionExpression': '#k = :v',
+        'ExpressionAttributeNames': {'#k': attribute},
+        'ExpressionAttributeValues': {':v': value},
+        'ProjectionExpression': 'phone',
+    }
+    while True:
+        response = table.query(**query_kwargs)
+        for item in response.get('Items', []):
+            if item.get('phone'):
+                yield item['phone']
+        if not response.get('LastEvaluatedKey'):
+            return
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
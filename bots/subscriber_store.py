@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Subscriber storage for the consent handler and the bot
+
+Both sides talk to the subscribers through one small interface, so the
+same consent, load and send paths run against DynamoDB in production and
+against a local SQLite file offline (seeded by scripts/seed_subscribers.py):
+
+- get(phone): the subscriber record, or None
+- put(record) / put_many(records): replace whole records (subscriber_record)
+- transition(record): write a consent change in one conditional write,
+  unless the subscriber already has that consent status; returns
+  (changed, previous record), so duplicate webhooks do not race
+- active_phones(): active WhatsApp subscribers, in phone order
+- timezone_phones(zone): active subscribers in one timezone, in phone order
+- scan_active(segment, total_segments): pages of active phones from one
+  segment of a parallel scan (bots/recipient_stream.py)
+
+Both stores keep the sparse-index semantics of bots/subscriber_index.py: a
+record is listed only while it carries the index keys, i.e. while the
+subscriber is opted in on WhatsApp.
+
+Stores:
+- DynamoSubscriberStore: SUBSCRIBERS_TABLE and its keys-only GSIs
+  (SUBSCRIBERS_ACTIVE_INDEX, SUBSCRIBERS_TIMEZONE_INDEX); a filtered scan
+  of the table until the backfill has filled them
+- SQLiteSubscriberStore: SUBSCRIBERS_DB, a SQLite file with partial indexes
+  standing in for the GSIs
+"""
+
+import importlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+try:
+    from bots import subscriber_index
+    from bots import timezones
+except ImportError:
+    import subscriber_index
+    import timezones
+
+logger = logging.getLogger()
+
+DEFAULT_PAGE_SIZE = 1000  # SQLite rows per page; DynamoDB pages are sized by the service (1 MB)
+
+
+def subscriber_record(phone, status, source, evidence, timestamp_iso=None):
+    """The subscriber record the consent handler stores for a consent change."""
+    return {
+        "phone": phone,
+        "channel": "whatsapp",
+        "consent_purpose": "daily_mitzvot",
+        "consent_status": status,  # opted_in | opted_out
+        "source": source,
+        "evidence": evidence,
+        "timestamp_iso": timestamp_iso or datetime.now(timezone.utc).isoformat(),
+        "updated_by": "system",
+        # timezone, plus active_channel/active_timezone only while opted in
+        **subscriber_index.index_attributes(phone, status),
+    }
+
+
+class DynamoSubscriberStore:
+    """Subscribers in DynamoDB (boto3 imported on first use); `table` may be passed in, e.g. a stand-in."""
+
+    def __init__(self, table_name, active_index=subscriber_index.ACTIVE_INDEX,
+                 timezone_index=subscriber_index.TIMEZONE_INDEX, table=None):
+        self.table_name = table_name
+        self.active_index = active_index
+        self.timezone_index = timezone_index
+        self._table = table
+        self._index_ready = False
+
+    @property
+    def table(self):
+        if self._table is None:
+            boto3 = importlib.import_module('boto3')
+            self._table = boto3.resource('dynamodb').Table(self.table_name)
+        return self._table
+
+    def get(self, phone):
+        return self.table.get_item(Key={'phone': phone}).get('Item')
+
+    def put(self, record):
+        self.table.put_item(Item=record)
+
+    def transition(self, record):
+        """
+        One UpdateItem: set every attribute of record (and remove the sparse
+        index keys it does not carry) unless consent_status already matches.
+        """
+        attributes = {k: v for k, v in record.items() if k != 'phone'}
+        names = {f"#a{i}": name for i, name in enumerate(attributes)}
+        values = {f":v{i}": value for i, value in enumerate(attributes.values())}
+        expression = 'SET ' + ', '.join(f"#a{i} = :v{i}" for i in range(len(attributes)))
+        removed = [name for name in (subscriber_index.ACTIVE_ATTRIBUTE, subscriber_index.TIMEZONE_ATTRIBUTE)
+                   if name not in attributes]
+        if removed:
+            names.update({f"#r{i}": name for i, name in enumerate(removed)})
+            expression += ' REMOVE ' + ', '.join(f"#r{i}" for i in range(len(removed)))
+        names['#status'] = 'consent_status'
+        values[':status'] = record['consent_status']
+        try:
+            response = self.table.update_item(
+                Key={'phone': record['phone']},
+                UpdateExpression=expression,
+                ConditionExpression='attribute_not_exists(#status) OR #status <> :status',
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues='ALL_OLD',
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False, None
+        return True, response.get('Attributes')
+
+    def put_many(self, records):
+        count = 0
+        with self.table.batch_writer(overwrite_by_pkeys=['phone']) as writer:
+            for record in records:
+                writer.put_item(Item=record)
+                count += 1
+        return count
+
+    def index_ready(self):
+        """
+        Whether scripts/backfill_subscriber_index.py has filled the sparse
+        indexes (its marker item exists). Until it has, subscribers who opted
+        in before the index keys existed are missing from them, so reads scan
+        the table instead. Checked on every read until true, then cached.
+        """
+        if not self._index_ready:
+            marker = self.table.get_item(Key={'phone': subscriber_index.BACKFILL_MARKER},
+                                         ProjectionExpression='phone', ConsistentRead=True).get('Item')
+            self._index_ready = marker is not None
+            if not self._index_ready:
+                logger.warning(f"{self.table_name} has not been backfilled; scanning it for opted-in subscribers")
+        return self._index_ready
+
+    def _scan_opted_in(self, segment=None, total_segments=None, page_size=None):
+        """Pages of opted-in WhatsApp phones from a filtered Scan of the table (the pre-index recipient load)."""
+        scan_kwargs = {
+            'FilterExpression': '#status = :status AND #channel = :channel',
+            'ExpressionAttributeNames': {'#status': 'consent_status', '#channel': 'channel'},
+            'ExpressionAttributeValues': {':status': 'opted_in', ':channel': subscriber_index.ACTIVE_CHANNEL},
+            'ProjectionExpression': 'phone',
+        }
+        if total_segments:
+            scan_kwargs.update(Segment=segment, TotalSegments=total_segments)
+        if page_size:
+            scan_kwargs['Limit'] = page_size
+        while True:
+            response = self.table.scan(**scan_kwargs)
+            yield [item['phone'] for item in response.get('Items', []) if item.get('phone')]
+            if not response.get('LastEvaluatedKey'):
+                return
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def active_phones(self):
+        if not self.index_ready():
+            return sorted({phone for page in self._scan_opted_in() for phone in page})
+        return subscriber_index.query_phones(self.table, self.active_index,
+                                             subscriber_index.ACTIVE_ATTRIBUTE, subscriber_index.ACTIVE_CHANNEL)
+
+    def timezone_phones(self, zone):
+        if not self.index_ready():
+            # Records stored before the timezone attribute: derive it from the number, as the backfill will
+            return [phone for phone in self.active_phones() if timezones.timezone_for_phone(phone) == zone]
+        return subscriber_index.query_phones(self.table, self.timezone_index,
+                                             subscriber_index.TIMEZONE_ATTRIBUTE, zone)
+
+    def scan_active(self, segment, total_segments, page_size=None):
+        if not self.index_ready():
+            yield from self._scan_opted_in(segment, total_segments, page_size)
+            return
+        scan_kwargs = {'IndexName': self.active_index, 'Segment': segment, 'TotalSegments': total_segments,
+                       'ProjectionExpression': 'phone'}
+        if page_size:
+            scan_kwargs['Limit'] = page_size
+        while True:
+            response = self.table.scan(**scan_kwargs)
+            yield [item['phone'] for item in response.get('Items', []) if item.get('phone')]
+            if not response.get('LastEvaluatedKey'):
+                return
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def __repr__(self):
+        return f"DynamoSubscriberStore({self.table_name}/{self.active_index})"
+
+
+class SQLiteSubscriberStore:
+    """
+    Subscribers in a local SQLite file: one row per phone with the whole
+    record as JSON, and the sparse index keys as columns under partial
+    indexes. One connection, shared by threads behind a lock.
+    """
+
+    SCHEMA = f"""
+        CREATE TABLE IF NOT EXISTS subscribers (
+            phone TEXT PRIMARY KEY,
+            {subscriber_index.ACTIVE_ATTRIBUTE} TEXT,
+            {subscriber_index.TIMEZONE_ATTRIBUTE} TEXT,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS active_subscribers ON subscribers ({subscriber_index.ACTIVE_ATTRIBUTE}, phone)
+            WHERE {subscriber_index.ACTIVE_ATTRIBUTE} IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS active_timezone ON subscribers ({subscriber_index.TIMEZONE_ATTRIBUTE}, phone)
+            WHERE {subscriber_index.TIMEZONE_ATTRIBUTE} IS NOT NULL;
+    """
+
+    def __init__(self, path, page_size=DEFAULT_PAGE_SIZE):
+        import sqlite3  # only offline runs use it; keeps it off the Lambda cold start
+
+        self.path = path
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')  # the consent handler and the bot may share the file
+        self._db.executescript(self.SCHEMA)
+
+    @staticmethod
+    def _row(record):
+        return (record['phone'], record.get(subscriber_index.ACTIVE_ATTRIBUTE),
+                record.get(subscriber_index.TIMEZONE_ATTRIBUTE), json.dumps(record, default=str))
+
+    def get(self, phone):
+        with self._lock:
+            row = self._db.execute('SELECT record FROM subscribers WHERE phone = ?', (phone,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, record):
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO subscribers VALUES (?, ?, ?, ?)', self._row(record))
+
+    def transition(self, record):
+        """One conditional upsert: replace the record unless its consent_status already matches."""
+        with self._lock, self._db:
+            row = self._db.execute('SELECT record FROM subscribers WHERE phone = ?', (record['phone'],)).fetchone()
+            # The condition is in the statement, so other processes sharing the file cannot race it either
+            changed = self._db.execute(
+                'INSERT INTO subscribers VALUES (?, ?, ?, ?) ON CONFLICT (phone) DO UPDATE SET '
+                f'{subscriber_index.ACTIVE_ATTRIBUTE} = excluded.{subscriber_index.ACTIVE_ATTRIBUTE}, '
+                f'{subscriber_index.TIMEZONE_ATTRIBUTE} = excluded.{subscriber_index.TIMEZONE_ATTRIBUTE}, '
+                'record = excluded.record '
+                "WHERE json_extract(subscribers.record, '$.consent_status') "
+                "IS NOT json_extract(excluded.record, '$.consent_status')",
+                self._row(record),
+            ).rowcount
+        return bool(changed), json.loads(row[0]) if changed and row else None
+
+    def put_many(self, records):
+        with self._lock, self._db:
+            return self._db.executemany('INSERT OR REPLACE INTO subscribers VALUES (?, ?, ?, ?)',
+                                        (self._row(r) for r in records)).rowcount
+
+    def _pages(self, where, params, page_size=None):
+        """Phone pages in phone order, keyset-paginated like a Query's LastEvaluatedKey."""
+        page_size = page_size or self.page_size
+        last = ''
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    f'SELECT phone FROM subscribers WHERE {where} AND phone > ? ORDER BY phone LIMIT ?',
+                    (*params, last, page_size),
+                ).fetchall()
+            if rows:
+                yield [phone for phone, in rows]
+                last = rows[-1][0]
+            if len(rows) < page_size:
+                return
+
+    def active_phones(self):
+        for page in self._pages(f'{subscriber_index.ACTIVE_ATTRIBUTE} = ?', (subscriber_index.ACTIVE_CHANNEL,)):
+            yield from page
+
+    def timezone_phones(self, zone):
+        for page in self._pages(f'{subscriber_index.TIMEZONE_ATTRIBUTE} = ?', (zone,)):
+            yield from page
+
+    def scan_active(self, segment, total_segments, page_size=None):
+        # Segments split the rows by rowid, as DynamoDB splits a scan by hash range
+        yield from self._pages(f'{subscriber_index.ACTIVE_ATTRIBUTE} = ? AND rowid % ? = ?',
+                               (subscriber_index.ACTIVE_CHANNEL, total_segments, segment), page_size)
+
+    def count(self):
+        """(all records, active records)."""
+        with self._lock:
+            return self._db.execute(
+                f'SELECT COUNT(*), COUNT({subscriber_index.ACTIVE_ATTRIBUTE}) FROM subscribers').fetchone()
+
+    def __repr__(self):
+        return f"SQLiteSubscriberStore({self.path})"
+
+
+def store_from_env():
+    """
+    SQLiteSubscriberStore if SUBSCRIBERS_DB is set, DynamoSubscriberStore if
+    SUBSCRIBERS_TABLE is, else None (recipients then come from RECIPIENTS).
+    """
+    path = os.environ.get('SUBSCRIBERS_DB')
+    if path:
+        return SQLiteSubscriberStore(path)
+    table_name = os.environ.get('SUBSCRIBERS_TABLE')
+    if table_name:
+        return DynamoSubscriberStore(
+            table_name,
+            active_index=os.environ.get('SUBSCRIBERS_ACTIVE_INDEX', subscriber_index.ACTIVE_INDEX),
+            timezone_index=os.environ.get('SUBSCRIBERS_TIMEZONE_INDEX', subscriber_index.TIMEZONE_INDEX),
+        )
+    return None
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Subscriber timezones and local-hour delivery cohorts
+
+Every subscriber is stored with a timezone (the `timezone` attribute of the
+subscribers table), derived at opt-in from the phone number's country
+calling code. Countries spanning several zones get their most populous one;
++1 (US/Canada) keeps America/Chicago, the zone the single daily run was
+scheduled in.
+
+With DELIVERY_LOCAL_HOUR set, the bot is triggered every hour and each run
+sends only to the cohort whose local time is that hour. cohorts_at() groups
+the timezones at that local hour by their local date, so a run straddling
+the date line sends each group its own day's mitzvah. The recipient loader
+queries the table's timezone index (bots/subscriber_index.py) once per zone.
+"""
+
+from datetime import timezone
+from zoneinfo import ZoneInfo
+
+DEFAULT_TIMEZONE = 'America/Chicago'
+
+# Country calling code -> IANA timezone (longest prefix wins)
+COUNTRY_TIMEZONES = {
+    '1': 'America/Chicago',
+    '7': 'Europe/Moscow',
+    '20': 'Africa/Cairo',
+    '27': 'Africa/Johannesburg',
+    '30': 'Europe/Athens',
+    '31': 'Europe/Amsterdam',
+    '32': 'Europe/Brussels',
+    '33': 'Europe/Paris',
+    '34': 'Europe/Madrid',
+    '36': 'Europe/Budapest',
+    '39': 'Europe/Rome',
+    '40': 'Europe/Bucharest',
+    '41': 'Europe/Zurich',
+    '43': 'Europe/Vienna',
+    '44': 'Europe/London',
+    '45': 'Europe/Copenhagen',
+    '46': 'Europe/Stockholm',
+    '47': 'Europe/Oslo',
+    '48': 'Europe/Warsaw',
+    '49': 'Europe/Berlin',
+    '51': 'America/Lima',
+    '52': 'America/Mexico_City',
+    '54': 'America/Argentina/Buenos_Aires',
+    '55': 'America/Sao_Paulo',
+    '56': 'America/Santiago',
+    '57': 'America/Bogota',
+    '58': 'America/Caracas',
+    '60': 'Asia/Kuala_Lumpur',
+    '61': 'Australia/Sydney',
+    '62': 'Asia/Jakarta',
+    '63': 'Asia/Manila',
+    '64': 'Pacific/Auckland',
+    '65': 'Asia/Singapore',
+    '66': 'Asia/Bangkok',
+    '81': 'Asia/Tokyo',
+    '82': 'Asia/Seoul',
+    '84': 'Asia/Ho_Chi_Minh',
+    '86': 'Asia/Shanghai',
+    '90': 'Europe/Istanbul',
+    '91': 'Asia/Kolkata',
+    '92': 'Asia/Karachi',
+    '98': 'Asia/Tehran',
+    '212': 'Africa/Casablanca',
+    '234': 'Africa/Lagos',
+    '254': 'Africa/Nairobi',
+    '351': 'Europe/Lisbon',
+    '352': 'Europe/Luxembourg',
+    '353': 'Europe/Dublin',
+    '358': 'Europe/Helsinki',
+    '359': 'Europe/Sofia',
+    '370': 'Europe/Vilnius',
+    '371': 'Europe/Riga',
+    '372': 'Europe/Tallinn',
+    '373': 'Europe/Chisinau',
+    '374': 'Asia/Yerevan',
+    '375': 'Europe/Minsk',
+    '380': 'Europe/Kyiv',
+    '381': 'Europe/Belgrade',
+    '385': 'Europe/Zagreb',
+    '420': 'Europe/Prague',
+    '421': 'Europe/Bratislava',
+    '502': 'America/Guatemala',
+    '506': 'America/Costa_Rica',
+    '507': 'America/Panama',
+    '593': 'America/Guayaquil',
+    '598': 'America/Montevideo',
+    '852': 'Asia/Hong_Kong',
+    '886': 'Asia/Taipei',
+    '961': 'Asia/Beirut',
+    '962': 'Asia/Amman',
+    '966': 'Asia/Riyadh',
+    '971': 'Asia/Dubai',
+    '972': 'Asia/Jerusalem',
+    '995': 'Asia/Tbilisi',
+    '998': 'Asia/Tashkent',
+}
+KNOWN_TIMEZONES = tuple(sorted(set(COUNTRY_TIMEZONES.values()) | {DEFAULT_TIMEZONE}))
+
+
+def timezone_for_phone(phone):
+    """IANA timezone for an E.164 number (with or without a channel prefix); DEFAULT_TIMEZONE if unknown."""
+    digits = (phone or '').split(':', 1)[-1].lstrip('+')
+    for length in (3, 2, 1):
+        zone = COUNTRY_TIMEZONES.get(digits[:length])
+        if zone:
+            return zone
+    return DEFAULT_TIMEZONE
+
+
+class Cohort:
+    """The timezones that reach the delivery hour together, and their local delivery date."""
+
+    __slots__ = ('date', 'timezones')
+
+    def __init__(self, date, timezones):
+        self.date = date
+        self.timezones = tuple(timezones)
+
+    def to_dict(self):
+        return {'date': self.date, 'timezones': list(self.timezones)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['date'], data['timezones'])
+
+    def __repr__(self):
+        return f"Cohort({self.date!r}, {len(self.timezones)} timezones)"
+
+
+def cohorts_at(local_hour, when, zones=KNOWN_TIMEZONES):
+    """
+    Cohorts whose local time at `when` (an aware datetime, normally the
+    scheduled trigger time) falls within local_hour, one per local date.
+    """
+    when = when.astimezone(timezone.utc)
+    by_date = {}
+    for zone in zones:
+        local = when.astimezone(ZoneInfo(zone))
+        if local.hour == local_hour:
+            by_date.setdefault(local.date().isoformat(), []).append(zone)
+    return [Cohort(day, by_date[day]) for day in sorted(by_date)]
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Message transports for the Daily Mitzvah Bot
+
+send_daily_mitzvah hands each batch of recipients, with the day's
+PreparedDelivery, to a transport selected by SEND_TRANSPORT:
+
+- thread (default): twilio.rest.Client on a bounded thread pool
+- async: the asyncio keep-alive REST client (bots.async_transport)
+- fake: in-memory, with injectable latency and error rate
+  (FAKE_TRANSPORT_LATENCY_MS, FAKE_TRANSPORT_ERROR_RATE); no network
+- file: appends every message as an NDJSON line to SEND_SINK_FILE
+
+Every transport has the same batching and concurrency semantics:
+send_batch() runs at most `concurrency` sends at a time, takes a rate
+limiter token per send, retries retryable failures with jittered backoff
+within the deadline, stops starting sends once the circuit breaker opens,
+and returns SendResults in recipient order. With an adaptive controller
+(bots.adaptive_concurrency) the number in flight follows the controller's
+limit instead, up to `concurrency`. The thread, fake and file
+transports share MessageTransport.send_batch over their own send(); the
+async transport provides the same contract on one event loop.
+"""
+
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    from bots import fanout
+    from bots import send_failures
+except ImportError:
+    import fanout
+    import send_failures
+
+logger = logging.getLogger()
+
+DEFAULT_SINK_FILE = '/tmp/mitzvah_sent_messages.ndjson'
+TWILIO_TRANSPORTS = ('thread', 'async')  # need Twilio credentials
+
+
+class SendError(Exception):
+    """A failed send from a local transport, shaped like Twilio's errors (.status, .code)."""
+
+    def __init__(self, status, message, code=None, retry_after=None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.code = code
+        self.retry_after = retry_after
+
+
+class MessageTransport:
+    """
+    Base transport: subclasses implement send(prepared, recipient), which
+    delivers one message and returns its SID or raises. send_batch() fans
+    sends out over a thread pool of `concurrency` threads.
+    """
+
+    name = None
+
+    def __init__(self, concurrency=fanout.DEFAULT_CONCURRENCY, max_retries=send_failures.DEFAULT_MAX_RETRIES):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+
+    def send(self, prepared, recipient):
+        raise NotImplementedError
+
+    def _attempt(self, prepared, recipient, controller):
+        if controller is None:
+            return self.send(prepared, recipient)
+        controller.acquire()
+        start = time.perf_counter()
+        try:
+            sid = self.send(prepared, recipient)
+        except Exception as e:
+            controller.observe(time.perf_counter() - start, send_failures.is_throttled(e),
+                               getattr(e, 'retry_after', None))
+            raise
+        else:
+            controller.observe(time.perf_counter() - start)
+            return sid
+        finally:
+            controller.release()
+
+    def send_one(self, recipient, prepared, deadline=None, limiter=None, breaker=None, controller=None):
+        """
+        Send to one recipient. Retryable failures (send_failures.classify) are
+        retried up to max_retries times with jittered backoff, each retry
+        taking a `limiter` token, unless the retry would pass `deadline` or
+        `breaker` has opened. Each attempt holds a `controller` slot and
+        reports its latency and any 429 to it. Returns a fanout.SendResult
+        (failures carry their category).
+        """
+        attempt = 0
+        while True:
+            try:
+                sid = self._attempt(prepared, recipient, controller)
+                logger.info(f"Message sent successfully to {recipient}. SID: {sid}")
+                return fanout.SendResult(recipient, sid=sid)
+            except Exception as e:
+                category = send_failures.classify(e)
+                pause = send_failures.backoff_delay(attempt, getattr(e, 'retry_after', None))
+                if (not send_failures.should_retry(e) or attempt >= self.max_retries
+                        or (deadline is not None and time.monotonic() + pause > deadline)
+                        or (breaker is not None and breaker.open)):
+                    logger.error(f"Failed to send message to {recipient} ({category}): {e}")
+                    return fanout.SendResult(recipient, error=str(e), category=category)
+                attempt += 1
+                logger.warning(f"Send to {recipient} failed ({e}); retry {attempt} in {pause:.2f}s")
+                time.sleep(pause)
+                if limiter is not None:
+                    limiter.acquire()
+
+    def send_batch(self, recipients, prepared, deadline=None, limiter=None, breaker=None, controller=None):
+        """Send to every recipient; returns SendResults in recipient order."""
+        return fanout.fan_out(
+            lambda recipient: self.send_one(recipient, prepared, deadline=deadline, limiter=limiter, breaker=breaker,
+                                            controller=controller),
+            recipients,
+            max_workers=self.concurrency if controller is None else min(self.concurrency, controller.maximum),
+            limiter=limiter,
+            breaker=breaker,
+        )
+
+    @property
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return f"{type(self).__name__}(concurrency={self.concurrency})"
+
+
+class TwilioTransport(MessageTransport):
+    """twilio.rest.Client (or anything with .messages.create) on the shared thread pool."""
+
+    name = 'thread'
+
+    def __init__(self, client, **options):
+        super().__init__(**options)
+        self.client = client
+
+    def send(self, prepared, recipient):
+        return self.client.messages.create(**prepared.params(recipient)).sid
+
+
+class AsyncTransport(MessageTransport):
+    """
+    bots.async_transport: sends on one event loop over pooled keep-alive
+    connections, `concurrency` in flight. The loop and its connections are
+    created on first use and kept while the container is warm.
+    """
+
+    name = 'async'
+
+    def __init__(self, account_sid, auth_token, base_url=None, request_timeout=None, **options):
+        super().__init__(**options)
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.base_url = base_url
+        self.request_timeout = request_timeout
+        self._sender = None
+
+    @property
+    def sender(self):
+        if self._sender is None:
+            try:
+                from bots import async_transport
+            except ImportError:
+                import async_transport
+            transport_options = {'max_connections': self.concurrency, 'max_retries': self.max_retries}
+            if self.base_url:
+                transport_options['base_url'] = self.base_url
+            if self.request_timeout:
+                transport_options['request_timeout'] = self.request_timeout
+            self._sender = async_transport.AsyncSender(self.account_sid, self.auth_token, **transport_options)
+        return self._sender
+
+    def send(self, prepared, recipient):
+        sender = self.sender
+        return sender.loop.run_until_complete(sender.transport.send_form(prepared.form(recipient)))
+
+    def send_batch(self, recipients, prepared, deadline=None, limiter=None, breaker=None, controller=None):
+        return self.sender.send_all(recipients, prepared.form, deadline=deadline, limiter=limiter, breaker=breaker,
+                                    controller=controller)
+
+    @property
+    def stats(self):
+        return dict(self._sender.transport.stats) if self._sender else {}
+
+    def close(self):
+        if self._sender is not None:
+            self._sender.close()
+            self._sender = None
+
+
+class FakeTransport(MessageTransport):
+    """
+    In-memory transport for load tests: each send sleeps `latency` seconds,
+    numbers in `invalid` fail permanently (400/21211), `error_rate` of sends
+    fail transiently (503) and are retried like Twilio errors. Accepted
+    messages are kept in `messages` as (recipient, sid).
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency=0.0, error_rate=0.0, invalid=(), seed=None, **options):
+        super().__init__(**options)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.invalid = set(invalid)
+        self.messages = []
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._sids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def send(self, prepared, recipient):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if recipient in self.invalid:
+                self.errors += 1
+                raise SendError(400, f"The 'To' number {recipient} is not a valid phone number.", 21211)
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                raise SendError(503, 'Service Unavailable', 20500)
+            sid = f"SMfake{next(self._sids):026d}"
+            self.messages.append((recipient, sid))
+        return sid
+
+    @property
+    def stats(self):
+        return {'sent': len(self.messages), 'errors': self.errors}
+
+    def __repr__(self):
+        return (f"FakeTransport(latency={self.latency:g}s, error_rate={self.error_rate:g}, "
+                f"concurrency={self.concurrency})")
+
+
+class FileSinkTransport(MessageTransport):
+    """Writes each message as one NDJSON line ({date, to, from, body | content_sid, sid, sent_at}) to `path`."""
+
+    name = 'file'
+
+    def __init__(self, path=DEFAULT_SINK_FILE, **options):
+        super().__init__(**options)
+        self.path = path
+        self.written = 0
+        self._file = None
+        self._sids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def send(self, prepared, recipient):
+        record = prepared.record(recipient)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            record['sid'] = sid = f"SMfile{next(self._sids):026d}"
+            record['sent_at'] = datetime.now(timezone.utc).isoformat()
+            self._file.write(json.dumps(record) + '\n')
+            self.written += 1
+        return sid
+
+    @property
+    def stats(self):
+        return {'written': self.written, 'path': self.path}
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def transport_from_env(name, account_sid=None, auth_token=None, client_factory=None, **options):
+    """
+    Build the transport called `name` (SEND_TRANSPORT). client_factory()
+    returns the Twilio Client class for the thread transport; backend
+    settings come from the environment. options: concurrency, max_retries.
+    """
+    if name in TWILIO_TRANSPORTS and (not account_sid or not auth_token):
+        raise ValueError("Missing Twilio credentials in Lambda environment variables")
+    if name in ('thread', 'twilio'):
+        return TwilioTransport(client_factory()(account_sid, auth_token), **options)
+    if name == 'async':
+        return AsyncTransport(account_sid, auth_token, base_url=os.environ.get('TWILIO_API_BASE_URL'),
+                              request_timeout=float(os.environ.get('SEND_REQUEST_TIMEOUT_SECONDS') or 0) or None,
+                              **options)
+    if name == 'fake':
+        return FakeTransport(latency=float(os.environ.get('FAKE_TRANSPORT_LATENCY_MS', '0')) / 1000,
+                             error_rate=float(os.environ.get('FAKE_TRANSPORT_ERROR_RATE', '0')), **options)
+    if name == 'file':
+        return FileSinkTransport(os.environ.get('SEND_SINK_FILE', DEFAULT_SINK_FILE), **options)
+    raise ValueError(f"Unknown SEND_TRANSPORT {name!r} (expected thread, async, fake or file)")
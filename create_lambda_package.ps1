@@ -23,12 +23,22 @@ if ($Force -or -not (Test-Path "lambda_deploy\twilio")) {
 
 Write-Host "Copying Lambda bot code and data..." -ForegroundColor Yellow
 
-# Copy the Lambda bot code
+# Copy the Lambda bot code and its sibling modules
 Copy-Item "bots\lambda_mitzvah_bot.py" "lambda_deploy\lambda_function.py"
+Get-ChildItem "bots\*.py" | Where-Object { $_.Name -ne "lambda_mitzvah_bot.py" } | Copy-Item -Destination "lambda_deploy"
 
 # Copy the complete CSV schedule with corrected sources
 Copy-Item "Schedule_Complete_Sefer_HaMitzvos_WithBiblical.csv" "lambda_deploy\Schedule_Complete_Sefer_HaMitzvos_WithBiblical.csv"
 
+# Copy the holiday calendar (bot falls back to its embedded list if missing)
+Copy-Item "jewish_holidays.csv" "lambda_deploy\jewish_holidays.csv"
+
+# Compile the memory-mapped schedule artifact (bot falls back to CSV if missing/stale)
+python scripts\compile_schedule.py --output lambda_deploy\Schedule_Complete_Sefer_HaMitzvos_WithBiblical.bin
+
+# Pre-render every delivery date's message (bot re-renders stale/missing dates itself)
+python scripts\render_messages.py --all --output lambda_deploy\Schedule_Complete_Sefer_HaMitzvos_WithBiblical.messages.json
+
 Write-Host "Creating ZIP package..." -ForegroundColor Yellow
 Compress-Archive -Path "lambda_deploy\*" -DestinationPath "mitzvah_bot_lambda.zip" -Force
 
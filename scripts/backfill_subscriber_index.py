@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Backfill the derived index attributes of existing subscribers
+
+Subscribers written before the consent handler stored a timezone and the
+sparse index keys (bots/subscriber_index.py) are missing from the
+active-subscribers and active-timezone indexes, so the bot's recipient
+queries never reach them. This scans SUBSCRIBERS_TABLE once and, for each
+record missing its timezone (or, if opted in on WhatsApp, its index keys),
+sets the attributes the consent handler would have written. Run it once
+after the deploy that adds active-subscribers-index (see the deploy notes
+in AWS-SYSTEM-README.md).
+
+Each subscriber it makes active is also recorded in the change log
+(SUBSCRIBER_CHANGES_TABLE, if set), so recipient snapshots built before the
+backfill pick them up. A table with a stream is skipped: its stream
+recorder (bots/change_recorder.py) logs those updates already. When the scan is done it writes the backfill marker
+(subscriber_index.BACKFILL_MARKER); until then the bot loads recipients
+with a filtered scan of the table rather than the incomplete indexes.
+
+Usage:
+  SUBSCRIBERS_TABLE=daily-mitzvah-bot-stack-subscribers python scripts/backfill_subscriber_index.py --dry-run
+  SUBSCRIBERS_TABLE=daily-mitzvah-bot-stack-subscribers python scripts/backfill_subscriber_index.py
+  SUBSCRIBERS_TABLE=daily-mitzvah-bot-stack-subscribers SUBSCRIBER_CHANGES_TABLE=<SubscriberChangesTable physical id> python scripts/backfill_subscriber_index.py
+"""
+
+import argparse
+import collections
+import importlib
+import os
+import sys
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from bots import subscriber_changes  # noqa: E402
+from bots import subscriber_index  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Set the timezone and sparse index keys of existing subscribers.")
+    parser.add_argument("--table", default=os.environ.get('SUBSCRIBERS_TABLE'), help="Subscribers table name")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be updated")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not args.table:
+        print("❌ Set SUBSCRIBERS_TABLE or pass --table")
+        return 2
+    boto3 = importlib.import_module('boto3')
+    Attr = importlib.import_module('boto3.dynamodb.conditions').Attr
+    table = boto3.resource('dynamodb').Table(args.table)
+    change_log = None if args.dry_run else subscriber_changes.change_log_from_env()
+    streamed = bool((table.stream_specification or {}).get('StreamEnabled'))
+    if streamed:
+        change_log = None  # the stream recorder logs every update below
+
+    missing_keys = (Attr('consent_status').eq('opted_in') & Attr('channel').eq(subscriber_index.ACTIVE_CHANNEL)
+                    & Attr(subscriber_index.ACTIVE_ATTRIBUTE).not_exists())
+    scan_kwargs = {
+        'FilterExpression': Attr('timezone').not_exists() | missing_keys,
+        'ProjectionExpression': 'phone, consent_status, channel, active_channel',
+    }
+    updated = collections.Counter()
+    scanned = 0
+    recorded = 0
+    while True:
+        response = table.scan(**scan_kwargs)
+        scanned += response.get('ScannedCount', 0)
+        for item in response.get('Items', []):
+            if item['phone'] == subscriber_index.BACKFILL_MARKER:
+                continue
+            attributes = subscriber_index.index_attributes(item['phone'], item.get('consent_status'),
+                                                           item.get('channel'))
+            updated[(attributes['timezone'], subscriber_index.ACTIVE_ATTRIBUTE in attributes)] += 1
+            if args.dry_run:
+                continue
+            names = {f"#a{i}": name for i, name in enumerate(attributes)}
+            values = {f":v{i}": value for i, value in enumerate(attributes.values())}
+            values[':status'] = item.get('consent_status')
+            try:
+                # Skip a record whose consent changed since the scan (the handler wrote its attributes)
+                table.update_item(
+                    Key={'phone': item['phone']},
+                    UpdateExpression='SET ' + ', '.join(f"#a{i} = :v{i}" for i in range(len(attributes))),
+                    ConditionExpression='consent_status = :status',
+                    ExpressionAttributeNames=names,
+                    ExpressionAttributeValues=values,
+                )
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                updated[(attributes['timezone'], subscriber_index.ACTIVE_ATTRIBUTE in attributes)] -= 1
+                continue
+            if (change_log is not None and subscriber_index.ACTIVE_ATTRIBUTE in attributes
+                    and subscriber_index.ACTIVE_ATTRIBUTE not in item):
+                # New to the indexes: a snapshot built from them before now does not have this subscriber
+                change_log.record(item['phone'], True)
+                recorded += 1
+        if not response.get('LastEvaluatedKey'):
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    if not args.dry_run:
+        # Last, so the bot switches from scanning the table to the indexes only once they are complete
+        table.put_item(Item={'phone': subscriber_index.BACKFILL_MARKER,
+                             'backfilled_at': datetime.now(timezone.utc).isoformat()})
+
+    verb = "Would update" if args.dry_run else "Updated"
+    active = sum(count for (_, is_active), count in updated.items() if is_active)
+    print(f"✅ {verb} {sum(updated.values())} of {scanned} subscribers in {args.table} ({active} active)")
+    for (zone, is_active), count in sorted(updated.items(), key=lambda kv: -kv[1]):
+        print(f"  {zone:<32} {'active  ' if is_active else 'inactive'} {count}")
+    if not args.dry_run:
+        if streamed:
+            print(f"📝 {args.table} streams its changes; the change recorder logs them")
+        else:
+            print(f"📝 {recorded} changes recorded" if change_log is not None
+                  else "⚠️  SUBSCRIBER_CHANGES_TABLE not set; no changes recorded for recipient snapshots")
+        print(f"🏁 Wrote the backfill marker; the bot now reads {subscriber_index.ACTIVE_INDEX}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent recipient fan-out over the message transports
+
+Times the real send_daily_mitzvah path of an offline MitzvahLambdaBot for
+each recipient count and each transport (bots/transports.py):
+
+- thread: TwilioTransport with a stdlib stand-in for twilio.rest.Client,
+  against scripts/fake_twilio.py's FakeTwilioServer on localhost
+- async: the asyncio keep-alive transport against the same server
+- fake: the in-memory FakeTransport (same latency, --error-rate)
+- file: the NDJSON FileSinkTransport, writing to a temporary file
+
+The server simulates API latency and optional 429 throttling. Several
+transports can be compared in one run.
+
+Usage:
+  python scripts/bench_fanout.py
+  python scripts/bench_fanout.py --transport async --workers 64
+  python scripts/bench_fanout.py --transport thread async fake file --recipients 10000
+  python scripts/bench_fanout.py --transport fake --recipients 100000 --workers 64 --error-rate 0.01
+  python scripts/bench_fanout.py --recipients 1000 10000 --workers 32 --rate 0 --latency-ms 40
+  python scripts/bench_fanout.py --transport async --throttle-rate 200   # exercise 429 retries
+  python scripts/bench_fanout.py --sequential-max 1000   # also time the 1-worker baseline up to 1k
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from bots import fanout  # noqa: E402
+from bots import transports  # noqa: E402
+from bots.lambda_mitzvah_bot import MitzvahLambdaBot  # noqa: E402
+from scripts.fake_twilio import ACCOUNT_SID, FakeTwilioClient, FakeTwilioServer  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent fan-out against a fake Twilio endpoint.")
+    parser.add_argument("--recipients", type=int, nargs='+', default=[1000, 10000], help="Recipient counts to time")
+    parser.add_argument("--transport", choices=("thread", "async", "fake", "file"), nargs='+', default=["thread"],
+                        help="Send transport(s) to time")
+    parser.add_argument("--workers", type=int, default=fanout.DEFAULT_CONCURRENCY,
+                        help="Pool size (thread, fake, file) / in-flight requests (async)")
+    parser.add_argument("--rate", type=float, default=0, help="Token-bucket limit in messages/second (0 = unlimited)")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Simulated Twilio API latency")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="Fraction of fake-transport sends failing with a retryable 503")
+    parser.add_argument("--throttle-rate", type=float, default=0,
+                        help="Fake server answers 429 above this many requests/second (0 = never)")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Time budget in seconds per run; the async transport cancels what is left")
+    parser.add_argument("--date", default="2026-09-14", help="Delivery date to send")
+    parser.add_argument("--sequential-max", type=int, default=1000,
+                        help="Also time the 1-worker baseline for counts up to this size")
+    return parser.parse_args()
+
+
+def make_transport(name, server, args, workers, sink_path):
+    if name == 'thread':
+        return transports.TwilioTransport(FakeTwilioClient(server.base_url), concurrency=workers)
+    if name == 'async':
+        return transports.AsyncTransport(ACCOUNT_SID, 'fake-token', base_url=server.base_url, concurrency=workers)
+    if name == 'fake':
+        return transports.FakeTransport(latency=args.latency_ms / 1000, error_rate=args.error_rate,
+                                        concurrency=workers)
+    return transports.FileSinkTransport(sink_path, concurrency=workers)
+
+
+def run(bot, server, args, recipients, transport, rate):
+    bot.transport = transport
+    bot.rate_limiter = fanout.TokenBucket(rate)
+    before = server.accepted
+    deadline = time.monotonic() + args.budget if args.budget else None
+    report = bot.send_daily_mitzvah(target_date=args.date, recipients=recipients, deadline=deadline)
+    # Only the thread and async transports reach the server; requests cancelled
+    # in flight may or may not have
+    accepted = server.accepted - before if transport.name in transports.TWILIO_TRANSPORTS else report.sent
+    in_flight = sum(1 for r in report.failures if r.error == fanout.IN_FLIGHT)
+    if not report.sent <= accepted <= report.sent + in_flight:
+        raise RuntimeError(f"server accepted {accepted} messages, report says {report.sent}")
+    return report
+
+
+def main():
+    args = parse_args()
+    server = FakeTwilioServer(args.latency_ms / 1000, throttle_rate=args.throttle_rate).start()
+    sink_path = os.path.join(tempfile.mkdtemp(prefix='mitzvah-bench-'), 'sent.ndjson')
+
+    os.environ.setdefault('USE_WHATSAPP_TEMPLATE', 'false')
+    bot = MitzvahLambdaBot(offline=True)
+    bot.whatsapp_number = '+15550000000'
+
+    print(f"📡 Fake Twilio at {server.base_url} ({args.latency_ms:g} ms latency"
+          + (f", 429 above {args.throttle_rate:g}/s" if args.throttle_rate else "") + "); "
+          f"{args.workers} in flight, rate limit " + (f"{args.rate:g}/s" if args.rate > 0 else "off"))
+    for name in args.transport:
+        transport = make_transport(name, server, args, args.workers, sink_path)
+        print(f"🚚 {transport!r}")
+        for count in args.recipients:
+            recipients = [f"+1555{n:07d}" for n in range(count)]
+            throttled = server.throttled
+            report = run(bot, server, args, recipients, transport, args.rate)
+            line = (f"👥 {count:>6} recipients: {report.elapsed:7.2f} s "
+                    f"({report.sent / report.elapsed:7.1f} msg/s, {report.failed} failed")
+            if args.throttle_rate and name in transports.TWILIO_TRANSPORTS:
+                line += f", {server.throttled - throttled} x 429"
+            line += ")"
+            if count <= args.sequential_max:
+                sequential = make_transport(name, server, args, 1, sink_path)
+                baseline = run(bot, server, args, recipients, sequential, 0)
+                sequential.close()
+                line += (f" | sequential {baseline.elapsed:7.2f} s "
+                         f"({baseline.elapsed / report.elapsed:.1f}x speedup)")
+            print(line)
+            if report.failed:
+                print(f"   first failures: {report.to_dict()['failures'][:3]}")
+        if transport.stats:
+            print(f"🔌 {name} transport: {transport.stats}")
+        transport.close()
+
+    server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
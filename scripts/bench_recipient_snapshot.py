@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recipient snapshot refreshes vs. a full index load
+
+Drives bots/recipient_snapshot.refresh against an in-memory stand-in for
+the active-subscribers index (one page per Query, after a simulated page
+latency) and an in-memory change log, through four steps:
+
+- cold:  no snapshot yet, so a full load from the index;
+- delta: --changes opt-ins and opt-outs applied from the change log;
+- slow:  the change log answers slower than the budget, so the last good
+         snapshot is used;
+- gap:   a change entry that was never written, so a rebuild, while the
+         index still lists a subscriber who has just opted out.
+
+After each step the snapshot is checked against the subscriber set it
+should reflect. Exits 1 on a mismatch.
+
+Usage:
+  python scripts/bench_recipient_snapshot.py
+  python scripts/bench_recipient_snapshot.py --subscribers 500000 --changes 200 --page-latency-ms 60
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from bots import recipient_snapshot  # noqa: E402
+from bots import subscriber_changes  # noqa: E402
+from bots import subscriber_index  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Time snapshot refreshes against a full recipient load.")
+    parser.add_argument("--subscribers", type=int, default=100000, help="Active subscribers in the index")
+    parser.add_argument("--changes", type=int, default=50, help="Consent changes between the cold and delta runs")
+    parser.add_argument("--page-items", type=int, default=5000, help="Items per Query page")
+    parser.add_argument("--page-latency-ms", type=float, default=40, help="Simulated latency per index page")
+    parser.add_argument("--budget-ms", type=float, default=200, help="Refresh latency budget")
+    return parser.parse_args()
+
+
+class FakeActiveIndex:
+    """Query over the current active set (plus `lagging` phones it has not dropped yet), one sorted page per call."""
+
+    def __init__(self, active, page_items, page_latency):
+        self.active = active
+        self.page_items = page_items
+        self.page_latency = page_latency
+        self.calls = 0
+        self.lagging = set()
+        self._sorted = []
+
+    def query(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.page_latency)
+        start = (kwargs.get('ExclusiveStartKey') or {}).get('offset', 0)
+        if not start:
+            self._sorted = sorted(self.active | self.lagging)  # one consistent order per query
+        phones = self._sorted
+        response = {'Items': [{'phone': p} for p in phones[start:start + self.page_items]]}
+        if start + self.page_items < len(phones):
+            response['LastEvaluatedKey'] = {'offset': start + self.page_items}
+        return response
+
+
+class MemoryChangeLog:
+    """Change counter and log in memory, with an optional delay on since()."""
+
+    def __init__(self):
+        self.changes = []
+        self.latest_version = 0
+        self.delay = 0.0
+
+    def record(self, phone, active, changed_at=None):
+        self.latest_version += 1
+        self.changes.append(subscriber_changes.Change(self.latest_version, phone, active,
+                                                      int(time.time() if changed_at is None else changed_at)))
+        return self.latest_version
+
+    def latest(self):
+        return self.latest_version
+
+    def since(self, version):
+        time.sleep(self.delay)
+        return [c for c in self.changes if c.version > version]
+
+    def recorded_since(self, timestamp):
+        return [c for c in reversed(self.changes) if c.changed_at >= timestamp]
+
+
+def step(label, path, change_log, index, expected, budget):
+    index.calls = 0
+    start = time.perf_counter()
+    snapshot, source = recipient_snapshot.refresh(
+        path, change_log,
+        lambda: subscriber_index.query_phones(index, subscriber_index.ACTIVE_INDEX,
+                                              subscriber_index.ACTIVE_ATTRIBUTE, subscriber_index.ACTIVE_CHANNEL),
+        budget=budget,
+    )
+    elapsed = time.perf_counter() - start
+    ok = snapshot.phones() == sorted(expected)
+    print(f"{label:<6} {source:<6} {elapsed * 1000:8.1f} ms   {index.calls:3d} index pages   "
+          f"version {snapshot.version:<5} {len(snapshot)} recipients {'✅' if ok else '❌'}")
+    return ok
+
+
+def main():
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    rng = random.Random(7)
+    active = {f"+1{rng.randrange(2000000000, 9999999999)}" for _ in range(args.subscribers)}
+    active |= {f"+44{rng.randrange(7000000000, 7999999999)}" for _ in range(args.subscribers // 10)}
+    index = FakeActiveIndex(active, args.page_items, args.page_latency_ms / 1000)
+    change_log = MemoryChangeLog()
+    budget = args.budget_ms / 1000
+    path = os.path.join(tempfile.mkdtemp(prefix='recipient-snapshot-'), 'recipients.snapshot')
+
+    print(f"📇 {len(active)} active subscribers, pages of {args.page_items} "
+          f"({args.page_latency_ms:g} ms each), {args.budget_ms:g} ms refresh budget")
+    results = [step("cold", path, change_log, index, active, budget)]
+    json_size = len(json.dumps(sorted(active)).encode('utf-8'))
+    print(f"       snapshot {os.path.getsize(path) / 1024:.0f} KiB on disk (JSON list {json_size / 1024:.0f} KiB)")
+
+    leaving = rng.sample(sorted(active), args.changes // 2)
+    for phone in leaving:
+        active.discard(phone)
+        change_log.record(phone, False)
+    for _ in range(args.changes - len(leaving)):
+        phone = f"+972{rng.randrange(500000000, 599999999)}"
+        active.add(phone)
+        change_log.record(phone, True)
+    results.append(step("delta", path, change_log, index, active, budget))
+
+    # A slow change log: the snapshot saved by the delta step is still the right answer
+    change_log.delay = budget * 3
+    phone = sorted(active)[0]
+    change_log.record(phone, False)
+    results.append(step("slow", path, change_log, index, active, budget))
+    active.discard(phone)
+    change_log.delay = 0.0
+
+    # A version taken but never written, long enough ago that it is not in flight
+    change_log.latest_version += 1
+    phone = f"+972{rng.randrange(500000000, 599999999)}"
+    active.add(phone)
+    change_log.record(phone, True, changed_at=time.time() - recipient_snapshot.GAP_GRACE_SECONDS * 2)
+    # An opt-out the eventually consistent index does not show yet: the rebuild must still drop it
+    phone = sorted(active)[-1]
+    active.discard(phone)
+    index.lagging.add(phone)
+    change_log.record(phone, False)
+    results.append(step("gap", path, change_log, index, active, budget))
+
+    if not all(results):
+        print("❌ snapshot does not match the active subscribers")
+        return 1
+    print("✅ snapshot matched the active subscribers after every step")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
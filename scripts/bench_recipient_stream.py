@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streamed vs preloaded recipients for a full-list run
+
+Runs send_daily_mitzvah of an offline MitzvahLambdaBot over an in-memory
+stand-in for the subscribers table. The table answers Query and
+Segment/TotalSegments Scan on the active-subscribers index one page at a
+time, after a simulated page latency. The bot sends over a zero-latency
+fake transport. It compares:
+
+- preloaded: _load_recipients queries the index page by page, then sends;
+- streamed:  SUBSCRIBERS_SCAN_SEGMENTS parallel scan segments feed the send
+             batches through the bounded queue (bots/recipient_stream.py).
+
+Reported per mode: time to the first send, total time, and peak memory
+allocated during the run (tracemalloc). The table itself is built first and
+is not counted. The ledger only counts its records, as the real one writes
+them to DynamoDB; dead letters and cursor are kept in memory.
+
+Usage:
+  python scripts/bench_recipient_stream.py
+  python scripts/bench_recipient_stream.py --subscribers 500000 --segments 8 --page-latency-ms 60
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from bots import fanout  # noqa: E402
+from bots import subscriber_index  # noqa: E402
+from bots import subscriber_store  # noqa: E402
+from bots import transports  # noqa: E402
+from bots.lambda_mitzvah_bot import MitzvahLambdaBot  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare streamed and preloaded recipients for a full-list send.")
+    parser.add_argument("--subscribers", type=int, default=200000, help="Active subscribers in the index")
+    parser.add_argument("--page-items", type=int, default=5000, help="Items per Query/Scan page")
+    parser.add_argument("--page-latency-ms", type=float, default=40, help="Simulated latency per page")
+    parser.add_argument("--segments", type=int, default=4, help="SUBSCRIBERS_SCAN_SEGMENTS for the streamed run")
+    parser.add_argument("--batch-size", type=int, default=500, help="SEND_BATCH_SIZE")
+    parser.add_argument("--date", default="2026-09-14", help="Delivery date to send")
+    return parser.parse_args()
+
+
+class FakeSubscribersIndex:
+    """Query / parallel Scan over a sorted list of phones, one page per call."""
+
+    name = 'bench-subscribers'
+
+    def __init__(self, phones, page_items, page_latency):
+        self.phones = phones
+        self.page_items = page_items
+        self.page_latency = page_latency
+        self.calls = 0
+
+    def _page(self, phones, kwargs):
+        self.calls += 1
+        time.sleep(self.page_latency)
+        start = (kwargs.get('ExclusiveStartKey') or {}).get('offset', 0)
+        page = phones[start:start + self.page_items]
+        response = {'Items': [{'phone': phone} for phone in page]}
+        if start + self.page_items < len(phones):
+            response['LastEvaluatedKey'] = {'offset': start + self.page_items}
+        return response
+
+    def get_item(self, Key, **kwargs):
+        # Only the backfill marker is read; this table has been backfilled
+        return {'Item': dict(Key)}
+
+    def query(self, **kwargs):
+        return self._page(self.phones, kwargs)
+
+    def scan(self, **kwargs):
+        # Segment i holds every TotalSegments-th item, like DynamoDB's hash-range split
+        return self._page(self.phones[kwargs['Segment']::kwargs['TotalSegments']], kwargs)
+
+
+class CountingLedger:
+    """Nothing delivered yet (a fresh day); records are only counted, as they would leave for DynamoDB."""
+
+    def __init__(self):
+        self.recorded = 0
+
+    def delivered(self, date, recipients=None):
+        return set()
+
+    def record(self, date, results):
+        self.recorded += len(results)
+
+
+class MemoryDeadLetters:
+    def pending(self, date):
+        return {}
+
+    def record(self, date, results):
+        pass
+
+
+class MemoryCursors:
+    def __init__(self):
+        self.cursors = {}
+
+    def load(self, date):
+        return None
+
+    def save(self, cursor):
+        self.cursors[cursor.date] = cursor.to_dict()
+
+    def clear(self, date):
+        pass
+
+
+class FirstSendTransport(transports.FakeTransport):
+    """Zero-latency fake that counts messages (without keeping them) and notes the first send."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.count = 0
+        self.first_send = None
+        self._count_lock = threading.Lock()
+
+    def send(self, prepared, recipient):
+        with self._count_lock:
+            if self.first_send is None:
+                self.first_send = time.perf_counter()
+            self.count += 1
+            return f"SMbench{self.count:026d}"
+
+
+def run(bot, table, args, label, segments):
+    bot.scan_segments = segments
+    bot.invalidate_recipients()
+    bot.ledger, bot.dead_letters, bot.cursor_store = CountingLedger(), MemoryDeadLetters(), MemoryCursors()
+    bot.transport = FirstSendTransport(concurrency=16)
+    table.calls = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    report = bot.send_daily_mitzvah(target_date=args.date)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    first = (bot.transport.first_send - start) * 1000 if bot.transport.first_send else float('nan')
+    print(f"{label:<22} first send {first:8.1f} ms   total {elapsed * 1000:8.1f} ms   "
+          f"peak {peak / 2 ** 20:6.1f} MiB   {report.sent} sent, {table.calls} pages")
+    return report
+
+
+def main():
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    os.environ.setdefault('USE_WHATSAPP_TEMPLATE', 'false')
+
+    phones = [f"+1555{n:07d}" for n in range(args.subscribers)]
+    table = FakeSubscribersIndex(phones, args.page_items, args.page_latency_ms / 1000)
+    bot = MitzvahLambdaBot(offline=True)
+    bot.recipients_ttl = 0  # reload the list for every preloaded run
+    bot.subscriber_store = subscriber_store.DynamoSubscriberStore(FakeSubscribersIndex.name, table=table)
+    bot.rate_limiter = fanout.TokenBucket(0)
+    bot.send_batch_size = args.batch_size
+
+    print(f"📇 {args.subscribers} subscribers in {subscriber_index.ACTIVE_INDEX} pages of {args.page_items} "
+          f"({args.page_latency_ms:g} ms each), batches of {args.batch_size}")
+    preloaded = run(bot, table, args, "preloaded list", 0)
+    streamed = run(bot, table, args, f"streamed, {args.segments} segments", args.segments)
+    if preloaded.sent != args.subscribers or streamed.sent != args.subscribers:
+        print("❌ not every subscriber was sent to exactly once")
+        return 1
+    print("✅ both runs reached every subscriber")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: ScheduleIndex lookups vs. the legacy linear scan
+
+Builds a multi-year schedule by repeating the CSV cycle back to back, then
+times date lookups through the dense ordinal index and through the linear
+scan that find_mitzvah_by_date used to do.
+
+Usage:
+  python scripts/bench_schedule_lookup.py
+  python scripts/bench_schedule_lookup.py --cycles 20 --lookups 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bots'))
+
+import schedule_artifact  # noqa: E402
+from schedule_index import ScheduleIndex  # noqa: E402
+from schedule_model import DeliveryDay  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare ScheduleIndex lookups with a linear scan.")
+    parser.add_argument("--input", default="Schedule_Complete_Sefer_HaMitzvos_WithBiblical.csv", help="Schedule CSV path")
+    parser.add_argument("--cycles", type=int, default=10, help="Number of back-to-back schedule cycles to load")
+    parser.add_argument("--lookups", type=int, default=2000, help="Number of random date lookups to time")
+    return parser.parse_args()
+
+
+def build_multi_year_schedule(csv_path, cycles):
+    daily_rows = schedule_artifact.read_schedule_rows(csv_path)
+    base = [DeliveryDay.from_rows(d, rows) for d, rows in sorted(daily_rows.items())]
+    first = date.fromisoformat(base[0].date)
+    span = (date.fromisoformat(base[-1].date) - first).days + 1
+
+    schedule = []
+    for cycle in range(cycles):
+        shift = timedelta(days=cycle * span)
+        for day in base:
+            schedule.append(DeliveryDay((date.fromisoformat(day.date) + shift).isoformat(), day.entries))
+    return schedule
+
+
+def linear_scan(schedule_data, date_str):
+    for row in schedule_data:
+        if row.date.strip() == date_str:
+            return row
+    return None
+
+
+def main():
+    args = parse_args()
+    schedule = build_multi_year_schedule(args.input, args.cycles)
+
+    start = time.perf_counter()
+    index = ScheduleIndex(schedule)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    first = date.fromordinal(index.first_ordinal)
+    span = index.last_ordinal - index.first_ordinal + 1
+    rng = random.Random(42)
+    queries = [(first + timedelta(days=rng.randrange(span))).isoformat() for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    scanned = [linear_scan(schedule, q) for q in queries]
+    scan_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.get(q) for q in queries]
+    index_s = time.perf_counter() - start
+
+    if scanned != indexed:
+        print("❌ Index and linear scan disagree")
+        return 1
+
+    print(f"📅 {len(schedule)} scheduled days over {span} calendar days ({args.cycles} cycles)")
+    print(f"🏗️  Index build: {build_ms:.2f} ms")
+    print(f"🐢 Linear scan: {scan_s / args.lookups * 1e6:9.2f} µs/lookup")
+    print(f"⚡ ScheduleIndex: {index_s / args.lookups * 1e6:9.2f} µs/lookup "
+          f"({scan_s / index_s:.0f}x faster)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
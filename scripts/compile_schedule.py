@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Compile the schedule CSV into the binary artifact memory-mapped by the Lambda bot.
+
+Usage:
+  python scripts/compile_schedule.py
+  python scripts/compile_schedule.py --input Schedule_Complete_Sefer_HaMitzvos_WithBiblical.csv \
+    --output Schedule_Complete_Sefer_HaMitzvos_WithBiblical.bin
+  python scripts/compile_schedule.py --check   # exit 1 if the artifact is missing or stale
+
+Re-run after every schedule CSV change; the bot falls back to CSV parsing
+whenever the artifact's recorded CSV hash no longer matches.
+
+Also reports drift between jewish_holidays.csv and the bot's embedded holiday
+fallback (--strict turns drift into a failing exit code).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bots'))
+
+import holiday_index  # noqa: E402
+import schedule_artifact  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compile the schedule CSV into a memory-mappable artifact.")
+    parser.add_argument("--input", default="Schedule_Complete_Sefer_HaMitzvos_WithBiblical.csv", help="Schedule CSV path")
+    parser.add_argument("--output", default="Schedule_Complete_Sefer_HaMitzvos_WithBiblical.bin", help="Artifact path")
+    parser.add_argument("--check", action="store_true", help="Only verify that the artifact exists and is fresh")
+    parser.add_argument("--holidays", default="jewish_holidays.csv", help="Holiday CSV to compare with the embedded fallback")
+    parser.add_argument("--strict", action="store_true", help="Exit non-zero if the holiday CSV and embedded fallback drift")
+    return parser.parse_args()
+
+
+def report_holiday_drift(holidays_csv):
+    """Print differences between the holiday CSV and the embedded fallback; return their count."""
+    if not os.path.exists(holidays_csv):
+        print(f"⚠️  {holidays_csv} not found; the bot will use its embedded holiday list")
+        return 0
+    drift = holiday_index.holiday_drift(
+        holiday_index.read_holidays_csv(holidays_csv), holiday_index.embedded_holidays()
+    )
+    if drift:
+        print(f"⚠️  {len(drift)} holiday difference(s) between {holidays_csv} and the embedded fallback:")
+        for line in drift:
+            print(f"   - {line}")
+    else:
+        print(f"✅ {holidays_csv} matches the embedded holiday fallback")
+    return len(drift)
+
+
+def main():
+    args = parse_args()
+    drift = report_holiday_drift(args.holidays)
+    if drift and args.strict:
+        return 1
+
+    if args.check:
+        artifact = schedule_artifact.open_artifact(args.output, source_csv=args.input)
+        if not artifact:
+            print(f"❌ {args.output} is missing or stale; re-run without --check")
+            return 1
+        print(f"✅ {args.output} is up to date ({len(artifact)} days)")
+        artifact.close()
+        return 0
+
+    stats = schedule_artifact.compile_schedule(args.input, args.output)
+    print(f"✅ Compiled {stats['rows']} rows / {stats['days']} days "
+          f"({stats['span_days']}-day table) into {args.output} ({stats['bytes']} bytes)")
+
+    # Report load cost of the artifact versus the CSV parse it replaces
+    start = time.perf_counter()
+    artifact = schedule_artifact.ScheduleArtifact(args.output, source_csv=args.input)
+    mmap_ms = (time.perf_counter() - start) * 1000
+    artifact.close()
+
+    start = time.perf_counter()
+    schedule_artifact.read_schedule_rows(args.input)
+    csv_ms = (time.perf_counter() - start) * 1000
+    print(f"⏱️  Artifact open+verify: {mmap_ms:.2f} ms | CSV parse: {csv_ms:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,12 +12,23 @@ python -m pip install twilio --target lambda_deploy --no-user
 
 echo 📄 Copying Lambda bot code and data...
 
-REM Copy the Lambda bot code
+REM Copy the Lambda bot code and its sibling modules
+copy bots\*.py lambda_deploy\
+del lambda_deploy\lambda_mitzvah_bot.py
 copy bots\lambda_mitzvah_bot.py lambda_deploy\lambda_function.py
 
 REM Copy the complete CSV schedule for external data loading (optional - bot has embedded data)
 copy Schedule_Complete_Sefer_HaMitzvos_WithBiblical.csv lambda_deploy\Schedule_Complete_Sefer_HaMitzvos_WithBiblical.csv
 
+REM Copy the holiday calendar (bot falls back to its embedded list if missing)
+copy jewish_holidays.csv lambda_deploy\jewish_holidays.csv
+
+REM Compile the memory-mapped schedule artifact (bot falls back to CSV if missing/stale)
+python scripts\compile_schedule.py --output lambda_deploy\Schedule_Complete_Sefer_HaMitzvos_WithBiblical.bin
+
+REM Pre-render every delivery date's message (bot re-renders stale/missing dates itself)
+python scripts\render_messages.py --all --output lambda_deploy\Schedule_Complete_Sefer_HaMitzvos_WithBiblical.messages.json
+
 echo 🗜️ Creating ZIP package...
 
 REM Create ZIP using PowerShell
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Render-only dry run: every payload for a date range, nothing sent
+
+Runs the send pipeline of an offline MitzvahLambdaBot (load_mitzvah_for_date
+-> render -> prepare_delivery -> per-recipient request) for each date in the
+range and N synthetic recipients, validates every payload, writes them as
+NDJSON and prints per-stage timing and throughput (see bots/dry_run.py).
+Exits 1 if any payload is invalid, so it can gate a schedule CSV change.
+
+Usage:
+  python scripts/dry_run.py --start 2026-09-01 --end 2027-08-31
+  python scripts/dry_run.py --start 2026-10-01 --recipients 1000 --fresh
+  python scripts/dry_run.py --start 2026-10-01 --end 2026-10-31 --template HXtest --json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import date
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from bots import dry_run  # noqa: E402
+from bots.lambda_mitzvah_bot import MitzvahLambdaBot  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Render and validate every payload for a date range without sending.")
+    parser.add_argument("--start", default=date.today().isoformat(), help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="Last date, inclusive (default: --start)")
+    parser.add_argument("--recipients", type=int, default=dry_run.DEFAULT_RECIPIENTS, help="Synthetic recipients")
+    parser.add_argument("--output", default="dry_run.ndjson", help="NDJSON payload file ('' to skip writing)")
+    parser.add_argument("--fresh", action="store_true", help="Render with format_message, bypassing the message cache")
+    parser.add_argument("--template", metavar="CONTENT_SID", help="Build WhatsApp template payloads with this SID")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.getLogger().setLevel(logging.ERROR)  # dates without a mitzvah are reported as skipped
+    if args.template:
+        os.environ.update(USE_WHATSAPP_TEMPLATE='true', WHATSAPP_TEMPLATE_SID=args.template)
+    else:
+        os.environ['USE_WHATSAPP_TEMPLATE'] = 'false'
+
+    bot = MitzvahLambdaBot(offline=True)
+    try:
+        report = bot.dry_run(args.start, args.end, args.recipients, output=args.output or None, fresh=args.fresh)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    result = report.to_dict()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"🧪 {result['start_date']}..{result['end_date']}: {result['days']} days, {result['rendered']} rendered, "
+              f"{len(result['skipped'])} skipped, {result['payloads']} payloads "
+              f"({'template' if args.template else 'freeform'})")
+        for stage, timing in result['stages'].items():
+            rate = f"{timing['per_second']:>12,.0f}/s" if timing['per_second'] else f"{'-':>14}"
+            print(f"  {stage:<9} {timing['seconds'] * 1000:9.1f} ms  {timing['count']:>9,} items  {rate}")
+        print(f"⏱️  {result['elapsed_s'] * 1000:.1f} ms total, {result['payloads_per_second'] or 0:,.0f} payloads/s"
+              + (f" -> {args.output}" if args.output else ""))
+
+    if not report:
+        for problem in result['problems']:
+            print(f"❌ {problem['date']}: {problem['problem']}" + (f" ({problem['to']})" if 'to' in problem else ""))
+        print(f"❌ {result['invalid']} problems")
+        return 1
+    print("✅ All payloads valid")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Twilio Messages REST resource
+
+FakeTwilioServer answers POST /2010-04-01/Accounts/<sid>/Messages.json on
+localhost like Twilio does: 201 + a JSON message resource after a simulated
+latency, or 429 (error code 20429) once requests exceed the configured
+per-second throughput. It can also fail like Twilio: 400/21211 for listed
+invalid numbers, a fraction of transient 503s, or 401/20003 for every request
+(bad credentials). Used by scripts/bench_fanout.py to exercise both the
+thread-pool and the asyncio transport without touching the real API.
+
+FakeTwilioClient is the slice of twilio.rest.Client the bot uses
+(client.messages.create) over plain http.client, for the thread transport;
+errors are raised as FakeTwilioRestException (.status, .code) like the SDK's.
+
+Run standalone to point a local bot at it:
+  python scripts/fake_twilio.py --port 8099 --latency-ms 50 --throttle-rate 80
+  SEND_TRANSPORT=async TWILIO_API_BASE_URL=http://127.0.0.1:8099 ...
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode
+
+ACCOUNT_SID = 'ACfake0000000000000000000000000000'
+THROTTLE_BURST_SECONDS = 0.2  # throttle_rate burst allowance
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def do_POST(self):
+        fake = self.server.fake
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        if not self.path.endswith('/Messages.json') or 'To' not in form or 'From' not in form:
+            self._reply(400, {'code': 21604, 'message': "A 'To' and 'From' number is required", 'status': 400})
+            return
+
+        if fake.unauthorized:
+            self._reply(401, {'code': 20003, 'message': 'Authenticate', 'status': 401})
+            return
+        if form['To'][0].split(':', 1)[-1] in fake.invalid:
+            self._reply(400, {'code': 21211, 'message': f"The 'To' number {form['To'][0]} is not a valid phone number.",
+                              'status': 400})
+            return
+        if fake.failure_rate and random.random() < fake.failure_rate:
+            self._reply(503, {'code': 20500, 'message': 'Service Unavailable', 'status': 503})
+            return
+
+        if not fake.admit():
+            headers = {'Retry-After': f"{fake.retry_after:g}"} if fake.retry_after else {}
+            self._reply(429, {'code': 20429, 'message': 'Too Many Requests', 'status': 429}, headers)
+            return
+
+        fake.process()
+        fake.record(form)
+        self._reply(201, {
+            'sid': 'SM' + uuid.uuid4().hex,
+            'status': 'queued',
+            'to': form['To'][0],
+            'from': form['From'][0],
+        })
+
+    def _reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default backlog of 5 drops bursts of new connections
+
+    def handle_error(self, request, client_address):
+        pass  # clients hang up mid-response when their sends are cancelled
+
+
+class FakeTwilioServer:
+    """
+    Threaded local Messages endpoint. latency is seconds per accepted request;
+    throttle_rate (requests/second, 0 = never) is enforced by a token bucket
+    holding THROTTLE_BURST_SECONDS of requests; requests beyond it get 429,
+    with an optional Retry-After header. With
+    `capacity`, at most that many requests are processed at once and the rest
+    queue, so latency grows once the offered load passes capacity / latency
+    requests per second. Numbers in
+    `invalid` get 400/21211, `failure_rate` of requests get 503, and
+    `unauthorized` answers everything with 401/20003.
+    """
+
+    def __init__(self, latency=0.0, throttle_rate=0, retry_after=None, host='127.0.0.1', port=0,
+                 invalid=(), failure_rate=0.0, unauthorized=False, capacity=0):
+        self.latency = latency
+        self.capacity = capacity
+        self._processing = threading.Semaphore(capacity) if capacity else None
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.invalid = set(invalid)
+        self.failure_rate = failure_rate
+        self.unauthorized = unauthorized
+        self.accepted = 0
+        self.throttled = 0
+        self.recipients = []
+        self._lock = threading.Lock()
+        self._burst = max(1.0, throttle_rate * THROTTLE_BURST_SECONDS)
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+        self._server = _Server((host, port), _Handler)
+        self._server.fake = self
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def admit(self):
+        if not self.throttle_rate:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self.throttle_rate)
+            self._updated = now
+            if self._tokens < 1:
+                self.throttled += 1
+                return False
+            self._tokens -= 1
+            return True
+
+    def process(self):
+        if self._processing is None:
+            time.sleep(self.latency)
+            return
+        with self._processing:
+            time.sleep(self.latency)
+
+    def record(self, form):
+        with self._lock:
+            self.accepted += 1
+            self.recipients.append(form['To'][0])
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeTwilioRestException(Exception):
+    """Stand-in for twilio.base.exceptions.TwilioRestException."""
+
+    def __init__(self, status, msg, code=None, retry_after=None):
+        super().__init__(f"HTTP {status} error: {msg}")
+        self.status = status
+        self.msg = msg
+        self.code = code
+        self.retry_after = retry_after
+
+
+class FakeTwilioClient:
+    """client.messages.create over one http.client connection per thread."""
+
+    def __init__(self, base_url):
+        host, _, port = base_url.split('://', 1)[1].partition(':')
+        self.host = host
+        self.port = int(port or 80)
+        self._local = threading.local()
+        self.messages = self
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=10)
+        return conn
+
+    def create(self, to, from_, body=None, content_sid=None, content_variables=None, status_callback=None):
+        form = {'To': to, 'From': from_}
+        if content_sid:
+            form.update(ContentSid=content_sid, ContentVariables=content_variables)
+        else:
+            form['Body'] = body
+        if status_callback:
+            form['StatusCallback'] = status_callback
+        conn = self._connection()
+        conn.request('POST', f'/2010-04-01/Accounts/{ACCOUNT_SID}/Messages.json', urlencode(form),
+                     {'Content-Type': 'application/x-www-form-urlencoded'})
+        response = conn.getresponse()
+        data = json.loads(response.read())
+        if response.status >= 400:
+            retry_after = response.getheader('Retry-After')
+            raise FakeTwilioRestException(response.status, data.get('message'), data.get('code'),
+                                          float(retry_after) if retry_after else None)
+        return type('Message', (), data)()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Twilio Messages API.")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--throttle-rate", type=float, default=0, help="Requests/second before 429 (0 = never)")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with 429")
+    parser.add_argument("--invalid", nargs='*', default=(), help="Numbers answered with 400/21211")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Fraction of requests answered with 503")
+    parser.add_argument("--unauthorized", action="store_true", help="Answer every request with 401/20003")
+    parser.add_argument("--capacity", type=int, default=0, help="Requests processed at once; the rest queue (0 = no limit)")
+    args = parser.parse_args()
+
+    server = FakeTwilioServer(args.latency_ms / 1000, args.throttle_rate, args.retry_after, port=args.port,
+                              invalid=args.invalid, failure_rate=args.failure_rate, unauthorized=args.unauthorized,
+                              capacity=args.capacity)
+    print(f"📡 Fake Twilio Messages API on {server.base_url} (Ctrl+C to stop)")
+    server.start()
+    try:
+        while True:
+            time.sleep(5)
+            print(f"   accepted {server.accepted}, throttled {server.throttled}")
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
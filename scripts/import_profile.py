@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Import-time profile and budget check for the Lambda bot module
+
+Runs `python -X importtime -c "import bots.lambda_mitzvah_bot"` in fresh
+interpreters, prints the slowest imports (self and cumulative, in the style
+of -X importtime) and checks the result against scripts/import_budget.json:
+- the module's median cumulative import time must stay under the budget
+- none of the deferred modules (twilio, boto3, csv, ...) may be imported
+
+Usage:
+  python scripts/import_profile.py             # report + enforce budget (exit 1 on breach)
+  python scripts/import_profile.py --runs 7 --top 25
+  python scripts/import_profile.py --report-only
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+DEFAULT_BUDGET = os.path.join(REPO_ROOT, 'scripts', 'import_budget.json')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Profile and enforce the bot's import-time budget.")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET, help="Budget JSON path")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreter runs to take the median over")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to print")
+    parser.add_argument("--report-only", action="store_true", help="Print the profile without enforcing the budget")
+    return parser.parse_args()
+
+
+def profile_import(module):
+    """Return {module: (self_us, cumulative_us)} for one fresh-interpreter import."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def main():
+    args = parse_args()
+    with open(args.budget, 'r', encoding='utf-8') as fh:
+        budget = json.load(fh)
+    module = budget['module']
+
+    runs = [profile_import(module) for _ in range(max(args.runs, 1))]
+    cumulative = [run[module][1] for run in runs]
+    median_us = statistics.median(cumulative)
+    last = runs[-1]
+
+    print(f"📦 import {module}: median {median_us / 1000:.1f} ms cumulative over {len(runs)} run(s) "
+          f"(min {min(cumulative) / 1000:.1f} ms, max {max(cumulative) / 1000:.1f} ms), {len(last)} modules")
+    print(f"{'self [us]':>10} | {'cumulative':>10} | imported package")
+    for name, (self_us, cumulative_us) in sorted(last.items(), key=lambda kv: kv[1][1], reverse=True)[:args.top]:
+        print(f"{self_us:>10} | {cumulative_us:>10} | {name}")
+
+    if args.report_only:
+        return 0
+
+    failures = []
+    if median_us > budget['max_cumulative_us']:
+        failures.append(f"median cumulative {median_us:.0f} us exceeds budget {budget['max_cumulative_us']} us")
+    for forbidden in budget.get('deferred_modules', []):
+        loaded = sorted(n for n in last if n == forbidden or n.startswith(forbidden + '.'))
+        if loaded:
+            failures.append(f"deferred module '{forbidden}' imported eagerly ({', '.join(loaded[:3])})")
+
+    if failures:
+        print("\n❌ Import budget exceeded:")
+        for failure in failures:
+            print(f"   - {failure}")
+        return 1
+    print(f"\n✅ Within budget ({budget['max_cumulative_us'] / 1000:.0f} ms, no deferred modules loaded)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
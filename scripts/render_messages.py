@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Render every delivery date's WhatsApp message ahead of time.
+
+Writes the final message body and the template content variables for each
+date in the delivery calendar into the message cache read by the bot's send
+path. Entries whose source rows (or the rendering code) changed are detected
+as stale and re-rendered; fresh entries are kept.
+
+Usage:
+  python scripts/render_messages.py             # render missing/stale dates
+  python scripts/render_messages.py --all       # re-render everything
+  python scripts/render_messages.py --check     # exit 1 if any date is missing or stale
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from bots import message_cache  # noqa: E402
+from bots.lambda_mitzvah_bot import MitzvahLambdaBot  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pre-render delivery messages into the message cache.")
+    parser.add_argument("--output", default=message_cache.MESSAGE_CACHE_PATH, help="Message cache path")
+    parser.add_argument("--all", action="store_true", help="Discard the existing cache and render every date")
+    parser.add_argument("--check", action="store_true", help="Only report missing/stale dates")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    os.environ['MESSAGE_CACHE'] = '' if args.all else args.output
+
+    start = time.perf_counter()
+    bot = MitzvahLambdaBot(offline=True)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    digests = {}
+    for delivery_date in bot.delivery_calendar:
+        mitzvah_data = bot.get_consolidated_mitzvot(delivery_date)
+        if mitzvah_data:
+            digests[delivery_date] = message_cache.source_hash(mitzvah_data.to_dict())
+    stale = bot.message_cache.stale_dates(digests)
+
+    if args.check:
+        if stale:
+            print(f"❌ {len(stale)} of {len(digests)} delivery dates missing or stale "
+                  f"(first: {', '.join(stale[:5])})")
+            return 1
+        print(f"✅ All {len(digests)} delivery dates are pre-rendered and fresh")
+        return 0
+
+    start = time.perf_counter()
+    rendered = bot.render_all()
+    render_ms = (time.perf_counter() - start) * 1000
+    bot.message_cache.save(args.output)
+
+    print(f"✅ Rendered {rendered} of {len(digests)} delivery dates into {args.output} "
+          f"({len(digests) - rendered} already fresh)")
+    print(f"⏱️  Load: {load_ms:.1f} ms | render: {render_ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
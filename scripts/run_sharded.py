@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Local sharded fan-out run against a fake Twilio endpoint
+
+Runs the coordinator path of lambda_handler (FANOUT_MODE=sharded) on this
+machine: the coordinator splits the recipients into SHARD_SIZE hash shards
+and a local process pool plays the worker Lambdas, each sending its shard
+over the async transport to scripts/fake_twilio.py's FakeTwilioServer. The
+delivery ledger is a temporary NDJSON file shared by the workers.
+
+Each run is checked for exactly-once delivery (every recipient reached the
+server once), then run again to confirm the ledger skips the whole list.
+With --compare the same list is also sent by a single (unsharded) run.
+
+Usage:
+  python scripts/run_sharded.py
+  python scripts/run_sharded.py --recipients 20000 --shard-size 2500 --parallelism 8 --compare
+  python scripts/run_sharded.py --rate 400   # account-wide limit, split across running shards
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from scripts.fake_twilio import ACCOUNT_SID, FakeTwilioServer  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run a sharded daily send locally against a fake Twilio endpoint.")
+    parser.add_argument("--recipients", type=int, default=8000, help="Number of recipients")
+    parser.add_argument("--shard-size", type=int, default=1000, help="SHARD_SIZE: recipients per shard")
+    parser.add_argument("--parallelism", type=int, default=4, help="SHARD_PARALLELISM: shards running at once")
+    parser.add_argument("--workers", type=int, default=16, help="SEND_CONCURRENCY inside each shard")
+    parser.add_argument("--rate", type=float, default=0, help="Account-wide messages/second (0 = unlimited)")
+    parser.add_argument("--latency-ms", type=float, default=100, help="Simulated Twilio API latency")
+    parser.add_argument("--date", default="2026-09-14", help="Delivery date to send")
+    parser.add_argument("--compare", action="store_true", help="Also time a single unsharded run")
+    return parser.parse_args()
+
+
+def check_once(server, recipients, label):
+    counts = Counter(to.split(':', 1)[-1] for to in server.recipients)
+    missing = [r for r in recipients if r not in counts]
+    repeated = [r for r, n in counts.items() if n > 1]
+    if missing or repeated:
+        raise RuntimeError(f"{label}: {len(missing)} recipients missed, {len(repeated)} sent more than once")
+    server.recipients.clear()
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='mitzvah-shards-')
+    server = FakeTwilioServer(args.latency_ms / 1000).start()
+    os.environ.update({
+        'TWILIO_ACCOUNT_SID': ACCOUNT_SID,
+        'TWILIO_AUTH_TOKEN': 'fake-token',
+        'TWILIO_WHATSAPP_NUMBER': '+15550000000',
+        'TWILIO_API_BASE_URL': server.base_url,
+        'USE_WHATSAPP_TEMPLATE': 'false',
+        'SEND_TRANSPORT': 'async',
+        'SEND_CONCURRENCY': str(args.workers),
+        'SEND_RATE_PER_SECOND': str(args.rate),
+        'SHARD_SIZE': str(args.shard_size),
+        'SHARD_PARALLELISM': str(args.parallelism),
+        'SEND_CURSOR_FILE': os.path.join(workdir, 'cursor.json'),
+        'DEAD_LETTER_FILE': os.path.join(workdir, 'dead-letters.ndjson'),
+    })
+    os.environ.pop('SUBSCRIBERS_TABLE', None)
+    os.environ.pop('DELIVERY_LEDGER_TABLE', None)
+    os.environ.pop('SEND_CURSOR_TABLE', None)
+    os.environ.pop('DEAD_LETTER_TABLE', None)
+
+    # Imported after the environment is set; worker processes inherit it
+    from bots import lambda_mitzvah_bot
+
+    bot, _ = lambda_mitzvah_bot._warm_state.get_bot()
+    recipients = [f"+1555{n:07d}" for n in range(args.recipients)]
+    bot.recipients = recipients
+    print(f"📡 Fake Twilio at {server.base_url} ({args.latency_ms:g} ms latency); {len(recipients)} recipients, "
+          f"shards of {args.shard_size}, {args.parallelism} in parallel, {args.workers} in flight each, rate limit "
+          + (f"{args.rate:g}/s" if args.rate > 0 else "off"))
+
+    def send(mode, run):
+        os.environ['FANOUT_MODE'] = mode
+        os.environ['DELIVERY_LEDGER_FILE'] = bot.ledger.path = os.path.join(workdir, f'ledger-{mode}.ndjson')
+        start = time.perf_counter()
+        response = lambda_mitzvah_bot.lambda_handler({'test_date': args.date}, None)
+        elapsed = time.perf_counter() - start
+        delivery = json.loads(response['body'])['delivery']
+        print(f"{'🧩' if mode == 'sharded' else '📨'} {mode:>7} {run}: {response['statusCode']} in {elapsed:6.2f} s "
+              f"— sent {delivery.get('sent', 0)}, failed {delivery.get('failed', 0)}, "
+              f"already delivered {delivery.get('already_delivered', 0)}"
+              + (f", {delivery['shards']} shards (slowest {delivery['slowest_shard_ms'] / 1000:.2f} s)"
+                 if 'shards' in delivery else "")
+              + (f", skipped: {delivery['skipped']}" if 'skipped' in delivery else ""))
+        return elapsed, delivery
+
+    modes = ['sharded', 'single'] if args.compare else ['sharded']
+    timings = {}
+    for mode in modes:
+        timings[mode], delivery = send(mode, 'run  ')
+        check_once(server, recipients, mode)
+        _, repeat = send(mode, 'again')
+        if server.recipients or repeat.get('skipped') != 'already delivered':
+            raise RuntimeError(f"{mode}: the repeated run sent {len(server.recipients)} messages")
+    print(f"✅ every recipient delivered exactly once ({server.accepted} messages accepted)")
+    if args.compare:
+        print(f"⚡ sharded {timings['single'] / timings['sharded']:.1f}x faster than a single run")
+
+    bot.transport.close()
+    server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
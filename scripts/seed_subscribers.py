@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Seed a subscriber store with synthetic subscribers
+
+Writes --count subscriber records, built exactly as the consent handler
+builds them (subscriber_store.subscriber_record), into a local SQLite file
+(SUBSCRIBERS_DB, the default) or a DynamoDB table (--table). Numbers are
+spread over the country codes in bots/timezones.py (mostly +1), and
+--opted-out of them are opted out, so the sparse indexes hold only part of
+the table, as in production.
+
+With --bench it then times the offline paths against the SQLite store:
+- load: the active-subscribers query, a one-zone cohort query and a
+  4-segment streamed scan;
+- consent: --consents STOP webhooks from active subscribers through
+  consent_handler, then 8 concurrent duplicate JOINs from one of them
+  (exactly one may re-subscribe);
+- send: send_daily_mitzvah over every remaining active subscriber, using
+  the fake transport with no rate limit.
+
+Usage:
+  python scripts/seed_subscribers.py                                # 100k into /tmp/mitzvah_subscribers.sqlite
+  python scripts/seed_subscribers.py --reset --bench
+  python scripts/seed_subscribers.py --count 5000 --table daily-mitzvah-bot-stack-subscribers
+"""
+
+import argparse
+import concurrent.futures
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from bots import recipient_stream  # noqa: E402
+from bots import subscriber_store  # noqa: E402
+from bots import timezones  # noqa: E402
+
+DEFAULT_DB = '/tmp/mitzvah_subscribers.sqlite'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed a subscriber store with synthetic subscribers.")
+    parser.add_argument("--db", default=os.environ.get('SUBSCRIBERS_DB', DEFAULT_DB), help="SQLite file to seed")
+    parser.add_argument("--table", help="Seed this DynamoDB table instead of --db")
+    parser.add_argument("--count", type=int, default=100000, help="Subscribers to generate")
+    parser.add_argument("--opted-out", type=float, default=0.1, help="Fraction of them opted out")
+    parser.add_argument("--us-share", type=float, default=0.7, help="Fraction of +1 numbers")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    parser.add_argument("--reset", action="store_true", help="Delete the SQLite file first")
+    parser.add_argument("--bench", action="store_true", help="Time the load, consent and send paths afterwards")
+    parser.add_argument("--consents", type=int, default=500, help="Consent webhooks for --bench")
+    parser.add_argument("--date", default="2026-09-14", help="Delivery date for --bench")
+    return parser.parse_args()
+
+
+def synthetic_records(count, opted_out, us_share, seed):
+    """`count` subscriber records with distinct numbers and consent times over the past year."""
+    rng = random.Random(seed)
+    codes = sorted(c for c in timezones.COUNTRY_TIMEZONES if c != '1')
+    now = datetime.now(timezone.utc)
+    seen = set()
+    while len(seen) < count:
+        code = '1' if rng.random() < us_share else rng.choice(codes)
+        phone = f"+{code}{rng.randrange(2 * 10 ** 9, 10 ** 10) if code == '1' else rng.randrange(10 ** 8, 10 ** 9)}"
+        if phone in seen:
+            continue
+        seen.add(phone)
+        status = 'opted_out' if rng.random() < opted_out else 'opted_in'
+        when = now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        yield subscriber_store.subscriber_record(phone, status, 'seed', {'seeded': True}, when.isoformat())
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {elapsed * 1000:9.1f} ms")
+    return result, elapsed
+
+
+def twilio_webhook(phone, body):
+    return {
+        'version': '2.0',
+        'requestContext': {'http': {'method': 'POST'}},
+        'headers': {'content-type': 'application/x-www-form-urlencoded'},
+        'body': urlencode({'From': f"whatsapp:{phone}", 'To': 'whatsapp:+15550000000', 'Body': body,
+                           'MessageSid': f"SMseed{random.randrange(10 ** 12):012d}"}),
+    }
+
+
+def bench(store, args):
+    workdir = tempfile.mkdtemp(prefix='mitzvah-seed-bench-')
+    os.environ.update({
+        'SUBSCRIBERS_DB': store.path,
+        'SEND_TRANSPORT': 'fake',
+        'SEND_RATE_PER_SECOND': '0',
+        'SEND_CONCURRENCY': '32',
+        'USE_WHATSAPP_TEMPLATE': 'false',
+        'SEND_CURSOR_FILE': os.path.join(workdir, 'cursor.json'),
+        'DELIVERY_LEDGER_FILE': os.path.join(workdir, 'ledger.ndjson'),
+        'DEAD_LETTER_FILE': os.path.join(workdir, 'dead-letters.ndjson'),
+    })
+    for name in ('SUBSCRIBERS_TABLE', 'SUBSCRIBER_CHANGES_TABLE', 'SUBSCRIBER_CHANGES_FILE', 'SEND_CURSOR_TABLE',
+                 'DELIVERY_LEDGER_TABLE', 'DEAD_LETTER_TABLE', 'DELIVERY_LOCAL_HOUR'):
+        os.environ.pop(name, None)
+    # Imported after the environment is set
+    from bots import consent_handler
+    from bots.lambda_mitzvah_bot import MitzvahLambdaBot
+
+    print("⏱️  load")
+    active, _ = timed("active-subscribers query", lambda: list(store.active_phones()))
+    timed(f"cohort query ({timezones.DEFAULT_TIMEZONE})",
+          lambda: list(store.timezone_phones(timezones.DEFAULT_TIMEZONE)))
+    streamed, _ = timed("streamed scan, 4 segments", lambda: list(recipient_stream.RecipientStream(store, 4).start()))
+    if sorted(streamed) != active:
+        print("❌ the streamed scan and the query disagree")
+        return 1
+
+    print(f"⏱️  consent ({args.consents} webhooks)")
+    rng = random.Random(args.seed)
+    latencies = []
+    for phone in rng.sample(active, min(args.consents, len(active))):
+        start = time.perf_counter()
+        response = consent_handler.lambda_handler(twilio_webhook(phone, 'STOP'), None)
+        latencies.append(time.perf_counter() - start)
+        if response['statusCode'] != 200:
+            print(f"❌ consent webhook failed: {response}")
+            return 1
+    latencies.sort()
+    print(f"  {'p50 / p95 per webhook':<32} {statistics.median(latencies) * 1000:9.2f} ms / "
+          f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:.2f} ms")
+
+    rejoining = phone
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        replies = list(pool.map(lambda _: consent_handler.lambda_handler(twilio_webhook(rejoining, 'JOIN'), None),
+                                range(8)))
+    subscribed = sum(1 for r in replies if 'already' not in r['body'])
+    print(f"  {'8 concurrent duplicate JOINs':<32} {subscribed:>9} subscribed, {8 - subscribed} already")
+    if subscribed != 1:
+        print("❌ duplicate JOINs raced")
+        return 1
+
+    print("⏱️  send")
+    bot = MitzvahLambdaBot()
+    recipients, _ = timed("recipient load (bot)", lambda: bot.recipients)
+    report, elapsed = timed("send_daily_mitzvah", lambda: bot.send_daily_mitzvah(target_date=args.date))
+    print(f"  {report.sent} sent, {report.failed} failed, {report.sent / elapsed:,.0f} msg/s")
+    expected = len(active) - len(latencies) + 1
+    if report.sent != expected:
+        print(f"❌ expected {expected} sends after the opt-outs and the re-subscribe")
+        return 1
+    print("✅ load, consent and send paths agree with the seeded store")
+    return 0
+
+
+def main():
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    if args.table:
+        store = subscriber_store.DynamoSubscriberStore(args.table)
+    else:
+        if args.reset:
+            for path in (args.db, f"{args.db}-wal", f"{args.db}-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+        store = subscriber_store.SQLiteSubscriberStore(args.db)
+
+    start = time.perf_counter()
+    written = store.put_many(synthetic_records(args.count, args.opted_out, args.us_share, args.seed))
+    elapsed = time.perf_counter() - start
+    print(f"🌱 Seeded {written} subscribers into {store!r} in {elapsed:.2f}s")
+    if isinstance(store, subscriber_store.SQLiteSubscriberStore):
+        total, active = store.count()
+        print(f"   {total} records, {active} active")
+    if args.bench:
+        if args.table:
+            print("❌ --bench runs against the SQLite store only")
+            return 2
+        return bench(store, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Simulation: adaptive (AIMD) send concurrency against a hidden rate limit
+
+Starts scripts/fake_twilio.py's FakeTwilioServer with a limit the sender is
+not told about: --hidden-rate answers 429 above that many requests/second,
+and/or --capacity queues requests beyond that many at once (latency grows
+instead). The real send_daily_mitzvah path of an offline MitzvahLambdaBot is
+then timed with a fixed low concurrency, a fixed high concurrency and the
+AIMD controller (no token bucket), and the controller's rate curve is
+printed. The run fails unless the adaptive steady-state rate (accepted
+requests/second over the second half of the run) is within --tolerance of
+the hidden limit.
+
+Usage:
+  python scripts/simulate_aimd.py
+  python scripts/simulate_aimd.py --hidden-rate 400 --latency-ms 80 --transport async
+  python scripts/simulate_aimd.py --hidden-rate 0 --capacity 20 --latency-ms 50   # latency-bound limit
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from bots import fanout  # noqa: E402
+from bots import transports  # noqa: E402
+from bots.lambda_mitzvah_bot import MitzvahLambdaBot  # noqa: E402
+from scripts.fake_twilio import ACCOUNT_SID, FakeTwilioClient, FakeTwilioServer  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Show AIMD send concurrency converging on a hidden rate limit.")
+    parser.add_argument("--recipients", type=int, default=8000, help="Recipients per run")
+    parser.add_argument("--hidden-rate", type=float, default=300, help="Server answers 429 above this many requests/s")
+    parser.add_argument("--capacity", type=int, default=0, help="Server processes this many requests at once")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with 429")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Simulated Twilio API latency")
+    parser.add_argument("--transport", choices=("thread", "async"), default="thread", help="Send transport")
+    parser.add_argument("--initial", type=int, default=8, help="Starting (and fixed-low) concurrency")
+    parser.add_argument("--max", type=int, default=128, help="SEND_MAX_CONCURRENCY (and fixed-high concurrency)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed distance from the hidden limit")
+    parser.add_argument("--date", default="2026-09-14", help="Delivery date to send")
+    return parser.parse_args()
+
+
+def make_transport(name, server, workers):
+    if name == 'async':
+        return transports.AsyncTransport(ACCOUNT_SID, 'fake-token', base_url=server.base_url, concurrency=workers,
+                                         max_retries=8)
+    return transports.TwilioTransport(FakeTwilioClient(server.base_url), concurrency=workers, max_retries=8)
+
+
+def run(bot, server, args, recipients, label, workers, adaptive):
+    bot.transport = make_transport(args.transport, server, workers)
+    bot.adaptive_concurrency = adaptive
+    bot.send_concurrency = args.initial
+    bot.send_max_concurrency = args.max
+    bot.send_batch_size = len(recipients)
+    throttled = server.throttled
+    report = bot.send_daily_mitzvah(target_date=args.date, recipients=recipients)
+    bot.transport.close()
+    print(f"{label:<22} {report.elapsed:7.2f} s  {report.sent / report.elapsed:7.1f} msg/s  "
+          f"{server.throttled - throttled:6d} x 429  {report.failed} failed")
+    return report
+
+
+def main():
+    args = parse_args()
+    logging.disable(logging.ERROR)
+    server = FakeTwilioServer(args.latency_ms / 1000, throttle_rate=args.hidden_rate, retry_after=args.retry_after,
+                              capacity=args.capacity).start()
+    limits = []
+    if args.hidden_rate:
+        limits.append(args.hidden_rate)
+    if args.capacity:
+        limits.append(args.capacity / (args.latency_ms / 1000))
+    hidden = min(limits) if limits else None
+
+    os.environ.setdefault('USE_WHATSAPP_TEMPLATE', 'false')
+    bot = MitzvahLambdaBot(offline=True)
+    bot.whatsapp_number = '+15550000000'
+    bot.rate_limiter = fanout.TokenBucket(0)
+    recipients = [f"+1555{n:07d}" for n in range(args.recipients)]
+
+    print(f"📡 Fake Twilio at {server.base_url}: {args.latency_ms:g} ms latency, hidden limit "
+          + (f"{hidden:g} msg/s" if hidden else "none")
+          + (f" (429 above {args.hidden_rate:g}/s)" if args.hidden_rate else "")
+          + (f" (capacity {args.capacity})" if args.capacity else "")
+          + f"; {len(recipients)} recipients over the {args.transport} transport")
+    run(bot, server, args, recipients, f"fixed {args.initial} in flight", args.initial, adaptive=False)
+    run(bot, server, args, recipients, f"fixed {args.max} in flight", args.max, adaptive=False)
+    report = run(bot, server, args, recipients, f"AIMD {args.initial}..{args.max}", args.max, adaptive=True)
+    server.stop()
+
+    summary = report.concurrency
+    print(f"\n📈 AIMD rate curve ({summary['increases']} increases, {summary['decreases']} decreases, "
+          f"latency target {summary['latency_target_ms']} ms):")
+    peak = max((p['rate'] or 0) for p in summary['curve']) or 1
+    for point in summary['curve']:
+        rate = point['rate'] or 0
+        print(f"  t={point['t']:6.2f}s  c={point['concurrency']:4d}  {rate:7.1f}/s  p95={point['p95_ms']} ms  "
+              + "█" * int(40 * rate / peak))
+
+    # Accepted requests per second over the second half of the run
+    curve = summary['curve']
+    middle, last = curve[len(curve) // 2], curve[-1]
+    steady_rate = (last['accepted'] - middle['accepted']) / (last['t'] - middle['t']) if last['t'] > middle['t'] else 0.0
+    print(f"\n⚖️  steady state {steady_rate:.1f} msg/s"
+          + (f" = {steady_rate / hidden:.0%} of the hidden {hidden:g} msg/s" if hidden else ""))
+    if hidden and abs(steady_rate / hidden - 1) > args.tolerance:
+        print(f"❌ not within {args.tolerance:.0%} of the hidden limit")
+        return 1
+    print("✅ converged near the hidden limit" if hidden else "✅ done")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Local load test for the delivery status callback pipeline
+
+Generates Twilio MessageStatus callbacks for a day's send (queued -> sent ->
+delivered -> read, with some failures by error code and some callbacks
+repeated), feeds them to bots/status_callback.py as SQS batches and checks
+the day's summary against the generated counts. Counters go to a temporary
+FileStatusCounters file, the local stand-in for DELIVERY_METRICS_TABLE. A few
+callbacks also go through the HTTP webhook path, and the summary is read
+back through GET ?date=.
+
+Usage:
+  python scripts/simulate_status_callbacks.py
+  python scripts/simulate_status_callbacks.py --messages 100000 --batch-size 100 --failure-rate 0.03
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+FAILURE_CODES = (63016, 63024, 30008)  # outside the 24h window, invalid recipient, unknown error
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Feed simulated Twilio status callbacks through the metrics pipeline.")
+    parser.add_argument("--messages", type=int, default=20000, help="Messages sent that day")
+    parser.add_argument("--batch-size", type=int, default=100, help="Callbacks per SQS batch (BatchSize)")
+    parser.add_argument("--failure-rate", type=float, default=0.03, help="Fraction of messages that fail")
+    parser.add_argument("--read-rate", type=float, default=0.7, help="Fraction of delivered messages read")
+    parser.add_argument("--duplicate-rate", type=float, default=0.02, help="Fraction of callbacks Twilio repeats")
+    parser.add_argument("--date", default="2026-09-14", help="Delivery date")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def generate(args, rng):
+    """(callbacks, expected Counter) for the day; a repeated callback directly follows its original."""
+    callbacks = []
+    for n in range(args.messages):
+        sid = f"SM{n:032d}"
+        statuses = ['queued', 'sent']
+        error_code = None
+        if rng.random() < args.failure_rate:
+            statuses.append(rng.choice(('failed', 'undelivered')))
+            error_code = str(rng.choice(FAILURE_CODES))
+        else:
+            statuses.append('delivered')
+            if rng.random() < args.read_rate:
+                statuses.append('read')
+        for status in statuses:
+            callback = {'date': args.date, 'sid': sid, 'status': status,
+                        'error_code': error_code if status in ('failed', 'undelivered') else None}
+            callbacks.append(callback)
+            if rng.random() < args.duplicate_rate:
+                callbacks.append(dict(callback))
+    return callbacks
+
+
+def expected_counts(callbacks, batch_size):
+    """What the counters should hold: a repeat is only dropped when it lands in its original's batch."""
+    counts = Counter()
+    for i, callback in enumerate(callbacks):
+        previous = callbacks[i - 1] if i else None
+        if previous == callback and i % batch_size:
+            continue
+        counts[callback['status']] += 1
+        if callback['error_code']:
+            counts[f"error_{callback['error_code']}"] += 1
+    return counts
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='mitzvah-status-')
+    os.environ['DELIVERY_METRICS_FILE'] = os.path.join(workdir, 'metrics.json')
+    os.environ.pop('DELIVERY_METRICS_TABLE', None)
+    os.environ.pop('STATUS_QUEUE_URL', None)
+    os.environ.pop('WEBHOOK_TOKEN', None)
+    os.environ['TWILIO_AUTH_TOKEN'] = 'simulated-auth-token'
+
+    import logging
+    logging.disable(logging.INFO)
+    from bots import status_callback
+
+    rng = random.Random(args.seed)
+    callbacks = generate(args, rng)
+    expected = expected_counts(callbacks, args.batch_size)
+
+    counters = status_callback._get_counters()
+    add = counters.add
+    writes = []
+    counters.add = lambda date, counts: writes.append(date) or add(date, counts)
+
+    start = time.perf_counter()
+    for offset in range(0, len(callbacks), args.batch_size):
+        batch = callbacks[offset:offset + args.batch_size]
+        records = [{'messageId': f"msg-{offset + i}", 'eventSource': 'aws:sqs', 'body': json.dumps(callback)}
+                   for i, callback in enumerate(batch)]
+        response = status_callback.lambda_handler({'Records': records}, None)
+        if response['batchItemFailures']:
+            raise RuntimeError(f"batch at {offset} reported failures: {response['batchItemFailures'][:3]}")
+    elapsed = time.perf_counter() - start
+    print(f"📬 {len(callbacks)} callbacks for {args.messages} messages in {elapsed:.2f} s "
+          f"({len(callbacks) / elapsed:,.0f}/s) with {len(writes)} counter writes "
+          f"(batches of {args.batch_size}; one write per event would be {len(callbacks)})")
+
+    # A malformed record is reported on its own; the rest of its batch is applied
+    response = status_callback.lambda_handler({'Records': [
+        {'messageId': 'msg-bad', 'eventSource': 'aws:sqs', 'body': json.dumps({'sid': 'SMbad'})},
+        {'messageId': 'msg-ok', 'eventSource': 'aws:sqs',
+         'body': json.dumps({'date': args.date, 'sid': 'SMok', 'status': 'sent', 'error_code': None})},
+    ]}, None)
+    if response['batchItemFailures'] != [{'itemIdentifier': 'msg-bad'}]:
+        raise RuntimeError(f"malformed record not reported alone: {response['batchItemFailures']}")
+    expected['sent'] += 1
+
+    # Webhook path: counted on arrival when no queue is configured, only if signed by Twilio
+    host, path = 'status.lambda-url.us-east-1.on.aws', '/'
+    for status in ('sent', 'delivered'):
+        form = {'MessageSid': 'SMwebhook', 'MessageStatus': status, 'To': 'whatsapp:+15550000001'}
+        signature = status_callback._twilio_signature(
+            os.environ['TWILIO_AUTH_TOKEN'], f"https://{host}{path}?date={args.date}", form.items())
+        webhook = {
+            'version': '2.0',
+            'requestContext': {'http': {'method': 'POST'}},
+            'rawPath': path,
+            'rawQueryString': f"date={args.date}",
+            'headers': {'content-type': 'application/x-www-form-urlencoded', 'host': host,
+                        'x-twilio-signature': signature},
+            'queryStringParameters': {'date': args.date},
+            'body': urlencode(form),
+        }
+        if status_callback.lambda_handler(webhook, None)['statusCode'] != 200:
+            raise RuntimeError("signed webhook callback was rejected")
+        expected[status] += 1
+        webhook['headers']['x-twilio-signature'] = 'forged'
+        if status_callback.lambda_handler(webhook, None)['statusCode'] != 403:
+            raise RuntimeError("forged webhook callback was accepted")
+
+    start = time.perf_counter()
+    response = status_callback.lambda_handler({
+        'version': '2.0',
+        'requestContext': {'http': {'method': 'GET'}},
+        'queryStringParameters': {'date': args.date},
+    }, None)
+    read_ms = (time.perf_counter() - start) * 1000
+    summary = json.loads(response['body'])
+    print(f"📊 summary ({read_ms:.1f} ms): {json.dumps(summary)}")
+
+    mismatches = {status: (summary.get(status), n) for status, n in expected.items()
+                  if not status.startswith('error_') and summary.get(status) != n}
+    mismatches.update({name: (summary['errors'].get(name[len('error_'):]), n) for name, n in expected.items()
+                       if name.startswith('error_') and summary['errors'].get(name[len('error_'):]) != n})
+    if mismatches:
+        raise RuntimeError(f"summary does not match the generated callbacks (got, expected): {mismatches}")
+    print("✅ counters match the generated callbacks")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())